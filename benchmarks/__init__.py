@@ -0,0 +1 @@
+"""Benchmarks for AgriVision's hot paths; `python -m benchmarks --help` for the suite."""
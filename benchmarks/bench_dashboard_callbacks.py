@@ -0,0 +1,74 @@
+"""
+Benchmark: dashboard callback data access, full-DataFrame scans vs YieldCube.
+
+The dataset is replicated with renamed areas to grow the row count; for each
+size we time the data work `update_dashboard` does per interaction (series
+selection, best-crop recommendation, comparison trends) both ways.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_dashboard_callbacks --data data/processed/yield_df.csv
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from src.data_preprocessing.yield_cube import YieldCube
+
+
+def scan_callback(df, country, crop, year_range):
+    """The per-callback data work as it was done before the cube (boolean-mask scans)."""
+    dff = df[(df["Area"] == country) & (df["Crop"] == crop) &
+             (df["Year"].between(year_range[0], year_range[1]))]
+    best_crop = df.groupby("Crop")["Yield"].mean().idxmax()
+    df_current = df[df["Crop"] == crop].groupby("Year")["Yield"].mean().reset_index()
+    df_best = df[df["Crop"] == best_crop].groupby("Year")["Yield"].mean().reset_index()
+    return dff, df_current, df_best
+
+
+def cube_callback(cube, country, crop, year_range):
+    dff = cube.series(country, crop, year_range[0], year_range[1])
+    best_crop = cube.best_crop
+    return dff, cube.crop_trend(crop), cube.crop_trend(best_crop)
+
+
+def replicate(df, factor):
+    """Grow the dataset `factor` times by cloning every area under a new name."""
+    copies = [df] + [df.assign(Area=df["Area"] + f" #{i}") for i in range(1, factor)]
+    return pd.concat(copies, ignore_index=True)
+
+
+def mean_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data/processed/yield_df.csv")
+    parser.add_argument("--factors", default="1,10,100")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.data)
+    base.rename(columns={"Item": "Crop", "hg/ha_yield": "Yield"}, inplace=True)
+    country, crop = base["Area"].iloc[0], base["Crop"].iloc[0]
+    year_range = [int(base["Year"].min()), int(base["Year"].max())]
+
+    print(f"{'rows':>10} {'cube build ms':>14} {'scan ms/cb':>11} {'cube ms/cb':>11} {'speedup':>8}")
+    for factor in (int(f) for f in args.factors.split(",")):
+        df = replicate(base, factor)
+
+        start = time.perf_counter()
+        cube = YieldCube(df)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        scan_ms = mean_ms(lambda: scan_callback(df, country, crop, year_range), args.repeat)
+        cube_ms = mean_ms(lambda: cube_callback(cube, country, crop, year_range), args.repeat)
+        print(f"{len(df):>10,} {build_ms:>14.1f} {scan_ms:>11.2f} {cube_ms:>11.3f} {scan_ms / cube_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
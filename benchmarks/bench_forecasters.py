@@ -0,0 +1,101 @@
+"""
+Benchmark: global multi-series forecaster vs per-series Prophet.
+
+The last `--holdout` years of every (Area, Crop) series are held out; both
+models train on the rest and forecast them. Reports MAPE over the held-out
+years and total wall time over all series (Prophet fitted one series at a
+time in this process, as `ProphetModelTrainer` does), with a last-value
+naive forecast for reference.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_forecasters --data data/processed/yield_df.csv
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.model.deep_learning_forecaster import GlobalForecaster
+from src.model.prophet_model_trainer import ProphetModelTrainer
+
+
+def errors(forecast, actual):
+    """Absolute percentage errors of `forecast` (Area, Crop, Year, yhat) against held-out yields."""
+    merged = actual.merge(forecast[["Area", "Crop", "Year", "yhat"]], on=["Area", "Crop", "Year"], how="inner")
+    merged = merged[merged["Yield"] > 0]
+    return (merged["yhat"] - merged["Yield"]).abs() / merged["Yield"], merged.groupby(["Area", "Crop"]).ngroups
+
+
+def prophet_forecasts(train, series, periods):
+    frames = []
+    for area, crop in series:
+        group = train[(train["Area"] == area) & (train["Crop"] == crop)]
+        forecast = ProphetModelTrainer(cache_size=0).train(group, crop, area, periods=periods)
+        if forecast is None:
+            continue
+        tail = forecast.tail(periods)
+        frames.append(pd.DataFrame({"Area": area, "Crop": crop, "Year": tail["ds"].dt.year, "yhat": tail["yhat"]}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def naive_forecasts(train, periods):
+    last = train.sort_values("Year").groupby(["Area", "Crop"]).tail(1)
+    return pd.concat([last.assign(Year=last["Year"] + h, yhat=last["Yield"]) for h in range(1, periods + 1)],
+                     ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data/processed/yield_df.csv")
+    parser.add_argument("--holdout", type=int, default=5, help="Years held out at the end of every series")
+    parser.add_argument("--max-series", type=int, default=None,
+                        help="Prophet on a random subset only; its total time is extrapolated to all series")
+    parser.add_argument("--epochs", type=int, default=300)
+    args = parser.parse_args()
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    df = pd.read_csv(args.data).rename(columns={"Item": "Crop", "hg/ha_yield": "Yield"})
+    df["Area"], df["Crop"] = df["Area"].astype(str), df["Crop"].astype(str)
+    cutoff = df["Year"].max() - args.holdout
+    train = df[df["Year"] <= cutoff]
+    actual = df[df["Year"] > cutoff].groupby(["Area", "Crop", "Year"], as_index=False)["Yield"].mean()
+    series = [tuple(k) for k in train[["Area", "Crop"]].drop_duplicates().sort_values(["Area", "Crop"]).to_numpy()]
+    print(f"📂 {len(series)} series, training through {cutoff}, forecasting {args.holdout} years")
+
+    rows = []
+
+    start = time.perf_counter()
+    model = GlobalForecaster(horizon=args.holdout, epochs=args.epochs).fit(train)
+    fit_s = time.perf_counter() - start
+    start = time.perf_counter()
+    global_fc = model.forecast(train, periods=args.holdout)
+    predict_s = time.perf_counter() - start
+    ape, n = errors(global_fc, actual)
+    rows.append(("global", n, fit_s, predict_s, fit_s + predict_s, ape))
+
+    subset = series
+    if args.max_series is not None and args.max_series < len(series):
+        rng = np.random.default_rng(0)
+        subset = [series[i] for i in sorted(rng.choice(len(series), args.max_series, replace=False))]
+    start = time.perf_counter()
+    prophet_fc = prophet_forecasts(train, subset, args.holdout)
+    prophet_s = (time.perf_counter() - start) * len(series) / len(subset)
+    ape, n = errors(prophet_fc, actual)
+    rows.append(("prophet" + ("" if subset is series else " (extrapolated)"), n, prophet_s, 0.0, prophet_s, ape))
+
+    if subset is not series:  # same series for a like-for-like error comparison
+        ape, n = errors(global_fc.merge(prophet_fc[["Area", "Crop"]].drop_duplicates()), actual)
+        rows.append(("global (same subset)", n, fit_s, predict_s, fit_s + predict_s, ape))
+
+    ape, n = errors(naive_forecasts(train, args.holdout), actual)
+    rows.append(("naive last value", n, 0.0, 0.0, 0.0, ape))
+
+    print(f"\n{'method':<24} {'series':>7} {'fit s':>8} {'predict s':>10} {'total s':>8} {'MAPE':>7} {'median APE':>11}")
+    for name, n, fit, predict, total, ape in rows:
+        print(f"{name:<24} {n:>7} {fit:>8.2f} {predict:>10.3f} {total:>8.2f} {ape.mean():>7.1%} {ape.median():>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
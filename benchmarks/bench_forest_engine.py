@@ -0,0 +1,74 @@
+"""
+Benchmark: pickled sklearn recommender vs array-backed ForestEngine.
+
+Reports artifact load time and rows/sec at several batch sizes, and checks
+that every backend returns exactly the same predictions as sklearn.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_forest_engine --model src/recommender/recommender_model.pkl
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+
+from src.model.forest_engine import ForestEngine, njit
+
+
+def best_of(fn, repeat):
+    """Minimum wall time of `repeat` calls (seconds)."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="src/recommender/recommender_model.pkl",
+                        help="Pickled {'model', 'scaler', 'features'} bundle")
+    parser.add_argument("--batch-sizes", default="1,100,10000,100000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # --- Load time ---
+    load_pickle = best_of(lambda: pickle.load(open(args.model, "rb")), args.repeat)
+    with open(args.model, "rb") as f:
+        bundle = pickle.load(f)
+    model, scaler = bundle["model"], bundle["scaler"]
+
+    engine_path = os.path.join(tempfile.mkdtemp(), "recommender_engine.npz")
+    ForestEngine.from_bundle(bundle).save(engine_path)
+    load_engine = best_of(lambda: ForestEngine.load(engine_path), args.repeat)
+    engine = ForestEngine.load(engine_path)
+
+    print(f"📦 Load time  pickle: {load_pickle * 1000:8.2f} ms   engine: {load_engine * 1000:8.2f} ms "
+          f"({os.path.getsize(args.model) / 1e6:.2f} MB vs {os.path.getsize(engine_path) / 1e6:.2f} MB)")
+
+    backends = ["numpy"] + (["numba"] if njit is not None else [])
+    rng = np.random.default_rng(42)
+
+    # Warm up the numba kernel so JIT compilation is not timed
+    if njit is not None:
+        engine.predict_proba(rng.normal(scaler.mean_, scaler.scale_, size=(8, len(scaler.mean_))), backend="numba")
+
+    print(f"\n{'batch':>8} {'sklearn rows/s':>16} " + " ".join(f"{b + ' rows/s':>16}" for b in backends) + "  identical")
+    for n in (int(b) for b in args.batch_sizes.split(",")):
+        X = rng.normal(scaler.mean_, scaler.scale_, size=(n, len(scaler.mean_)))
+        expected = model.predict_proba(scaler.transform(X))
+
+        t_sklearn = best_of(lambda: model.predict_proba(scaler.transform(X)), args.repeat)
+        t_backends = [best_of(lambda: engine.predict_proba(X, backend=b), args.repeat) for b in backends]
+        identical = all(np.array_equal(engine.predict_proba(X, backend=b), expected) for b in backends)
+
+        print(f"{n:>8} {n / t_sklearn:>16,.0f} " + " ".join(f"{n / t:>16,.0f}" for t in t_backends)
+              + f"  {'✅' if identical else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark: per-region NDVI from band rasters, whole-scene vs memmapped tiles.
+
+Writes a synthetic scene (uint16 red / NIR bands and an int32 region mask of
+`--regions` blocky areas) as .npy files, then reduces NDVI per region with
+each variant in a fresh process. Reports megapixels/sec, peak RSS (VmHWM,
+which counts memmapped file pages) and peak anonymous memory (sampled
+RssAnon: the heap the computation itself needs).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_raster_ndvi --size 8192 --regions 64
+"""
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.harness import peak_rss_mb
+from src.data_preprocessing.raster_ndvi import label_ndvi, load_band, ndvi
+
+
+def rss_anon_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class AnonPeak:
+    """Samples RssAnon every few milliseconds in a background thread."""
+
+    def __init__(self, interval=0.005):
+        self.interval, self.peak, self._stop = interval, 0.0, threading.Event()
+
+    def __enter__(self):
+        self.baseline = rss_anon_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_anon_mb())
+            time.sleep(self.interval)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_anon_mb())
+
+
+def make_scene(directory, size, regions, seed=0):
+    """Synthetic bands with a vegetation gradient and a grid of `regions` rectangular areas."""
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(regions)))
+    for name in ("red", "nir", "regions"):
+        dtype = np.int32 if name == "regions" else np.uint16
+        band = np.lib.format.open_memmap(os.path.join(directory, f"{name}.npy"), mode="w+",
+                                         dtype=dtype, shape=(size, size))
+        for start in range(0, size, 1024):  # write in strips to keep the generator's memory flat
+            rows = slice(start, min(start + 1024, size))
+            n = rows.stop - rows.start
+            if name == "regions":
+                r = np.arange(rows.start, rows.stop)[:, None] * side // size
+                c = np.arange(size)[None, :] * side // size
+                band[rows] = np.where(r * side + c < regions, r * side + c + 1, 0)
+            elif name == "red":
+                band[rows] = rng.integers(500, 3000, (n, size), dtype=np.uint16)
+            else:
+                band[rows] = rng.integers(2000, 6000, (n, size), dtype=np.uint16)
+        band.flush()
+        del band
+
+
+def whole_scene(directory, regions):
+    """Reference: load both bands fully and reduce in one vectorized pass."""
+    red = np.load(os.path.join(directory, "red.npy"))
+    nir = np.load(os.path.join(directory, "nir.npy"))
+    labels = np.load(os.path.join(directory, "regions.npy"))
+    values = ndvi(red, nir).ravel()
+    ids = labels.ravel()
+    valid = (ids > 0) & np.isfinite(values)
+    return (np.bincount(ids[valid], minlength=regions + 1),
+            np.bincount(ids[valid], weights=values[valid].astype(np.float64), minlength=regions + 1))
+
+
+def _run(variant, directory, regions, tile, workers, queue):
+    start = time.perf_counter()
+    with AnonPeak() as anon:
+        if variant == "whole scene (np.load)":
+            count, total = whole_scene(directory, regions)
+        else:
+            bands = [load_band(os.path.join(directory, f"{n}.npy")) for n in ("red", "nir", "regions")]
+            count, total, _ = label_ndvi(*bands, n_labels=regions + 1, tile=tile, workers=workers)
+    seconds = time.perf_counter() - start
+    queue.put((seconds, int(count.sum()), total, peak_rss_mb(), anon.peak - anon.baseline))
+
+
+def run(*args):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(*args, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=8192, help="Scene side in pixels")
+    parser.add_argument("--regions", type=int, default=64)
+    parser.add_argument("--tile", type=int, default=1024)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    make_scene(workdir, args.size, args.regions)
+    megapixels = args.size * args.size / 1e6
+    print(f"🛰️ Scene {args.size}x{args.size} ({megapixels:.0f} MP), {args.regions} regions, tile {args.tile}\n")
+
+    threads = os.cpu_count()
+    variants = [("whole scene (np.load)", 1), ("memmap tiles, 1 thread", 1)]
+    if threads > 1:
+        variants.append((f"memmap tiles, {threads} threads", threads))
+    print(f"{'variant':<28} {'seconds':>8} {'MP/s':>8} {'peak RSS MB':>12} {'peak anon +MB':>14}")
+    reference = None
+    for name, workers in variants:
+        seconds, pixels, total, rss, anon = run(name, workdir, args.regions, args.tile, workers)
+        reference = total if reference is None else reference
+        same = np.allclose(total, reference, rtol=1e-9)
+        print(f"{name:<28} {seconds:>8.2f} {megapixels / seconds:>8.1f} {rss:>12.0f} {anon:>14.0f}"
+              f"{'' if same else '  ❌ sums differ'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: processed dataset load time and memory, CSV vs typed Parquet.
+
+The dataset is replicated `--factor` times, written once as CSV and once via
+`save_processed_data` (categorical Area/Crop, int16 Year, float32, one row
+group per crop). Each load runs in a fresh process so peak RSS is not
+polluted by earlier runs.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_storage --data data/processed/yield_df.csv --factor 20
+"""
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.harness import peak_rss_mb
+from src.data_preprocessing.data_preprocessing import load_processed_data, save_processed_data
+
+
+def _load(variant, path, columns, filters, queue):
+    """Child process: time one load and report frame size and peak RSS."""
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    if variant == "csv (pd.read_csv)":
+        df = pd.read_csv(path)
+    else:
+        df = load_processed_data(path, columns=columns, filters=filters)
+    seconds = time.perf_counter() - start
+    queue.put((seconds, len(df), df.memory_usage(deep=True).sum(), peak_rss_mb() - rss_before))
+
+
+def run(variant, path, columns=None, filters=None):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_load, args=(variant, path, columns, filters, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data/processed/yield_df.csv")
+    parser.add_argument("--factor", type=int, default=20)
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.data)
+    base.rename(columns={"Item": "Crop", "hg/ha_yield": "Yield"}, inplace=True)
+    df = pd.concat([base.assign(Area=base["Area"] + f" #{i}") if i else base for i in range(args.factor)],
+                   ignore_index=True)
+    crop = df["Crop"].iloc[0]
+
+    workdir = tempfile.mkdtemp()
+    csv_path = os.path.join(workdir, "processed_data.csv")
+    parquet_path = save_processed_data(df, csv_path)
+    print(f"📂 {len(df):,} rows  CSV {os.path.getsize(csv_path) / 1e6:.1f} MB  "
+          f"Parquet {os.path.getsize(parquet_path) / 1e6:.1f} MB\n")
+
+    variants = [
+        ("csv (pd.read_csv)", csv_path, None, None),
+        ("parquet (all columns)", parquet_path, None, None),
+        ("parquet (Area/Year/Yield)", parquet_path, ["Area", "Year", "Yield"], None),
+        (f"parquet (Crop == {crop})", parquet_path, ["Area", "Year", "Yield"], [("Crop", "=", crop)]),
+    ]
+    print(f"{'variant':<32} {'load ms':>9} {'rows':>10} {'frame MB':>9} {'peak RSS +MB':>13}")
+    for name, path, columns, filters in variants:
+        seconds, rows, frame_bytes, rss_mb = run(name, path, columns, filters)
+        print(f"{name:<32} {seconds * 1000:>9.1f} {rows:>10,} {frame_bytes / 1e6:>9.1f} {rss_mb:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
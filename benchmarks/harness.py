@@ -0,0 +1,105 @@
+"""
+Measurement helpers shared by the benchmark suite and the standalone benchmarks.
+
+Each suite case runs in a fresh spawned process so peak memory (VmHWM) is its
+own, not whatever an earlier case left behind.
+"""
+import contextlib
+import multiprocessing as mp
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import traceback
+from datetime import datetime, timezone
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process (VmHWM; ru_maxrss survives exec on Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def time_repeats(step, repeats, warmup=1):
+    """Wall times (seconds) of `repeats` calls after `warmup` untimed ones."""
+    for _ in range(warmup):
+        step()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        step()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _child(setup, args, repeats, warmup, quiet, queue):
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull if quiet else sys.stdout), \
+                contextlib.redirect_stderr(devnull if quiet else sys.stderr):
+            start = time.perf_counter()
+            step, info = setup(*args)
+            setup_seconds = time.perf_counter() - start
+            rss_after_setup = peak_rss_mb()
+            times = time_repeats(step, repeats, warmup)
+        queue.put({
+            "median_s": statistics.median(times),
+            "min_s": min(times),
+            "max_s": max(times),
+            "repeats": repeats,
+            "setup_s": setup_seconds,
+            "peak_rss_mb": peak_rss_mb(),
+            "rss_growth_mb": peak_rss_mb() - rss_after_setup,
+            **info,
+        })
+    except Exception:
+        queue.put({"error": traceback.format_exc()})
+
+
+def run_isolated(setup, args=(), repeats=3, warmup=1, quiet=True):
+    """
+    Runs `setup(*args) -> (step, info)` and times `step` in a spawned process.
+
+    `peak_rss_mb` is the child's high-water mark including setup;
+    `rss_growth_mb` is how far the timed steps pushed it beyond setup. With
+    `quiet`, the code under test's progress prints, logs and warnings
+    are discarded (a failure still comes back as its traceback).
+
+    Returns:
+        dict: Timing and memory results merged with `info`, or {"error": traceback}.
+    """
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(setup, args, repeats, warmup, quiet, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def environment():
+    """Machine and library versions recorded with every result file."""
+    import numpy
+    import pandas
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+    }
@@ -0,0 +1,330 @@
+"""
+Benchmark suite for the load, preprocessing, training and serving hot paths.
+
+Every case runs against a synthetic, repo-shaped data tree (see
+`benchmarks.synthetic`) in its own spawned process, and records the median
+wall time of its step plus the process's peak memory. Results are written as
+JSON; `compare` checks a run against a stored baseline and exits non-zero on
+a regression, so it can gate CI.
+
+Usage (from the repo root):
+    python -m benchmarks run --scales 1,10 --output benchmarks/baseline.json
+    python -m benchmarks run --scales 1,10 --output current.json
+    python -m benchmarks compare benchmarks/baseline.json current.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import pickle
+import runpy
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.harness import environment, run_isolated
+from benchmarks.synthetic import write_dataset
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = ".bench_data"
+
+
+# =====================
+# Cases: setup(paths) -> (step, info), run inside the spawned process
+# =====================
+def load_processed(paths):
+    """`load_processed_data`: typed Parquet read of the processed dataset."""
+    from src.data_preprocessing.data_preprocessing import load_processed_data
+
+    return lambda: load_processed_data(paths["processed"]), {"rows": paths["yield_rows"]}
+
+
+def prepare_dashboard_data(paths):
+    """`scripts/prepare_dashboard_data.py`: yield CSV + streamed satellite aggregation + join."""
+    os.chdir(paths["root"])
+    sys.path.insert(0, REPO_ROOT)
+    from scripts import prepare_dashboard_data as prepare
+
+    # Its own output file, so the run leaves the tree's processed dataset to the other cases
+    prepare.output_file = os.path.join(paths["root"], "data", "processed", "prepared_data.csv")
+    return prepare.main, {"rows": paths["yield_rows"], "satellite_rows": paths["satellite_rows"]}
+
+
+def _recommendation_engine_path(paths):
+    """Saved RecommendationEngine of the data tree, fitted once per tree rather than per run."""
+    from src.data_preprocessing.data_preprocessing import load_processed_data
+    from src.model.recommendation_engine import RecommendationEngine
+
+    engine_path = os.path.join(paths["root"], "model", "saved_models", "recommendation_engine.pkl")
+    if not os.path.exists(engine_path):
+        RecommendationEngine.fit(load_processed_data(paths["processed"])).save(engine_path)
+    return engine_path
+
+
+def dashboard_callbacks(paths, n_selections=20):
+    """
+    The work behind one `update_*` callback round per selection, figure cache bypassed.
+
+    Calls the uncached `build_*` functions (`__wrapped__`) for random
+    (country, crop) selections, plus the choropleth of each selected crop.
+    """
+    engine_path = _recommendation_engine_path(paths)
+    os.chdir(paths["root"])
+    os.environ["RECOMMENDATION_ENGINE"] = engine_path
+    os.environ["FORECAST_STORE"] = os.path.join("data", "processed", "forecasts")
+
+    dashboard = runpy.run_path(os.path.join(REPO_ROOT, "dashboard", "dashboard.py"), run_name="benchmark")
+    df, version = dashboard["df"], dashboard["DATA_VERSION"]
+    years = (int(df["Year"].min()), int(df["Year"].max()))
+    pairs = df[["Area", "Crop"]].drop_duplicates().astype(str).to_numpy()
+    rng = np.random.default_rng(0)
+    selections = [tuple(p) for p in pairs[rng.choice(len(pairs), min(n_selections, len(pairs)), replace=False)]]
+    build = {name: dashboard[name].__wrapped__ for name in
+             ("build_kpis", "build_trend", "build_env", "build_choropleth", "build_geo", "build_forecast",
+              "build_recommendation")}
+
+    def step():
+        for country, crop in selections:
+            build["build_kpis"](version, country, crop, years)
+            build["build_trend"](version, country, crop, years)
+            build["build_env"](version, country, crop, years, "NDVI_sat")
+            build["build_geo"](version, country, crop, years)
+            build["build_forecast"](version, country, crop, years)
+            build["build_recommendation"](version, country, crop)
+        for crop in sorted({crop for _, crop in selections}):
+            build["build_choropleth"](version, crop)
+
+    return step, {"rows": len(df), "selections": len(selections)}
+
+
+def scenario_grid(paths, n_scenarios=8):
+    """`ScenarioEngine.run`: cold scoring of a baseline plus climate scenarios over every (Area, Crop)."""
+    import shutil
+    import tempfile
+
+    from src.model.recommendation_engine import RecommendationEngine
+    from src.model.scenario_engine import ScenarioEngine, parse_scenario
+
+    engine = RecommendationEngine.load(_recommendation_engine_path(paths))
+    scenarios = [{}] + [parse_scenario(f"rainfall={r:+d}%,temperature={t:+.1f}")
+                        for r, t in zip(range(-40, 40, 10), np.linspace(-2, 2, n_scenarios - 1))][:n_scenarios - 1]
+    cache_dir = tempfile.mkdtemp(prefix="scenarios_")
+    grid = ScenarioEngine(engine, cache_dir)
+
+    def step():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        ScenarioEngine(engine, cache_dir, workers=grid.workers).run(scenarios)
+
+    return step, {"pairs": len(grid.pairs), "scenarios": len(scenarios)}
+
+
+def prophet_train(paths, n_series=4):
+    """`ProphetModelTrainer.train`: cold fits of a few area series plus one pooled crop series."""
+    from src.data_preprocessing.data_preprocessing import load_processed_data
+    from src.model.prophet_model_trainer import ProphetModelTrainer
+
+    df = load_processed_data(paths["processed"])
+    pairs = df[["Area", "Crop"]].drop_duplicates().astype(str).to_numpy()
+    rng = np.random.default_rng(0)
+    series = [tuple(p) for p in pairs[rng.choice(len(pairs), n_series, replace=False)]]
+    series.append((None, series[0][1]))  # crop-level: every area's history, grows with scale
+
+    def step():
+        trainer = ProphetModelTrainer()  # fresh: no warm starts or cached forecasts
+        for area, crop in series:
+            trainer.train(df, crop, area)
+
+    return step, {"rows": len(df), "series": len(series)}
+
+
+def _serving_model(paths, max_rows=20_000):
+    """Fits a small recommender bundle the API can serve; returns its path."""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    from src.data_preprocessing.data_preprocessing import load_processed_data
+
+    path = os.path.join(paths["root"], "model", "saved_models", "bench_recommender.pkl")
+    if os.path.exists(path):
+        return path
+    df = load_processed_data(paths["processed"]).sample(frac=1.0, random_state=0).head(max_rows)
+    df = df.rename(columns={"NDVI_sat": "NDVI", "Temperature_sat": "Temperature", "Rainfall_sat": "Rainfall"})
+    feature_cols = ["NDVI", "Temperature", "Rainfall"]
+    scaler = StandardScaler()
+    model = RandomForestClassifier(n_estimators=100, max_depth=12, random_state=42)
+    model.fit(scaler.fit_transform(df[feature_cols].to_numpy()), df["Crop"].astype(str))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump({"model": model, "scaler": scaler, "features": feature_cols}, f)
+    return path
+
+
+def _api_client(paths):
+    os.environ["MODEL_PATH"] = _serving_model(paths)
+    os.environ["MODEL_POLL_SECONDS"] = "0"
+    from fastapi.testclient import TestClient
+    from src.api.fastapi_app import app
+
+    return TestClient(app)
+
+
+def recommend_api(paths, n_requests=200):
+    """`POST /recommend`: sequential single-plot requests through the micro-batcher."""
+    client = _api_client(paths)
+    rng = np.random.default_rng(0)
+    params = [{"rainfall": r, "temperature": t, "ndvi": n}
+              for r, t, n in zip(rng.uniform(0, 10, n_requests), rng.normal(24, 6, n_requests),
+                                 rng.beta(5, 3, n_requests))]
+    client.post("/recommend", params=params[0]).raise_for_status()  # loads the model
+
+    def step():
+        for p in params:
+            client.post("/recommend", params=p).raise_for_status()
+
+    return step, {"requests": n_requests}
+
+
+def recommend_batch_api(paths, n_rows=10_000):
+    """`POST /recommend/batch`: one JSON batch of `n_rows` plots."""
+    client = _api_client(paths)
+    rng = np.random.default_rng(0)
+    rows = np.column_stack([rng.uniform(0, 10, n_rows), rng.normal(24, 6, n_rows), rng.beta(5, 3, n_rows)])
+    body = {"rows": rows.round(4).tolist(), "top_k": 3}
+
+    def step():
+        client.post("/recommend/batch", json=body).raise_for_status()
+
+    return step, {"rows": n_rows}
+
+
+# name -> (setup, scales with the data): fixed-size cases run once, at the smallest scale
+CASES = {
+    "load_processed": (load_processed, True),
+    "prepare_dashboard_data": (prepare_dashboard_data, True),
+    "dashboard_callbacks": (dashboard_callbacks, True),
+    "scenario_grid": (scenario_grid, True),
+    "prophet_train": (prophet_train, True),
+    "recommend_api": (recommend_api, False),
+    "recommend_batch_api": (recommend_batch_api, False),
+}
+
+
+# =====================
+# ▶️ run
+# =====================
+def run(args):
+    scales = sorted(int(s) for s in args.scales.split(","))
+    cases = list(CASES) if args.cases == "all" else args.cases.split(",")
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        raise SystemExit(f"❌ Unknown case(s) {unknown}; choose from {list(CASES)}")
+
+    results = []
+    for scale in scales:
+        root = os.path.abspath(os.path.join(args.data_dir, f"scale_{scale}"))
+        start = time.perf_counter()
+        paths = write_dataset(root, scale)
+        print(f"📂 scale {scale}: {paths['yield_rows']:,} yield rows, {paths['satellite_rows']:,} satellite rows "
+              f"({time.perf_counter() - start:.1f}s)")
+
+        for name in cases:
+            setup, scaled = CASES[name]
+            if not scaled and scale != scales[0]:
+                continue
+            result = {"case": name, "scale": scale,
+                      **run_isolated(setup, (paths,), repeats=args.repeats, warmup=args.warmup)}
+            results.append(result)
+            if "error" in result:
+                print(f"   ❌ {name}: failed\n{result['error']}")
+            else:
+                print(f"   ⏱️ {name:<24} {result['median_s'] * 1000:>10.1f} ms  "
+                      f"peak {result['peak_rss_mb']:>7.0f} MB  (setup {result['setup_s']:.1f}s)")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"meta": environment(), "results": results}, f, indent=2)
+    print(f"💾 Results saved to {args.output}")
+    return 1 if any("error" in r for r in results) else 0
+
+
+# =====================
+# 🔍 compare
+# =====================
+def compare_results(baseline, current, threshold=0.15, memory_threshold=0.25):
+    """
+    Pairs results by (case, scale) and flags slowdowns / memory growth beyond the thresholds.
+
+    Returns:
+        list: One dict per case present in both files, with ratios and a `regression` flag.
+    """
+    base = {(r["case"], r["scale"]): r for r in baseline["results"] if "error" not in r}
+    rows = []
+    for r in current["results"]:
+        b = base.get((r["case"], r["scale"]))
+        if b is None or "error" in r:
+            continue
+        time_ratio = r["median_s"] / b["median_s"]
+        memory_ratio = r["peak_rss_mb"] / b["peak_rss_mb"]
+        rows.append({
+            "case": r["case"], "scale": r["scale"],
+            "baseline_ms": b["median_s"] * 1000, "current_ms": r["median_s"] * 1000, "time_ratio": time_ratio,
+            "baseline_mb": b["peak_rss_mb"], "current_mb": r["peak_rss_mb"], "memory_ratio": memory_ratio,
+            "regression": time_ratio > 1 + threshold or memory_ratio > 1 + memory_threshold,
+        })
+    return rows
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    for key in ("cpu_count", "python", "numpy", "pandas"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"⚠️ {key} differs: baseline {baseline['meta'].get(key)}, current {current['meta'].get(key)}")
+
+    rows = compare_results(baseline, current, args.threshold, args.memory_threshold)
+    print(f"{'case':<24} {'scale':>5} {'base ms':>10} {'cur ms':>10} {'time':>7} {'base MB':>8} {'cur MB':>8} {'mem':>7}")
+    for r in rows:
+        print(f"{r['case']:<24} {r['scale']:>5} {r['baseline_ms']:>10.1f} {r['current_ms']:>10.1f} "
+              f"{r['time_ratio']:>6.2f}x {r['baseline_mb']:>8.0f} {r['current_mb']:>8.0f} {r['memory_ratio']:>6.2f}x "
+              f"{'❌' if r['regression'] else '✅'}")
+
+    failed = [r for r in current["results"] if "error" in r]
+    for r in failed:
+        print(f"❌ {r['case']} (scale {r['scale']}) failed in the current run")
+    regressions = [r for r in rows if r["regression"]]
+    if regressions or failed:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%} time / "
+              f"{args.memory_threshold:.0%} memory")
+        return 1
+    print(f"\n✅ No regressions across {len(rows)} case(s)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite and write a JSON result file")
+    run_parser.add_argument("--scales", default="1,10", help="Comma-separated data scales (1 = yield_df.csv size)")
+    run_parser.add_argument("--cases", default="all", help=f"Comma-separated subset of {','.join(CASES)}")
+    run_parser.add_argument("--repeats", type=int, default=3)
+    run_parser.add_argument("--warmup", type=int, default=1)
+    run_parser.add_argument("--data-dir", default=DATA_DIR, help="Where synthetic data trees are generated (reused)")
+    run_parser.add_argument("--output", default="benchmark_results.json")
+
+    compare_parser = commands.add_parser("compare", help="Compare a run against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.15, help="Allowed median-time increase")
+    compare_parser.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed peak-memory increase")
+
+    args = parser.parse_args(argv)
+    return run(args) if args.command == "run" else compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
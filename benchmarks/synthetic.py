@@ -0,0 +1,132 @@
+"""
+Synthetic AgriVision datasets at a chosen scale.
+
+`scale=1` is roughly the size of `yield_df.csv` (~28k rows: 200 areas growing
+4-8 of 10 crops over 1990-2013) plus 100k satellite records; `scale=N`
+multiplies the number of areas (yield) and records (satellite) by N. Data is
+generated from a fixed seed, in chunks of areas, so 1000x stays within
+bounded memory and two runs produce identical files.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+CROPS = ["Cassava", "Maize", "Plantains and others", "Potatoes", "Rice, paddy",
+         "Sorghum", "Soybeans", "Sweet potatoes", "Wheat", "Yams"]
+CROP_BASE_YIELD = np.array([150e3, 35e3, 100e3, 200e3, 40e3, 18e3, 20e3, 120e3, 30e3, 110e3])
+YEARS = np.arange(1990, 2014)
+BASE_AREAS = 200
+BASE_SATELLITE_ROWS = 100_000
+AREAS_PER_CHUNK = 2000
+
+
+def area_names(first, n):
+    return np.array([f"Area {i:06d}" for i in range(first, first + n)])
+
+
+def _yield_chunk(first_area, n_areas, rng):
+    """Yield rows for areas [first_area, first_area + n_areas) in the yield_df.csv layout."""
+    names = area_names(first_area, n_areas)
+    grows = rng.random((n_areas, len(CROPS))) < rng.uniform(0.4, 0.8, (n_areas, 1))
+    area_idx, crop_idx = np.nonzero(grows)
+    n_pairs = len(area_idx)
+    n_years = len(YEARS)
+
+    area_rain = rng.uniform(200, 3000, n_areas)
+    area_temp = rng.uniform(5, 30, n_areas)
+    area_pest = rng.lognormal(6, 2, n_areas)
+    pair_level = rng.lognormal(0, 0.35, n_pairs)
+    trend = 1 + 0.015 * (YEARS - YEARS[0])
+
+    a = np.repeat(area_idx, n_years)
+    c = np.repeat(crop_idx, n_years)
+    year = np.tile(YEARS, n_pairs)
+    t = np.tile(np.arange(n_years), n_pairs)
+    noise = rng.lognormal(0, 0.12, n_pairs * n_years)
+    return pd.DataFrame({
+        "Area": names[a],
+        "Item": np.array(CROPS)[c],
+        "Year": year,
+        "hg/ha_yield": np.round(CROP_BASE_YIELD[c] * np.repeat(pair_level, n_years) * trend[t] * noise),
+        "average_rain_fall_mm_per_year": np.round(area_rain[a]),
+        "pesticides_tonnes": np.round(area_pest[a] * (1 + 0.02 * t), 2),
+        "avg_temp": np.round(area_temp[a] + rng.normal(0, 0.5, len(a)), 2),
+    })
+
+
+def write_yield(path, scale, seed=0):
+    """Writes a yield_df.csv-shaped file with BASE_AREAS * scale areas. Returns the row count."""
+    rng = np.random.default_rng(seed)
+    rows = 0
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        for first in range(0, BASE_AREAS * scale, AREAS_PER_CHUNK):
+            chunk = _yield_chunk(first, min(AREAS_PER_CHUNK, BASE_AREAS * scale - first), rng)
+            chunk.insert(0, "Unnamed: 0", np.arange(rows, rows + len(chunk)))
+            chunk.to_csv(f, index=False, header=rows == 0)
+            rows += len(chunk)
+    return rows
+
+
+def write_satellite(path, scale, seed=1, chunk_rows=1_000_000):
+    """Writes crop_health_env_stress.csv-shaped records (Area, Crop_Type, Date, measurements)."""
+    rng = np.random.default_rng(seed)
+    names = area_names(0, BASE_AREAS * scale)
+    total = BASE_SATELLITE_ROWS * scale
+    start_day = np.datetime64("1990-01-01")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        for offset in range(0, total, chunk_rows):
+            n = min(chunk_rows, total - offset)
+            pd.DataFrame({
+                "Area": names[rng.integers(0, len(names), n)],
+                "Crop_Type": np.array(CROPS)[rng.integers(0, len(CROPS), n)],
+                "Date": (start_day + rng.integers(0, 365 * len(YEARS), n)).astype(str),
+                "NDVI": rng.beta(5, 3, n).round(4),
+                "Temperature": rng.normal(24, 6, n).round(2),
+                "Rainfall": rng.gamma(2, 40, n).round(2),
+                "Humidity": rng.uniform(20, 95, n).round(2),
+                "Soil_Moisture": rng.uniform(5, 45, n).round(2),
+            }).to_csv(f, index=False, header=offset == 0)
+    return total
+
+
+def write_dataset(root, scale, seed=0):
+    """
+    Lays out a repo-shaped data tree under `root` (reused when already built).
+
+    Returns:
+        dict: Paths and row counts.
+    """
+    from src.data_preprocessing.data_preprocessing import save_processed_data
+
+    paths = {
+        "root": root,
+        "yield": os.path.join(root, "data", "processed", "yield_df.csv"),
+        "satellite": os.path.join(root, "data", "satellite_data", "crop_health_env_stress.csv"),
+        "processed": os.path.join(root, "data", "processed", "processed_data.csv"),
+    }
+    marker = os.path.join(root, ".complete")
+    if os.path.exists(marker):
+        with open(marker) as f:
+            return {**paths, **json.load(f)}
+
+    yield_rows = write_yield(paths["yield"], scale, seed)
+    sat_rows = write_satellite(paths["satellite"], scale, seed + 1)
+
+    # Dashboard-ready processed dataset: yields plus per-row satellite-like features
+    df = pd.read_csv(paths["yield"]).rename(columns={"Item": "Crop", "hg/ha_yield": "Yield"})
+    rng = np.random.default_rng(seed + 2)
+    df["NDVI_sat"] = rng.beta(5, 3, len(df))
+    df["Temperature_sat"] = df["avg_temp"] + rng.normal(0, 1, len(df))
+    df["Rainfall_sat"] = df["average_rain_fall_mm_per_year"] / 365 * rng.uniform(0.8, 1.2, len(df))
+    df["Humidity"] = rng.uniform(20, 95, len(df))
+    df["Soil_Moisture"] = rng.uniform(5, 45, len(df))
+    save_processed_data(df, paths["processed"])
+
+    counts = {"yield_rows": yield_rows, "satellite_rows": sat_rows}
+    with open(marker, "w") as f:
+        json.dump(counts, f)
+    return {**paths, **counts}
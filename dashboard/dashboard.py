@@ -1,11 +1,30 @@
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import dash
-from dash import dcc, html, Input, Output, State
+from dash import dcc, html, Input, Output, State, ctx
 import dash_bootstrap_components as dbc
 import joblib
+import json
+import logging
 import os
+import sys
+import time
+from functools import lru_cache
+
+# Repo root on the path so `src.*` modules import when run as `python dashboard/dashboard.py`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_preprocessing.data_preprocessing import load_processed_data
+from src.data_preprocessing.yield_cube import YieldCube
+from src.model.forecast_store import ForecastStore
+from src.model.recommendation_engine import RecommendationEngine
+from src.model.scenario_engine import ScenarioEngine, parse_scenario
+from src.monitoring.instrumentation import instrument_flask, span
+from src.visualization.decimation import POINT_BUDGET, bin_scatter, decimate_line
+
+logger = logging.getLogger(__name__)
 
 # =====================
 # 🎨 Theme
@@ -22,17 +41,46 @@ THEME = {
 # =====================
 # 📂 Load Dataset
 # =====================
-df = pd.read_csv("data/processed/processed_data.csv")
+# Typed Parquet when available (categorical Area/Crop, int16 Year), CSV otherwise
+df = load_processed_data("data/processed/processed_data.csv")
 
 if "Crop" not in df.columns:
     df.rename(columns={"Item": "Crop", "hg/ha_yield": "Yield"}, inplace=True)
 
+# Figure-cache keys include this, so a reloaded dataset never serves stale figures
+DATA_VERSION = int(pd.util.hash_pandas_object(df, index=False).sum())
+FIGURE_CACHE_SIZE = int(os.getenv("FIGURE_CACHE_SIZE", "128"))
+
+# Sorted (Area, Crop, Year) index + precomputed means, so callbacks never scan `df`
+cube = YieldCube(df)
+
+# Precomputed forecasts (built offline by `python -m src.model.forecast_store [--method global]`),
+# each crop's partition read on its first lookup
+forecast_store = ForecastStore(os.getenv("FORECAST_STORE", "data/processed/forecasts"))
+
+# Expected-yield ranking of every crop for every country, ranked once at startup. The engine is
+# trained by the `train_recommendation_engine` pipeline stage; without it the card is disabled
+RECOMMENDATION_ENGINE = os.getenv("RECOMMENDATION_ENGINE", "model/saved_models/recommendation_engine.pkl")
+if os.path.exists(RECOMMENDATION_ENGINE):
+    recommender = RecommendationEngine.load(RECOMMENDATION_ENGINE).precompute()
+else:
+    recommender = None
+    print(f"⚠️ {RECOMMENDATION_ENGINE} not found: run `python -m src.pipeline.runner "
+          f"--stages train_recommendation_engine`; recommendations are disabled")
+
+# What-if climate scenarios over every country and crop, cached on disk per scenario
+scenarios = (ScenarioEngine(recommender, os.getenv("SCENARIO_DIR", "data/processed/scenarios"))
+             if recommender is not None else None)
+
 # =====================
 # ⚡ Dash App
 # =====================
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 server = app.server
 
+# Request-latency histograms + figure-build spans as Prometheus text on /metrics
+instrument_flask(server, "dashboard")
+
 # =====================
 # 📊 Helper Functions
 # =====================
@@ -54,15 +102,36 @@ def kpi_card(title, value, color):
         }
     )
 
-def make_comparison_graph(current_crop, best_crop, data):
-    df_current = data[data["Crop"] == current_crop].groupby("Year")["Yield"].mean().reset_index()
-    df_best = data[data["Crop"] == best_crop].groupby("Year")["Yield"].mean().reset_index()
+def unavailable_card(title, message, color):
+    return dbc.Card(
+        dbc.CardBody([
+            html.H4(title, style={"color": color}),
+            html.H6(message, style={"color": "white"}),
+        ]),
+        style={"backgroundColor": THEME["card_bg"], "boxShadow": f"0 0 15px {color}"}
+    )
+
+def axis_range(relayout, axis):
+    """Visible (min, max) of `axis` from a graph's relayoutData; None when autoranged."""
+    if not relayout or relayout.get(f"{axis}.autorange"):
+        return None
+    if f"{axis}.range[0]" in relayout:
+        return float(relayout[f"{axis}.range[0]"]), float(relayout[f"{axis}.range[1]"])
+    if f"{axis}.range" in relayout:
+        return tuple(float(v) for v in relayout[f"{axis}.range"])
+    return None
+
+def make_comparison_graph(current_crop, best_crop, cube):
+    df_current = cube.crop_trend(current_crop)
+    df_best = cube.crop_trend(best_crop)
+    x_current, y_current = decimate_line(df_current["Year"], df_current["Yield"])
+    x_best, y_best = decimate_line(df_best["Year"], df_best["Yield"])
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df_current["Year"], y=df_current["Yield"],
+    fig.add_trace(go.Scatter(x=x_current, y=y_current,
                              mode="lines+markers", name=current_crop,
                              line=dict(color=THEME["accent_blue"], width=3)))
-    fig.add_trace(go.Scatter(x=df_best["Year"], y=df_best["Yield"],
+    fig.add_trace(go.Scatter(x=x_best, y=y_best,
                              mode="lines+markers", name=best_crop,
                              line=dict(color=THEME["accent_green"], width=3, dash="dot")))
     fig.update_layout(
@@ -74,6 +143,190 @@ def make_comparison_graph(current_crop, best_crop, data):
     )
     return fig
 
+def make_forecast_graph(country, crop, dff):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=dff["Year"], y=dff["Yield"], mode="lines+markers", name="Actual",
+                             line=dict(color=THEME["accent_blue"], width=3)))
+
+    fc = forecast_store.lookup(country, crop)
+    if fc is not None:
+        fig.add_trace(go.Scatter(x=fc["Year"], y=fc["yhat_upper"], mode="lines", line=dict(width=0),
+                                 showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=fc["Year"], y=fc["yhat_lower"], mode="lines", line=dict(width=0),
+                                 fill="tonexty", fillcolor="rgba(203, 166, 247, 0.2)", name="Interval"))
+        fig.add_trace(go.Scatter(x=fc["Year"], y=fc["yhat"], mode="lines", name="Forecast",
+                                 line=dict(color=THEME["accent_purple"], width=3, dash="dot")))
+
+    fig.update_layout(title="AI-based Yield Forecast", paper_bgcolor=THEME["card_bg"],
+                      plot_bgcolor=THEME["card_bg"], font=dict(color="white"))
+    return fig
+
+# =====================
+# 🧱 Figure Builders (memoized)
+# =====================
+# Each builder takes the dataset version plus only the inputs it depends on, so
+# flipping back to an earlier selection is served from the LRU cache; the span
+# under the cache times real builds only.
+def empty_figure():
+    return go.Figure()
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+@span("dashboard.build_kpis")
+def build_kpis(version, country, crop, years):
+    dff = cube.series(country, crop, years[0], years[1])
+    if dff.empty:
+        return [kpi_card("No Data", "—", THEME["accent_blue"])]
+
+    avg_yield = round(dff["Yield"].mean(), 2)
+    max_yield = round(dff["Yield"].max(), 2)
+    growth = round(((dff["Yield"].iloc[-1] - dff["Yield"].iloc[0]) / dff["Yield"].iloc[0]) * 100, 2)
+
+    return [
+        kpi_card("📊 Avg Yield", avg_yield, THEME["accent_blue"]),
+        kpi_card("🏆 Max Yield", max_yield, THEME["accent_green"]),
+        kpi_card("📈 Growth %", f"{growth}%", THEME["accent_purple"])
+    ]
+
+# Trend and scatter figures are reduced server-side to POINT_BUDGET points; a zoom
+# (x_view/y_view) re-reduces just the visible window, restoring full resolution.
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+@span("dashboard.build_trend")
+def build_trend(version, country, crop, years, x_view=None):
+    dff = cube.series(country, crop, years[0], years[1])
+    if dff.empty:
+        return empty_figure()
+    x, y = decimate_line(dff["Year"].to_numpy(), dff["Yield"].to_numpy(), POINT_BUDGET, x_view)
+    trend = px.line(x=x, y=y, labels={"x": "Year", "y": "Yield"}, title="Yield Trend Over Years", markers=True,
+                    color_discrete_sequence=[THEME["accent_blue"]])
+    # uirevision keeps the user's zoom when the re-reduced figure comes back
+    trend.update_layout(plot_bgcolor=THEME["card_bg"], paper_bgcolor=THEME["card_bg"], font=dict(color="white"),
+                        uirevision=f"{country}|{crop}|{years}")
+    return trend
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+@span("dashboard.build_env")
+def build_env(version, country, crop, years, feature, x_view=None, y_view=None):
+    dff = cube.series(country, crop, years[0], years[1])
+    if dff.empty:
+        return empty_figure()
+    x, y, counts = bin_scatter(dff[feature].to_numpy(), dff["Yield"].to_numpy(), POINT_BUDGET, x_view, y_view)
+    binned = bool((counts > 1).any())
+    env = px.scatter(x=x, y=y, size=counts if binned else None, labels={"x": feature, "y": "Yield", "size": "Points"},
+                     title=f"{feature} vs Yield" + (" (binned)" if binned else ""),
+                     color_discrete_sequence=[THEME["accent_green"]])
+    env.update_layout(plot_bgcolor=THEME["card_bg"], paper_bgcolor=THEME["card_bg"], font=dict(color="white"),
+                      uirevision=f"{country}|{crop}|{years}|{feature}")
+    return env
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+@span("dashboard.build_choropleth")
+def build_choropleth(version, crop=None):
+    # One row per (Area, Year) instead of every Area x Crop x Year row
+    start = time.perf_counter()
+    agg = cube.area_year_means(crop)
+    if agg.empty:
+        return empty_figure()
+
+    choropleth = px.choropleth(agg, locations="Area", locationmode="country names", color="Yield",
+                               title=f"Global {crop or 'Crop'} Yield Heatmap", animation_frame="Year",
+                               range_color=(agg["Yield"].min(), agg["Yield"].max()),
+                               color_continuous_scale=px.colors.sequential.Viridis)
+    choropleth.update_layout(paper_bgcolor=THEME["card_bg"], font=dict(color="white"))
+
+    # Serialize once; the cached plain-JSON dict is what every later callback returns
+    payload = pio.to_json(choropleth, validate=False)
+    logger.info("Built choropleth for %s: %d rows, %.1f KB JSON in %.1f ms",
+                crop or "all crops", len(agg), len(payload) / 1024, (time.perf_counter() - start) * 1000)
+    return json.loads(payload)
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+@span("dashboard.build_geo")
+def build_geo(version, country, crop, years):
+    dff = cube.series(country, crop, years[0], years[1])
+    if dff.empty:
+        return empty_figure()
+    geo = px.scatter_geo(dff, locations="Area", locationmode="country names",
+                         size="Yield", color="Yield", projection="natural earth",
+                         title="Geospatial Crop Yield")
+    geo.update_layout(paper_bgcolor=THEME["card_bg"], font=dict(color="white"))
+    return geo
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+@span("dashboard.build_forecast")
+def build_forecast(version, country, crop, years):
+    dff = cube.series(country, crop, years[0], years[1])
+    if dff.empty:
+        return empty_figure()
+    # Precomputed store lookup; actuals only when no forecast exists
+    return make_forecast_graph(country, crop, dff)
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+@span("dashboard.build_recommendation")
+def build_recommendation(version, country, crop):
+    if recommender is None:
+        return unavailable_card("🌱 Recommended Crop", "No recommendation engine: run the "
+                                "train_recommendation_engine pipeline stage", THEME["accent_green"])
+    ranked = recommender.rank(country, top_k=3)
+    best_crop = ranked["Crop"].iloc[0] if not ranked.empty else cube.best_crop
+    ranking = [
+        html.Li(f"{row.Crop}: {row.expected_yield:,.0f} hg/ha ({row.relative_yield:.0%} of its global mean)",
+                style={"color": "white"})
+        for row in ranked.itertuples()
+    ]
+    # Why the top crop scores as it does here: its yield under this country's conditions vs a typical country's
+    try:
+        drivers = recommender.explain(country, best_crop).head(4)
+    except ValueError as e:  # too many conditions for exact Shapley values
+        logger.warning("Skipping recommendation drivers: %s", e)
+        drivers = pd.DataFrame(columns=["feature", "value", "baseline", "contribution", "effect"])
+    drivers = drivers[drivers["contribution"].abs() > 1e-6]
+    why = [
+        html.Li(f"{row.feature}: {row.effect:+.1%} ({row.value:,.4g} vs typical {row.baseline:,.4g})",
+                style={"color": THEME["accent_green"] if row.effect > 0 else THEME["accent_purple"]})
+        for row in drivers.itertuples()
+    ]
+    return dbc.Card(
+        dbc.CardBody([
+            html.H4("🌱 Recommended Crop", style={"color": THEME["accent_green"]}),
+            html.H5(f"{best_crop} (highest expected yield in {country} 🚀)", style={"color": "white"}),
+            html.Ol(ranking),
+            *([html.H6(f"Why {best_crop}?", style={"color": "white"}), html.Ul(why)] if why else []),
+            dcc.Graph(figure=make_comparison_graph(crop, best_crop, cube), config={"displayModeBar": False}, style={"height": "250px"})
+        ]),
+        style={"backgroundColor": THEME["card_bg"], "boxShadow": "0 0 15px #A1E887"}
+    )
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+@span("dashboard.build_scenario")
+def build_scenario(version, country, rainfall_pct, temperature_shift):
+    if scenarios is None:
+        return unavailable_card("🌦 Climate Scenario", "Scenarios need the recommendation engine: run the "
+                                "train_recommendation_engine pipeline stage", THEME["accent_blue"])
+    scenario = parse_scenario(f"rainfall={rainfall_pct}%,temperature={temperature_shift}")
+    pairs, areas = scenarios.compare(scenario)
+    local = pairs[pairs["Area"] == country].sort_values("expected_yield", ascending=False)
+    top = areas[areas["Area"] == country]
+
+    lines = [html.Li(f"{row.Crop}: {row.expected_yield:,.0f} hg/ha ({row.change:+.1%})",
+                     style={"color": THEME["accent_green"] if row.change >= 0 else THEME["accent_purple"]})
+             for row in local.head(5).itertuples()]
+    if top.empty:
+        headline = f"No scenario results for {country}"
+    elif top["changed"].iloc[0]:
+        headline = f"Recommendation shifts: {top['baseline_crop'].iloc[0]} → {top['scenario_crop'].iloc[0]}"
+    else:
+        headline = f"Recommendation holds: {top['baseline_crop'].iloc[0]}"
+    return dbc.Card(
+        dbc.CardBody([
+            html.H4("🌦 Climate Scenario", style={"color": THEME["accent_blue"]}),
+            html.H5(headline, style={"color": "white"}),
+            html.Ul(lines),
+            html.P(f"Worldwide: top crop changes in {int(areas['changed'].sum())} of {len(areas)} countries; "
+                   f"median yield change {pairs['change'].median():+.1%}", style={"color": "white"}),
+        ]),
+        style={"backgroundColor": THEME["card_bg"], "boxShadow": "0 0 15px #7EC8E3"}
+    )
+
 # =====================
 # 🎨 Layout
 # =====================
@@ -137,90 +390,67 @@ app.layout = dbc.Container([
     dbc.Row([
         dbc.Col(dcc.Graph(id="yield-forecast"), md=6),
         dbc.Col(id="crop-recommendation", md=6),
+    ], className="mb-4"),
+
+    dbc.Row([
+        dbc.Col([
+            html.Label("🌧 Rainfall change (%)", style={"color": "white"}),
+            dcc.Slider(id="scenario-rainfall", min=-50, max=50, step=5, value=-20,
+                       marks={v: f"{v:+d}%" for v in range(-50, 51, 25)}),
+            html.Label("🌡 Temperature change (°C)", style={"color": "white"}),
+            dcc.Slider(id="scenario-temperature", min=-3, max=3, step=0.5, value=1.5,
+                       marks={v: f"{v:+d}°C" for v in range(-3, 4)}),
+        ], md=6),
+        dbc.Col(id="scenario-impact", md=6),
     ], className="mb-4")
 ], fluid=True, style={"backgroundColor": THEME["background"]})
 
 # =====================
 # 🔄 Callbacks
 # =====================
-@app.callback(
-    [Output("kpi-row", "children"),
-     Output("yield-trend", "figure"),
-     Output("env-vs-yield", "figure"),
-     Output("choropleth", "figure"),
-     Output("geo-map", "figure"),
-     Output("yield-forecast", "figure"),
-     Output("crop-recommendation", "children")],
-    [Input("country", "value"),
-     Input("crop", "value"),
-     Input("year-range", "value"),
-     Input("feature", "value")]
-)
-def update_dashboard(country, crop, year_range, feature):
-    dff = df[(df["Area"] == country) & (df["Crop"] == crop) &
-             (df["Year"].between(year_range[0], year_range[1]))]
+# One callback per output: each figure only re-renders when its own inputs change.
+SELECTION = [Input("country", "value"), Input("crop", "value"), Input("year-range", "value")]
 
-    if dff.empty:
-        return [
-            [kpi_card("No Data", "—", THEME["accent_blue"])],
-            go.Figure(), go.Figure(), go.Figure(), go.Figure(), go.Figure(),
-            dbc.Card(dbc.CardBody([html.H5("🌱 No recommendation available (empty dataset)", style={"color": "white"})]))
-        ]
-
-    # KPIs
-    avg_yield = round(dff["Yield"].mean(), 2)
-    max_yield = round(dff["Yield"].max(), 2)
-    growth = round(((dff["Yield"].iloc[-1] - dff["Yield"].iloc[0]) / dff["Yield"].iloc[0]) * 100, 2)
-
-    kpis = [
-        kpi_card("📊 Avg Yield", avg_yield, THEME["accent_blue"]),
-        kpi_card("🏆 Max Yield", max_yield, THEME["accent_green"]),
-        kpi_card("📈 Growth %", f"{growth}%", THEME["accent_purple"])
-    ]
-
-    # Yield trend
-    trend = px.line(dff, x="Year", y="Yield", title="Yield Trend Over Years", markers=True,
-                    color_discrete_sequence=[THEME["accent_blue"]])
-    trend.update_layout(plot_bgcolor=THEME["card_bg"], paper_bgcolor=THEME["card_bg"], font=dict(color="white"))
+@app.callback(Output("kpi-row", "children"), SELECTION)
+def update_kpis(country, crop, year_range):
+    return build_kpis(DATA_VERSION, country, crop, tuple(year_range))
 
-    # Env vs Yield
-    env = px.scatter(dff, x=feature, y="Yield", title=f"{feature} vs Yield",
-                     color_discrete_sequence=[THEME["accent_green"]])
-    env.update_layout(plot_bgcolor=THEME["card_bg"], paper_bgcolor=THEME["card_bg"], font=dict(color="white"))
+@app.callback(Output("yield-trend", "figure"), SELECTION + [Input("yield-trend", "relayoutData")])
+def update_trend(country, crop, year_range, relayout):
+    # Only a zoom on this graph narrows the view; a new selection starts fully zoomed out
+    x_view = axis_range(relayout, "xaxis") if ctx.triggered_id == "yield-trend" else None
+    return build_trend(DATA_VERSION, country, crop, tuple(year_range), x_view)
 
-    # Choropleth
-    choropleth = px.choropleth(df, locations="Area", locationmode="country names", color="Yield",
-                               title="Global Yield Heatmap", animation_frame="Year",
-                               color_continuous_scale=px.colors.sequential.Viridis)
-    choropleth.update_layout(paper_bgcolor=THEME["card_bg"], font=dict(color="white"))
+@app.callback(Output("env-vs-yield", "figure"),
+              SELECTION + [Input("feature", "value"), Input("env-vs-yield", "relayoutData")])
+def update_env(country, crop, year_range, feature, relayout):
+    zoomed = ctx.triggered_id == "env-vs-yield"
+    x_view = axis_range(relayout, "xaxis") if zoomed else None
+    y_view = axis_range(relayout, "yaxis") if zoomed else None
+    return build_env(DATA_VERSION, country, crop, tuple(year_range), feature, x_view, y_view)
 
-    # Static geo map
-    geo = px.scatter_geo(dff, locations="Area", locationmode="country names",
-                         size="Yield", color="Yield", projection="natural earth",
-                         title="Geospatial Crop Yield")
-    geo.update_layout(paper_bgcolor=THEME["card_bg"], font=dict(color="white"))
+@app.callback(Output("choropleth", "figure"), Input("crop", "value"))
+def update_choropleth(crop):
+    return build_choropleth(DATA_VERSION, crop)
 
-    # Forecast (placeholder: line continuation)
-    forecast = go.Figure()
-    forecast.add_trace(go.Scatter(x=dff["Year"], y=dff["Yield"], mode="lines+markers", name="Actual",
-                                  line=dict(color=THEME["accent_blue"], width=3)))
-    forecast.update_layout(title="AI-based Yield Forecast", paper_bgcolor=THEME["card_bg"],
-                           plot_bgcolor=THEME["card_bg"], font=dict(color="white"))
+@app.callback(Output("geo-map", "figure"), SELECTION)
+def update_geo(country, crop, year_range):
+    return build_geo(DATA_VERSION, country, crop, tuple(year_range))
 
-    # Recommendation
-    crop_means = df.groupby("Crop")["Yield"].mean()
-    best_crop = crop_means.idxmax()
+@app.callback(Output("yield-forecast", "figure"), SELECTION)
+def update_forecast(country, crop, year_range):
+    return build_forecast(DATA_VERSION, country, crop, tuple(year_range))
 
-    recommendation = dbc.Card(
-        dbc.CardBody([
-            html.H4("🌱 Recommended Crop", style={"color": THEME["accent_green"]}),
-            html.H5(f"{best_crop} (based on yield trends 🚀)", style={"color": "white"}),
-            dcc.Graph(figure=make_comparison_graph(crop, best_crop, df), config={"displayModeBar": False}, style={"height": "250px"})
-        ]),
-        style={"backgroundColor": THEME["card_bg"], "boxShadow": "0 0 15px #A1E887"}
-    )
+@app.callback(Output("crop-recommendation", "children"), SELECTION)
+def update_recommendation(country, crop, year_range):
+    if cube.series(country, crop, year_range[0], year_range[1]).empty:
+        return dbc.Card(dbc.CardBody([html.H5("🌱 No recommendation available (empty dataset)", style={"color": "white"})]))
+    return build_recommendation(DATA_VERSION, country, crop)
 
-    return kpis, trend, env, choropleth, geo, forecast, recommendation
+@app.callback(Output("scenario-impact", "children"),
+              [Input("country", "value"), Input("scenario-rainfall", "value"), Input("scenario-temperature", "value")])
+def update_scenario(country, rainfall_pct, temperature_shift):
+    return build_scenario(DATA_VERSION, country, rainfall_pct, temperature_shift)
 
 # =====================
 # ▶️ Run
@@ -1,85 +1,96 @@
 import pandas as pd
 import os
+import sys
 
-# =============================
-# File paths
-# =============================
-yield_file = "data/yield_df.csv"
-sat_folder = "data/satellite_data"
-output_file = "data/processed_data.csv"
-
-print("📂 Loading datasets...")
-
-# =============================
-# Load Yield Data
-# =============================
-yield_df = pd.read_csv(yield_file)
-print(f"✅ Yield columns: {list(yield_df.columns)}")
-
-# Normalize columns
-yield_df.rename(columns={
-    "Item": "Crop",
-    "hg/ha_yield": "Yield"
-}, inplace=True)
-
-# =============================
-# Load Satellite Data
-# =============================
-sat_dfs = []
-for file in os.listdir(sat_folder):
-    if file.endswith(".csv"):
-        path = os.path.join(sat_folder, file)
-        df = pd.read_csv(path)
-        print(f"✅ Loaded {path}, columns: {list(df.columns)}")
-        sat_dfs.append(df)
-
-if not sat_dfs:
-    raise FileNotFoundError("⚠️ No satellite CSV files found inside data/satellite_data")
-
-# Combine all satellite data
-sat_df = pd.concat(sat_dfs, axis=0, ignore_index=True)
-
-# Normalize crop column
-if "Crop_Type" in sat_df.columns:
-    sat_df.rename(columns={"Crop_Type": "Crop"}, inplace=True)
-
-# Rename important features
-sat_df.rename(columns={
-    "NDVI": "NDVI_sat",
-    "Temperature": "Temperature_sat",
-    "Rainfall": "Rainfall_sat"
-}, inplace=True)
-
-# Remove duplicate columns
-sat_df = sat_df.loc[:, ~sat_df.columns.duplicated()]
+# Repo root on the path so `src.*` modules import when run as `python scripts/prepare_dashboard_data.py`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# =============================
-# Aggregate satellite data per crop
-# =============================
-numeric_cols = sat_df.select_dtypes(include="number").columns
-sat_summary = sat_df.groupby("Crop")[numeric_cols].mean().reset_index()
-
-print(f"✅ Satellite summary shape: {sat_summary.shape}")
-
-# =============================
-# Merge Yield + Aggregated Satellite
-# =============================
-print("\n🔄 Merging datasets...")
-df_merged = pd.merge(yield_df, sat_summary, on="Crop", how="left")
-
-print(f"✅ Merged dataset shape: {df_merged.shape}")
-
-# =============================
-# Save Processed Data
-# =============================
-df_merged.to_csv(output_file, index=False)
-print(f"💾 Processed dataset saved to {output_file}")
+from src.data_preprocessing.data_preprocessing import save_processed_data
+from src.data_preprocessing.spatiotemporal_join import aggregate_satellite, spatiotemporal_join
 
 # =============================
-# Dataset Summary
+# File paths
 # =============================
-print("\n📊 Dataset Summary:")
-print(f"   Crops: {df_merged['Crop'].nunique()} → {df_merged['Crop'].unique()[:10]}")
-print(f"   Areas: {df_merged['Area'].nunique()} → {df_merged['Area'].unique()[:10]}")
-print(f"   Years: {df_merged['Year'].nunique()} → {df_merged['Year'].min()} - {df_merged['Year'].max()}")
-print("   Columns:", list(df_merged.columns))
+yield_file = "data/processed/yield_df.csv"
+sat_folder = "data/satellite_data"
+output_file = "data/processed/processed_data.csv"
+# Written by `python -m src.data_preprocessing.raster_ndvi <manifest>`; joined when present
+raster_file = "data/satellite_data/raster/ndvi_features.csv"
+
+
+def main():
+    print("📂 Loading datasets...")
+
+    # =============================
+    # Load Yield Data
+    # =============================
+    yield_df = pd.read_csv(yield_file)
+    print(f"✅ Yield columns: {list(yield_df.columns)}")
+
+    # Normalize columns
+    yield_df.rename(columns={
+        "Item": "Crop",
+        "hg/ha_yield": "Yield"
+    }, inplace=True)
+
+    # =============================
+    # Load + Aggregate Satellite Data (streamed)
+    # =============================
+    # Files are read in chunks and folded into running per-(Area, Crop, Year) totals,
+    # one file per worker process, so memory stays bounded however large the exports are.
+    sat_files = [os.path.join(sat_folder, f) for f in sorted(os.listdir(sat_folder)) if f.endswith(".csv")]
+    for path in sat_files:
+        print(f"✅ Found {path}, columns: {list(pd.read_csv(path, nrows=0).columns)}")
+
+    if not sat_files:
+        raise FileNotFoundError("⚠️ No satellite CSV files found inside data/satellite_data")
+
+    # Normalize crop column + rename important features
+    sat_rename = {
+        "Crop_Type": "Crop",
+        "NDVI": "NDVI_sat",
+        "Temperature": "Temperature_sat",
+        "Rainfall": "Rainfall_sat"
+    }
+
+    sat_summary = aggregate_satellite(sat_files, rename=sat_rename)
+
+    print(f"✅ Satellite summary shape: {sat_summary.mean().shape}")
+
+    # =============================
+    # Merge Yield + Aggregated Satellite
+    # =============================
+    print("\n🔄 Merging datasets...")
+    # Nearest-year match per (Area, Crop), falling back to area and crop means
+    df_merged = spatiotemporal_join(yield_df, sat_summary)
+
+    # =============================
+    # Raster NDVI (optional)
+    # =============================
+    # Pixel-level NDVI per (Area[, Crop], Year) from band rasters, kept beside the
+    # CSV-derived NDVI_sat and matched the same way (nearest year, then area means)
+    if os.path.exists(raster_file):
+        raster = pd.read_csv(raster_file).rename(columns={"NDVI": "NDVI_raster", "NDVI_std": "NDVI_raster_std"})
+        print(f"✅ Found {raster_file} ({len(raster)} rows)")
+        df_merged = spatiotemporal_join(df_merged, raster.drop(columns=["Pixels"], errors="ignore"))
+
+    print(f"✅ Merged dataset shape: {df_merged.shape}")
+
+    # =============================
+    # Save Processed Data
+    # =============================
+    parquet_file = save_processed_data(df_merged, output_file)
+    print(f"💾 Processed dataset saved to {output_file} (+ typed Parquet at {parquet_file})")
+
+    # =============================
+    # Dataset Summary
+    # =============================
+    print("\n📊 Dataset Summary:")
+    print(f"   Crops: {df_merged['Crop'].nunique()} → {df_merged['Crop'].unique()[:10]}")
+    print(f"   Areas: {df_merged['Area'].nunique()} → {df_merged['Area'].unique()[:10]}")
+    print(f"   Years: {df_merged['Year'].nunique()} → {df_merged['Year'].min()} - {df_merged['Year'].max()}")
+    print("   Columns:", list(df_merged.columns))
+
+
+if __name__ == "__main__":
+    main()
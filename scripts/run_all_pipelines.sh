@@ -0,0 +1,6 @@
+#!/usr/bin/env bash
+# Runs every out-of-date pipeline stage from config.yaml (extra args go to the runner,
+# e.g. --force, --dry-run, --stages train_recommender).
+set -euo pipefail
+cd "$(dirname "$0")/.."
+exec python -m src.pipeline.runner "$@"
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one vectorized call.
+
+    Requests are queued for at most `max_wait_ms` (or until `max_batch_size`
+    rows are waiting), scored together on a worker thread so the event loop
+    is never blocked, and each caller gets back its own row's result.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5.0, executor=None):
+        """
+        Args:
+            predict_fn (callable): Takes a 2D array of rows, returns one result per row.
+            max_batch_size (int): Maximum rows scored in a single call.
+            max_wait_ms (float): Maximum time the first queued row waits for company.
+            executor (Executor, optional): Pool that runs `predict_fn`.
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="microbatch")
+
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+        self._batches = 0
+        self._rows = 0
+        self._max_batch_seen = 0
+        self._max_queue_depth = 0
+        self._predict_seconds = 0.0
+        self._size_histogram = Counter()
+
+    def _ensure_started(self):
+        """Start the worker on the running loop (restarting if the loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._loop is not loop or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, row):
+        """Queue one feature row and wait for its prediction."""
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((row, future))
+        self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _collect(self):
+        """Wait for one row, then keep collecting until the batch is full or max_wait elapses."""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Callers that gave up (e.g. client disconnect) don't need scoring
+            batch = [(row, fut) for row, fut in batch if not fut.cancelled()]
+            if not batch:
+                continue
+
+            X = np.asarray([row for row, _ in batch], dtype=float)
+            start = time.perf_counter()
+            try:
+                results = await self._loop.run_in_executor(self.executor, self.predict_fn, X)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            self._record(len(batch), time.perf_counter() - start)
+
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+
+    def _record(self, size, seconds):
+        self._batches += 1
+        self._rows += size
+        self._predict_seconds += seconds
+        self._max_batch_seen = max(self._max_batch_seen, size)
+        bucket = next((b for b in BATCH_SIZE_BUCKETS if size <= b), "+Inf")
+        self._size_histogram[bucket] += 1
+
+    def metrics(self):
+        """Queue depth and batch-size statistics for tuning max_wait/max_batch."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self._max_queue_depth,
+            "batches": self._batches,
+            "rows": self._rows,
+            "mean_batch_size": round(self._rows / self._batches, 3) if self._batches else 0.0,
+            "max_batch_size_seen": self._max_batch_seen,
+            "mean_predict_ms": round(1000 * self._predict_seconds / self._batches, 3) if self._batches else 0.0,
+            "batch_size_histogram": {str(b): self._size_histogram[b]
+                                     for b in (*BATCH_SIZE_BUCKETS, "+Inf") if self._size_histogram[b]},
+            "config": {"max_batch_size": self.max_batch_size, "max_wait_ms": self.max_wait * 1000},
+        }
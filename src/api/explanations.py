@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.model.forest_engine import ForestEngine
+from src.monitoring.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+
+class ExplanationService:
+    """
+    Per-feature TreeSHAP attributions for the recommender, cached.
+
+    One `shap.TreeExplainer` (and its expected values) is built per model
+    version and reused until the registry swaps in another. Rows are snapped
+    to a grid of `quantum` in the model's (standardized) feature space and
+    attributions are cached per grid point, so nearby requests share an
+    entry. A batch is deduplicated, its cache misses go through TreeSHAP in
+    one call, and every class is computed at once so any target crop hits.
+    Probabilities are the row's own; attributions are those of its grid point.
+    """
+
+    def __init__(self, registry, quantum=0.01, cache_size=10_000, approximate=False):
+        """
+        Args:
+            registry (ModelRegistry): Source of the active recommender version.
+            quantum (float): Grid step for cache keys (standard deviations when the model scales inputs).
+            cache_size (int): Grid points whose attributions are kept.
+            approximate (bool): Saabas-style path attributions instead of exact TreeSHAP (much faster).
+        """
+        self.registry = registry
+        self.quantum = quantum
+        self.cache_size = cache_size
+        self.approximate = approximate
+        self._version = None   # ModelVersion the explainer below belongs to
+        self._explainer = None
+        self._expected = None  # expected model output per class
+        self._cache = OrderedDict()  # grid point bytes -> [n_features, n_classes] attributions
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "explainer_builds": 0, "rows": 0}
+
+    # =====================
+    # Per-version state
+    # =====================
+    @staticmethod
+    def _tree_model(version):
+        if isinstance(version.estimator, ForestEngine):
+            return version.estimator.to_shap_trees()
+        return version.estimator
+
+    def _explainer_for(self, version):
+        """The explainer of `version`, building it (and dropping stale attributions) on a version change."""
+        with self._lock:
+            if self._version is version:
+                return self._explainer, self._expected
+
+        import shap
+
+        start = time.perf_counter()
+        model = self._tree_model(version)
+        try:
+            with span("explain.build_explainer"):
+                explainer = shap.TreeExplainer(model)
+        except Exception as e:  # shap raises assorted types for models it cannot walk
+            raise ValueError(f"TreeSHAP cannot explain {type(model).__name__}: {e}") from e
+        expected = np.atleast_1d(np.asarray(explainer.expected_value, dtype=np.float64))
+        if len(expected) == 1 and len(version.classes_) == 2:
+            expected = np.array([-expected[0], expected[0]])
+        logger.info("Built TreeSHAP explainer for %s in %.3fs", version.path, time.perf_counter() - start)
+
+        with self._lock:
+            if self._version is not version:
+                self._version, self._explainer, self._expected = version, explainer, expected
+                self._cache.clear()
+                self.stats["explainer_builds"] += 1
+            return self._explainer, self._expected
+
+    def _model_space(self, version, X):
+        """API rows -> the float32 inputs the trees compare against."""
+        Z = version.to_model_matrix(X)
+        if isinstance(version.estimator, ForestEngine):
+            Z = version.estimator.transform(Z)
+        return np.asarray(Z, dtype=np.float32)
+
+    # =====================
+    # Attributions
+    # =====================
+    def _attributions(self, explainer, grid, n_classes):
+        """[n, n_features, n_classes] attributions for grid points (all cache misses)."""
+        points = (grid * self.quantum).astype(np.float32).astype(np.float64)
+        try:
+            with span("explain.treeshap"):
+                values = np.asarray(explainer.shap_values(points, check_additivity=False,
+                                                          approximate=self.approximate))
+        except Exception as e:
+            raise ValueError(f"TreeSHAP failed on the active model: {e}") from e
+        if values.ndim == 2:  # single-output model (binary log-odds): class 1 gets +v, class 0 gets -v
+            values = np.stack([-values, values], axis=2) if n_classes == 2 else values[..., None]
+        return values
+
+    def explain(self, X, crop=None, top_features=None):
+        """
+        Why the recommender scores each row as it does.
+
+        Args:
+            X (np.ndarray): API-ordered feature rows.
+            crop (str, optional): Crop to explain for every row; each row's top crop by default.
+            top_features (int, optional): Keep only the largest contributions per row.
+
+        Returns:
+            list: Per row: crop, probability, output, base_value and contributions [{feature, value}],
+            largest magnitude first. `output` names the units of base_value and contributions
+            ("probability" for forests, "log_odds" for boosted models); they add up to the
+            crop's score at the row's grid point, not exactly at the row.
+
+        Raises:
+            KeyError: `crop` is not one of the model's classes.
+            ValueError: TreeSHAP cannot explain the active model.
+        """
+        version = self.registry.get()
+        explainer, expected = self._explainer_for(version)
+        classes = np.asarray(version.classes_).astype(str)
+        if crop is not None and crop not in classes:
+            raise KeyError(crop)
+
+        proba = version.predict_proba(X)
+        targets = (np.full(len(X), int(np.flatnonzero(classes == crop)[0])) if crop is not None
+                   else np.argmax(proba, axis=1))
+
+        grid = np.round(self._model_space(version, X) / self.quantum).astype(np.int64)
+        unique, inverse = np.unique(grid, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        keys = [row.tobytes() for row in unique]
+
+        values = [None] * len(unique)
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    values[i] = cached
+        missing = [i for i, v in enumerate(values) if v is None]
+        if missing:
+            computed = self._attributions(explainer, unique[missing], len(classes))
+            with self._lock:
+                for i, v in zip(missing, computed):
+                    values[i] = v
+                    self._cache[keys[i]] = v
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        with self._lock:
+            self.stats["rows"] += len(X)
+            self.stats["hits"] += len(unique) - len(missing)
+            self.stats["misses"] += len(missing)
+
+        features = version.features
+        output = getattr(explainer.model, "tree_output", None)
+        results = []
+        for row, target in enumerate(targets):
+            contributions = values[inverse[row]][:, target]
+            order = np.argsort(-np.abs(contributions))[:top_features]
+            results.append({
+                "crop": classes[target],
+                "probability": float(proba[row, target]),
+                "output": output,
+                "base_value": float(expected[min(target, len(expected) - 1)]),
+                "contributions": [{"feature": features[j], "value": float(contributions[j])} for j in order],
+            })
+        return results
+
+    def info(self):
+        with self._lock:
+            return {**self.stats, "cached_points": len(self._cache), "cache_size": self.cache_size,
+                    "quantum": self.quantum, "approximate": self.approximate,
+                    "model": getattr(self._version, "path", None)}
@@ -1,24 +1,266 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
 import pandas as pd
-import joblib
+import numpy as np
+import io
 import os
 
-app = FastAPI(title="Crop Recommendation API")
+from src.api.batching import MicroBatcher
+from src.api.explanations import ExplanationService
+from src.api.forecast_service import ForecastService
+from src.api.model_registry import ModelRegistry
+from src.monitoring.instrumentation import instrument_fastapi
 
 MODEL_PATH = os.getenv("MODEL_PATH", "saved_models/crop_recommender.pkl")
-DATA_PATH = os.getenv("DATA_PATH", "data/processed/processed_data.csv")
-
-model = joblib.load(MODEL_PATH)
-data = pd.read_csv(DATA_PATH)
+MODEL_POLL_SECONDS = float(os.getenv("MODEL_POLL_SECONDS", "5"))
+PROPHET_MODEL_DIR = os.getenv("PROPHET_MODEL_DIR", "model/saved_models/prophet_models")
+FORECAST_MODEL_CACHE = int(os.getenv("FORECAST_MODEL_CACHE", "32"))
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "512"))
+FORECAST_CACHE_TTL = float(os.getenv("FORECAST_CACHE_TTL", "3600"))
+EXPLAIN_QUANTUM = float(os.getenv("EXPLAIN_QUANTUM", "0.01"))
+EXPLAIN_CACHE_SIZE = int(os.getenv("EXPLAIN_CACHE_SIZE", "10000"))
+EXPLAIN_APPROXIMATE = os.getenv("EXPLAIN_APPROXIMATE", "0") == "1"
+MAX_EXPLAIN_ROWS = int(os.getenv("MAX_EXPLAIN_ROWS", "5000"))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "50000"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(64 * 1024 * 1024)))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
 
+# API input columns; the registry maps them onto whatever features the model was trained on
 features = ["Rainfall_sat", "Temperature_sat", "NDVI_sat"]
 
+# Loaded on first request (a `.npz` path is the array-backed ForestEngine, a directory
+# serves its newest artifact) and hot-swapped when the file changes
+registry = ModelRegistry(MODEL_PATH, features, poll_seconds=MODEL_POLL_SECONDS)
+
+# Prophet models are unpickled on demand; forecasts are cached per model version
+forecasts = ForecastService(PROPHET_MODEL_DIR, max_models=FORECAST_MODEL_CACHE,
+                            cache_size=FORECAST_CACHE_SIZE, ttl_seconds=FORECAST_CACHE_TTL)
+
+# TreeSHAP explainer built once per model version; attributions cached per quantized input
+explanations = ExplanationService(registry, quantum=EXPLAIN_QUANTUM, cache_size=EXPLAIN_CACHE_SIZE,
+                                  approximate=EXPLAIN_APPROXIMATE)
+
+# Concurrent /recommend calls are coalesced into one predict on a worker thread;
+# each batch scores against the version active when it runs
+batcher = MicroBatcher(lambda X: registry.get().predict(X),
+                       max_batch_size=MICROBATCH_MAX_SIZE,
+                       max_wait_ms=MICROBATCH_MAX_WAIT_MS)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    registry.start_watcher()
+    yield
+    registry.stop_watcher()
+
+
+app = FastAPI(title="Crop Recommendation API", lifespan=lifespan)
+
+# Request-latency histograms + spans as Prometheus text on /metrics
+# (PROFILE_THRESHOLD_MS=<ms> also dumps a sampled profile of every slower request)
+instrument_fastapi(app, "api")
+
+
+class BatchRequest(BaseModel):
+    """JSON body for /recommend/batch: rows as lists (in `features` order) or dicts."""
+    rows: list[list[float] | dict[str, float]]
+    top_k: int = 3
+
+
+class ExplainRequest(BaseModel):
+    """JSON body for /explain: rows as in /recommend/batch, optionally one crop to explain for all."""
+    rows: list[list[float] | dict[str, float]]
+    crop: str | None = None
+    top_features: int | None = None
+
+
+def rows_to_matrix(rows):
+    """Convert JSON rows (lists or feature-keyed dicts, mixed freely) into one float matrix."""
+    if not rows:
+        return np.empty((0, len(features)))
+    try:
+        # Each row on its own: a batch may mix list rows and dict rows
+        X = np.asarray([[row[f] for f in features] if isinstance(row, dict) else row for row in rows],
+                       dtype=float)
+    except (KeyError, ValueError, TypeError):
+        X = None
+
+    if X is None or X.ndim != 2 or X.shape[1] != len(features) or not np.isfinite(X).all():
+        raise HTTPException(status_code=422,
+                            detail=f"Each row must have {len(features)} values: {features}")
+    return X
+
+
+def frame_to_matrix(frame):
+    """Select the model features from an uploaded CSV/Arrow table."""
+    missing = [f for f in features if f not in frame.columns]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Missing columns: {missing}")
+    try:
+        X = frame[features].to_numpy(dtype=float)
+    except (ValueError, TypeError):
+        X = None
+
+    if X is None or not np.isfinite(X).all():
+        raise HTTPException(status_code=422, detail=f"Columns {features} must be numeric with no empty cells")
+    return X
+
+
+async def read_body(request):
+    """Read the request body, refusing it once it grows past MAX_UPLOAD_BYTES."""
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds MAX_UPLOAD_BYTES={MAX_UPLOAD_BYTES}")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds MAX_UPLOAD_BYTES={MAX_UPLOAD_BYTES}")
+    return bytes(body)
+
+
+def read_arrow(body, content_type):
+    """Read an Arrow IPC upload batch by batch, stopping one row past MAX_BATCH_SIZE."""
+    import pyarrow as pa
+    reader = pa.ipc.open_stream(body) if content_type.endswith("stream") else pa.ipc.open_file(body)
+    if isinstance(reader, pa.ipc.RecordBatchFileReader):
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        batches = iter(reader)
+
+    kept, rows = [], 0
+    for batch in batches:
+        kept.append(batch)
+        rows += batch.num_rows
+        if rows > MAX_BATCH_SIZE:
+            break
+    return pa.Table.from_batches(kept, schema=reader.schema).to_pandas()
+
+
+def top_k_predictions(X, k):
+    """Score the whole block with one predict_proba call and keep the k best crops per row."""
+    model = registry.get()
+    proba = model.predict_proba(X)
+    classes = np.asarray(model.classes_)
+    k = max(1, min(k, len(classes)))
+
+    # argpartition keeps this O(n_classes) per row, then sort only the k survivors
+    top = np.argpartition(-proba, k - 1, axis=1)[:, :k]
+    top_proba = np.take_along_axis(proba, top, axis=1)
+    order = np.argsort(-top_proba, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    top_proba = np.take_along_axis(top_proba, order, axis=1)
+
+    return [
+        [{"crop": str(c), "probability": float(p)} for c, p in zip(classes[idx], probs)]
+        for idx, probs in zip(top, top_proba)
+    ]
+
+
 @app.get("/")
 def home():
     return {"message": "🌱 Crop Recommendation API is running!"}
 
 @app.post("/recommend")
-def recommend(rainfall: float, temperature: float, ndvi: float):
-    X = [[rainfall, temperature, ndvi]]
-    prediction = model.predict(X)[0]
-    return {"recommended_crop": prediction}
+async def recommend(rainfall: float, temperature: float, ndvi: float):
+    prediction = await batcher.submit([rainfall, temperature, ndvi])
+    return {"recommended_crop": str(prediction)}
+
+@app.get("/metrics/batching")
+def batching_metrics():
+    return batcher.metrics()
+
+@app.get("/model")
+def model_info():
+    """Active model version, its load time and the hot-reload watcher state."""
+    return registry.info()
+
+@app.post("/model/reload")
+async def model_reload():
+    """Loads the artifact now instead of waiting for the next watcher poll."""
+    swapped = await run_in_threadpool(registry.refresh, True)
+    return {"swapped": swapped, **registry.info()}
+
+@app.get("/forecast")
+def forecast(crop: str, area: str | None = None, horizon: int = Query(5, ge=1, le=50), intervals: bool = True):
+    """
+    Yield forecast for the next `horizon` years from the trained Prophet model.
+
+    Uses the (area, crop) model when one was trained, else the crop-level one.
+    `intervals=false` skips uncertainty sampling for low-latency callers.
+    """
+    result = forecasts.forecast(crop, area, periods=horizon, intervals=intervals)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No Prophet model for crop={crop!r} area={area!r}")
+    return result
+
+@app.post("/explain")
+async def explain(payload: ExplainRequest):
+    """
+    Per-feature contributions (TreeSHAP) behind the recommendation for each row.
+
+    Explains each row's top crop, or `crop` when given. Contributions plus
+    `base_value` give the crop's score in `output` units (probability for
+    forests, log-odds for boosted models) at the row's quantized grid point
+    (EXPLAIN_QUANTUM), so they match its `probability` only approximately.
+    Models TreeSHAP cannot explain get a 409.
+    """
+    X = rows_to_matrix(payload.rows)
+    if len(X) > MAX_EXPLAIN_ROWS:
+        raise HTTPException(status_code=413,
+                            detail=f"{len(X)} rows exceeds MAX_EXPLAIN_ROWS={MAX_EXPLAIN_ROWS}")
+    if len(X) == 0:
+        return {"count": 0, "results": []}
+    try:
+        results = await run_in_threadpool(explanations.explain, X, payload.crop, payload.top_features)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown crop {payload.crop!r}")
+    except ValueError as e:  # e.g. an engine exported without node covers, or a model shap cannot walk
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"count": len(X), "results": results}
+
+@app.get("/metrics/explain")
+def explain_metrics():
+    return explanations.info()
+
+@app.get("/metrics/forecast")
+def forecast_metrics():
+    return forecasts.info()
+
+@app.post("/recommend/batch")
+async def recommend_batch(request: Request, top_k: int = 3):
+    """
+    Scores many plots in one vectorized call.
+
+    Accepts a JSON body ({"rows": [...], "top_k": k}), a CSV upload (text/csv)
+    or an Arrow IPC stream (application/vnd.apache.arrow.stream). Bodies over
+    MAX_UPLOAD_BYTES are refused while reading; tables stop parsing one row past
+    MAX_BATCH_SIZE.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    body = await read_body(request)
+
+    if content_type == "text/csv":
+        X = frame_to_matrix(pd.read_csv(io.BytesIO(body), nrows=MAX_BATCH_SIZE + 1))
+    elif content_type in ("application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file"):
+        X = frame_to_matrix(read_arrow(body, content_type))
+    else:
+        try:
+            payload = BatchRequest.model_validate_json(body)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+        top_k = payload.top_k
+        X = rows_to_matrix(payload.rows)
+
+    if len(X) == 0:
+        return {"count": 0, "results": []}
+    if len(X) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds MAX_BATCH_SIZE={MAX_BATCH_SIZE} rows")
+
+    results = await run_in_threadpool(top_k_predictions, X, top_k)
+    return {"count": len(X), "results": results}
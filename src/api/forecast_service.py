@@ -0,0 +1,137 @@
+import copy
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from src.api.model_registry import file_signature
+from src.model.train_yield_model import model_filename
+from src.monitoring.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+
+class ForecastService:
+    """
+    Serves forecasts from the Prophet models pickled by train_yield_model.
+
+    Unpickled models live in a bounded LRU; computed forecasts in a second LRU
+    keyed on the model file's (mtime, size), so retraining a series
+    invalidates its entries, and expired after `ttl_seconds` regardless.
+    Point-only requests skip Prophet's uncertainty sampling, which is most of
+    `predict`'s cost.
+    """
+
+    def __init__(self, directory, max_models=32, cache_size=512, ttl_seconds=3600.0):
+        """
+        Args:
+            directory (str): Prophet model directory (`<Crop>_prophet.pkl`, `<Area>__<Crop>_prophet.pkl`).
+            max_models (int): Unpickled models kept in memory.
+            cache_size (int): Forecast results kept in memory.
+            ttl_seconds (float): Maximum age of a cached forecast.
+        """
+        self.directory = directory
+        self.max_models = max_models
+        self.cache_size = cache_size
+        self.ttl_seconds = ttl_seconds
+        self._models = OrderedDict()   # path -> (signature, model)
+        self._results = OrderedDict()  # (path, signature, periods, intervals) -> (created, result)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "model_loads": 0}
+
+    def resolve(self, crop, area=None):
+        """Area-specific model when one was trained, otherwise the crop-level model (or None)."""
+        keys = [(area, crop), (crop,)] if area else [(crop,)]
+        for key in keys:
+            path = os.path.join(self.directory, model_filename(key))
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _model(self, path, signature):
+        with self._lock:
+            cached = self._models.get(path)
+            if cached is not None and cached[0] == signature:
+                self._models.move_to_end(path)
+                return cached[1]
+
+        start = time.perf_counter()
+        with span("forecast.model_load"), open(path, "rb") as f:
+            model = pickle.load(f)
+        logger.info("Loaded %s in %.3fs", path, time.perf_counter() - start)
+
+        with self._lock:
+            self.stats["model_loads"] += 1
+            self._models[path] = (signature, model)
+            self._models.move_to_end(path)
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+        return model
+
+    @span("forecast.predict")
+    def _predict(self, model, periods, intervals):
+        future = model.make_future_dataframe(periods=periods, freq="YS")
+        if not intervals:
+            # Shallow copy: the cached model stays untouched for concurrent interval requests
+            model = copy.copy(model)
+            model.uncertainty_samples = 0
+        forecast = model.predict(future.tail(periods))
+
+        columns = {"year": forecast["ds"].dt.year, "yhat": forecast["yhat"]}
+        if intervals:
+            columns.update(yhat_lower=forecast["yhat_lower"], yhat_upper=forecast["yhat_upper"])
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*(c.tolist() for c in columns.values()))]
+
+    def forecast(self, crop, area=None, periods=5, intervals=True):
+        """
+        Forecast for the next `periods` years.
+
+        Returns:
+            dict: Model used, its version and the forecast rows, or None when no model exists.
+        """
+        path = self.resolve(crop, area)
+        if path is None:
+            return None
+        signature = file_signature(path)
+        key = (path, signature, periods, intervals)
+
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and time.monotonic() - cached[0] > self.ttl_seconds:
+                del self._results[key]
+                self.stats["expired"] += 1
+                cached = None
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.stats["hits"] += 1
+                return {**cached[1], "cached": True}
+            self.stats["misses"] += 1
+
+        start = time.perf_counter()
+        rows = self._predict(self._model(path, signature), periods, intervals)
+        result = {
+            "crop": crop,
+            "area": area if area and os.path.basename(path) == model_filename((area, crop)) else None,
+            "model": os.path.basename(path),
+            "model_version": f"{signature[0]}-{signature[1]}",
+            "intervals": intervals,
+            "forecast": rows,
+            "compute_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+        with self._lock:
+            self._results[key] = (time.monotonic(), result)
+            # Entries for older versions of this model can never hit again
+            for stale in [k for k in self._results if k[0] == path and k[1] != signature]:
+                del self._results[stale]
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return {**result, "cached": False}
+
+    def info(self):
+        with self._lock:
+            return {**self.stats, "models_cached": len(self._models), "forecasts_cached": len(self._results),
+                    "max_models": self.max_models, "cache_size": self.cache_size, "ttl_seconds": self.ttl_seconds}
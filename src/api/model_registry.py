@@ -0,0 +1,216 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.model.forest_engine import ForestEngine, load_recommender
+from src.monitoring.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+MODEL_SUFFIXES = (".npz", ".pkl", ".joblib")
+
+# API inputs -> feature names used by train_recommender
+FEATURE_ALIASES = {
+    "NDVI_sat": "NDVI",
+    "Temperature_sat": "Temperature",
+    "Rainfall_sat": "Rainfall",
+}
+
+
+def file_signature(path):
+    """(mtime_ns, size): cheap change detection for the watcher."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def resolve_artifact(path):
+    """The model file itself, or the newest model artifact when `path` is a directory."""
+    if not os.path.isdir(path):
+        return path
+    candidates = [os.path.join(path, f) for f in os.listdir(path) if f.endswith(MODEL_SUFFIXES)]
+    if not candidates:
+        raise FileNotFoundError(f"No model artifact ({', '.join(MODEL_SUFFIXES)}) in {path}")
+    return max(candidates, key=os.path.getmtime)
+
+
+class ModelVersion:
+    """
+    One loaded recommender plus the mapping from API inputs to its feature vector.
+
+    Understands the three artifact shapes in use: the ForestEngine `.npz`
+    (scales internally), the train_recommender bundle
+    `{"model", "scaler", "features"}` and a bare sklearn estimator. Model
+    features the API does not supply are filled with the training mean, i.e.
+    a neutral 0 after standardization.
+    """
+
+    def __init__(self, artifact, path, api_features, aliases=FEATURE_ALIASES):
+        self.path = path
+        self.api_features = list(api_features)
+        self.scaler = None
+
+        if isinstance(artifact, ForestEngine):
+            self.estimator = artifact
+            self.features = artifact.features or self.api_features
+            fill = artifact.mean
+        elif isinstance(artifact, dict) and "model" in artifact:
+            self.estimator = artifact["model"]
+            self.scaler = artifact.get("scaler")
+            self.features = list(artifact.get("features") or self.api_features)
+            fill = getattr(self.scaler, "mean_", None)
+        else:
+            self.estimator = artifact
+            self.features = list(getattr(artifact, "feature_names_in_", self.api_features))
+            fill = None
+
+        # Column i of the API matrix lands in column positions[i] of the model matrix
+        model_index = {name: i for i, name in enumerate(self.features)}
+        pairs = [(i, model_index.get(aliases.get(name, name), model_index.get(name)))
+                 for i, name in enumerate(self.api_features)]
+        self._api_cols = np.array([i for i, j in pairs if j is not None], dtype=np.int64)
+        self._model_cols = np.array([j for _, j in pairs if j is not None], dtype=np.int64)
+        self.filled_features = [f for j, f in enumerate(self.features) if j not in set(self._model_cols)]
+        self._fill = (np.zeros(len(self.features)) if fill is None
+                      else np.asarray(fill, dtype=np.float64).reshape(-1))
+        if len(self._api_cols) == 0:
+            raise ValueError(f"Model features {self.features} share nothing with the API inputs {self.api_features}")
+
+    @property
+    def classes_(self):
+        return self.estimator.classes_
+
+    def to_model_matrix(self, X):
+        """API-ordered rows -> model-ordered rows, missing features set to the training mean."""
+        X = np.asarray(X, dtype=np.float64)
+        out = np.repeat(self._fill[None, :], len(X), axis=0)
+        out[:, self._model_cols] = X[:, self._api_cols]
+        return self.scaler.transform(out) if self.scaler is not None else out
+
+    @span("recommender.predict_proba")
+    def predict_proba(self, X):
+        return self.estimator.predict_proba(self.to_model_matrix(X))
+
+    @span("recommender.predict")
+    def predict(self, X):
+        return self.estimator.predict(self.to_model_matrix(X))
+
+
+class ModelRegistry:
+    """
+    Lazily loads the recommender and hot-swaps retrained versions.
+
+    `get()` loads on first use. A watcher thread polls the artifact's mtime
+    and size, loads a changed model off to the side and swaps the reference
+    in one assignment, so in-flight requests finish on the version they
+    started with. A half-written file that fails to load keeps the current
+    version and is retried on the next poll.
+    """
+
+    def __init__(self, path, api_features, poll_seconds=5.0):
+        """
+        Args:
+            path (str): Model artifact, or a directory whose newest artifact is served.
+            api_features (list): Feature names (and order) of API input rows.
+            poll_seconds (float): Watcher interval; 0 disables hot reload.
+        """
+        self.path = path
+        self.api_features = list(api_features)
+        self.poll_seconds = poll_seconds
+        self._current = None
+        self._signature = None
+        self._info = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self.loads = 0
+        self.last_error = None
+
+    @span("recommender.load")
+    def _load(self, artifact_path):
+        start = time.perf_counter()
+        signature = file_signature(artifact_path)
+        with open(artifact_path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        version = ModelVersion(load_recommender(artifact_path), artifact_path, self.api_features)
+        info = {
+            "path": artifact_path,
+            "version": digest,
+            "loaded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "load_seconds": round(time.perf_counter() - start, 4),
+            "features": version.features,
+            "filled_features": version.filled_features,
+            "n_classes": len(version.classes_),
+        }
+        return version, signature, info
+
+    def get(self):
+        """The active ModelVersion, loading it on first use."""
+        current = self._current
+        if current is not None:
+            return current
+        with self._lock:
+            if self._current is None:
+                self._swap(*self._load(resolve_artifact(self.path)))
+            return self._current
+
+    def _swap(self, version, signature, info):
+        self._current, self._signature, self._info = version, signature, info
+        self.loads += 1
+        logger.info("Serving recommender %s from %s (%.3fs load)", info["version"], info["path"],
+                    info["load_seconds"])
+
+    def refresh(self, force=False):
+        """
+        Loads and swaps in the artifact if it changed since the active version.
+
+        Returns:
+            bool: True when a new version was swapped in.
+        """
+        try:
+            artifact_path = resolve_artifact(self.path)
+            if not force and self._current is not None and \
+                    (artifact_path, file_signature(artifact_path)) == (self._info["path"], self._signature):
+                return False
+            loaded = self._load(artifact_path)
+        except Exception as e:  # keep serving the current version
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.warning("Model reload failed, keeping current version: %s", self.last_error)
+            return False
+
+        with self._lock:
+            self._swap(*loaded)
+        self.last_error = None
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            if self._current is not None:  # nothing to hot-swap until first use
+                self.refresh()
+
+    def start_watcher(self):
+        if self.poll_seconds > 0 and self._watcher is None:
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def info(self):
+        """Active version, load timing and watcher state for the /model endpoint."""
+        return {
+            **(self._info or {"path": self.path, "version": None}),
+            "loaded": self._current is not None,
+            "loads": self.loads,
+            "watching": self._watcher is not None,
+            "poll_seconds": self.poll_seconds,
+            "last_error": self.last_error,
+        }
@@ -1,11 +1,106 @@
 import pandas as pd
+import numpy as np
 import os
 
-def load_processed_data(data_path="data/processed/processed_data.csv"):
-    """Load processed dataset for dashboard & ML models."""
+from src.data_preprocessing.spatiotemporal_join import spatiotemporal_join
+
+# Typed schema of the processed dataset
+CATEGORICAL_COLUMNS = ["Area", "Crop", "Item", "Crop_Type"]
+YEAR_COLUMN = "Year"
+PARTITION_COLUMNS = ["Crop", "Item"]  # first one present becomes the row-group key
+
+
+def columnar_path(data_path):
+    """Parquet sibling of a processed CSV path (`processed_data.csv` -> `processed_data.parquet`)."""
+    root, ext = os.path.splitext(data_path)
+    return data_path if ext == ".parquet" else f"{root}.parquet"
+
+
+def optimize_dtypes(df):
+    """Categorical Area/Crop, int16 Year and float32 measurements."""
+    df = df.copy()
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype("category")
+        elif col == YEAR_COLUMN:
+            df[col] = df[col].astype("int16")
+        elif pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+            df[col] = df[col].astype("float32")
+    return df
+
+
+def _apply_filters(df, filters):
+    """Evaluates pyarrow-style [(column, op, value), ...] filters on a DataFrame (CSV fallback)."""
+    ops = {
+        "=": lambda s, v: s == v, "==": lambda s, v: s == v, "!=": lambda s, v: s != v,
+        "<": lambda s, v: s < v, "<=": lambda s, v: s <= v, ">": lambda s, v: s > v,
+        ">=": lambda s, v: s >= v, "in": lambda s, v: s.isin(v), "not in": lambda s, v: ~s.isin(v),
+    }
+    mask = np.ones(len(df), dtype=bool)
+    for col, op, value in filters:
+        mask &= ops[op](df[col], value).to_numpy()
+    return df[mask].reset_index(drop=True)
+
+
+def save_processed_data(df, output_path="data/processed/processed_data.csv", write_csv=True):
+    """
+    Saves the processed dataset as typed Parquet, one row group per crop, plus the CSV.
+
+    Args:
+        df (pd.DataFrame): Processed dataset.
+        output_path (str): CSV path; the Parquet file is written next to it.
+        write_csv (bool): Also write the CSV for tools that still need it.
+
+    Returns:
+        str: Path of the Parquet file.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    if write_csv and not output_path.endswith(".parquet"):
+        df.to_csv(output_path, index=False)
+
+    typed = optimize_dtypes(df)
+    partition = next((c for c in PARTITION_COLUMNS if c in typed.columns), None)
+    parquet_path = columnar_path(output_path)
+    table = pa.Table.from_pandas(typed, preserve_index=False)
+
+    with pq.ParquetWriter(parquet_path, table.schema) as writer:
+        if partition is None:
+            writer.write_table(table)
+        else:
+            # Row groups aligned with crops let filtered reads skip whole groups
+            for _, group in typed.groupby(partition, observed=True, sort=True):
+                writer.write_table(pa.Table.from_pandas(group, schema=table.schema, preserve_index=False))
+    return parquet_path
+
+
+def load_processed_data(data_path="data/processed/processed_data.csv", columns=None, filters=None):
+    """
+    Load processed dataset for dashboard & ML models (typed Parquet copy when present, else the CSV).
+
+    Args:
+        data_path (str): Processed CSV (or Parquet) path.
+        columns (list, optional): Columns to load.
+        filters (list, optional): pyarrow-style filters, e.g. [("Crop", "=", "Wheat")].
+
+    Returns:
+        pd.DataFrame: Typed dataset.
+    """
+    parquet_path = columnar_path(data_path)
+    if os.path.exists(parquet_path):
+        import pyarrow.parquet as pq
+        return pq.read_table(parquet_path, columns=columns, filters=filters).to_pandas()
+
     if not os.path.exists(data_path):
         raise FileNotFoundError(f"{data_path} not found. Run preprocessing first.")
-    return pd.read_csv(data_path)
+    filter_columns = [f[0] for f in filters or []]
+    usecols = None if columns is None else list(dict.fromkeys(list(columns) + filter_columns))
+    df = optimize_dtypes(pd.read_csv(data_path, usecols=usecols))
+    if filters:
+        df = _apply_filters(df, filters)
+    return df if columns is None else df[list(columns)]
 
 
 def preprocess_raw_data(raw_path="data/raw/merged_crop_data.csv",
@@ -14,16 +109,15 @@ def preprocess_raw_data(raw_path="data/raw/merged_crop_data.csv",
     """Example preprocessing pipeline to merge raw & satellite data."""
     # Load
     raw_df = pd.read_csv(raw_path)
-    sat_df = pd.read_csv(sat_path)
+    sat_df = pd.read_csv(sat_path).rename(columns={"Crop_Type": "Crop"})
 
-    # Merge (placeholder logic, adapt for real pipeline)
-    df = pd.merge(raw_df, sat_df, left_on="Crop", right_on="Crop_Type", how="left")
+    # Join satellite features by (Area, Crop, Year) where the satellite data has them
+    df = spatiotemporal_join(raw_df.drop(columns=["Crop_Type"], errors="ignore"), sat_df)
 
     # Drop duplicates / NaNs
     df = df.drop_duplicates().dropna(how="any")
 
-    # Save
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df.to_csv(output_path, index=False)
-    print(f"[INFO] Processed data saved to {output_path}")
+    # Save (CSV + typed Parquet)
+    parquet_path = save_processed_data(df, output_path)
+    print(f"[INFO] Processed data saved to {output_path} and {parquet_path}")
     return df
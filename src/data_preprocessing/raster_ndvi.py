@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TILE = 1024  # tile side in pixels; a 1024² float32 tile is 4 MB
+
+
+def load_band(path, shape=None, dtype="uint16"):
+    """
+    Memory-maps a band so only the tiles being processed are paged in.
+
+    Args:
+        path (str): `.npy` file, or a raw headerless tile (then `shape` is required).
+        shape (tuple, optional): (rows, cols) of a raw tile.
+        dtype (str): Pixel type of a raw tile.
+
+    Returns:
+        np.ndarray: Read-only memmap of the band.
+    """
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    if shape is None:
+        raise ValueError(f"❌ Raw band {path} needs a shape.")
+    return np.memmap(path, dtype=dtype, mode="r", shape=tuple(shape))
+
+
+def ndvi(red, nir):
+    """(NIR - Red) / (NIR + Red) as float32; NaN where both bands are zero (no data)."""
+    red = red.astype(np.float32)
+    nir = nir.astype(np.float32)
+    total = nir + red
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = (nir - red) / total
+    out[total == 0] = np.nan
+    return out
+
+
+def tile_slices(shape, tile=DEFAULT_TILE):
+    """(row slice, col slice) pairs covering a 2D raster in `tile`-sized blocks."""
+    rows, cols = shape
+    return [(slice(r, min(r + tile, rows)), slice(c, min(c + tile, cols)))
+            for r in range(0, rows, tile) for c in range(0, cols, tile)]
+
+
+def _reduce_tile(red, nir, labels, block, n_labels):
+    """Per-label pixel count, NDVI sum and sum of squares for one tile."""
+    values = ndvi(red[block], nir[block]).ravel()
+    ids = np.asarray(labels[block]).ravel()
+    # Ids past n_labels (regions missing from the name table) would lengthen the bincounts
+    valid = (ids > 0) & (ids < n_labels) & np.isfinite(values)
+    ids, values = ids[valid], values[valid].astype(np.float64)
+    return (np.bincount(ids, minlength=n_labels),
+            np.bincount(ids, weights=values, minlength=n_labels),
+            np.bincount(ids, weights=values * values, minlength=n_labels))
+
+
+def label_ndvi(red, nir, labels, n_labels=None, tile=DEFAULT_TILE, workers=None):
+    """
+    Reduces NDVI over integer-labelled regions, one tile at a time across a thread pool.
+
+    NumPy releases the GIL in the arithmetic and bincount, so threads scale
+    without copying the memmapped bands into worker processes.
+
+    Args:
+        red (np.ndarray): Red band (memmap or array).
+        nir (np.ndarray): Near-infrared band, same shape.
+        labels (np.ndarray): Region ids per pixel; 0 means outside every region.
+        n_labels (int, optional): Largest label + 1 (scanned from `labels` when None).
+        tile (int): Tile side in pixels.
+        workers (int, optional): Threads (defaults to the CPU count).
+
+    Returns:
+        tuple: (pixels, ndvi_sum, ndvi_sumsq) arrays indexed by label.
+    """
+    if red.shape != nir.shape or red.shape != labels.shape:
+        raise ValueError(f"❌ Band/mask shapes differ: {red.shape}, {nir.shape}, {labels.shape}")
+    if n_labels is None:
+        n_labels = int(max(np.max(labels[block]) for block in tile_slices(labels.shape, tile))) + 1
+
+    blocks = tile_slices(red.shape, tile)
+    count = np.zeros(n_labels, dtype=np.int64)
+    total = np.zeros(n_labels)
+    sumsq = np.zeros(n_labels)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for c, s, q in pool.map(lambda block: _reduce_tile(red, nir, labels, block, n_labels), blocks):
+            count += c
+            total += s
+            sumsq += q
+    return count, total, sumsq
+
+
+class _CombinedLabels:
+    """
+    Lazy `region * n_crops + crop` label raster; tiles are combined on access, never the full scene.
+
+    `n_crops` must exceed every crop id in the raster, otherwise a crop would
+    land in the next region's slots; a tile breaking that raises ValueError.
+    """
+
+    def __init__(self, regions, crops, n_crops):
+        if regions.shape != crops.shape:
+            raise ValueError(f"❌ Region/crop mask shapes differ: {regions.shape}, {crops.shape}")
+        self.regions, self.crops, self.n_crops = regions, crops, n_crops
+        self.shape = regions.shape
+
+    def __getitem__(self, block):
+        regions = np.asarray(self.regions[block], dtype=np.int64)
+        crops = np.asarray(self.crops[block], dtype=np.int64)
+        if crops.size and crops.max() >= self.n_crops:
+            raise ValueError(f"❌ Crop id {crops.max()} does not fit the label stride n_crops={self.n_crops}")
+        # Pixels outside a region or without a crop class stay 0 (ignored)
+        return np.where((regions > 0) & (crops > 0), regions * self.n_crops + crops, 0)
+
+
+def scene_features(scene, tile=DEFAULT_TILE, workers=None):
+    """
+    Per-(Area[, Crop], Year) NDVI features of one scene.
+
+    Args:
+        scene (dict): {"year", "red", "nir", "regions": path, "areas": {id: Area}} plus optional
+            "crops": path and "crop_names": {id: Crop} for a crop-type raster, and "shape" /
+            "dtype" for raw bands.
+
+    Returns:
+        pd.DataFrame: Area, (Crop,) Year, NDVI, NDVI_std and Pixels for every labelled region.
+    """
+    shape, dtype = scene.get("shape"), scene.get("dtype", "uint16")
+    red = load_band(scene["red"], shape, dtype)
+    nir = load_band(scene["nir"], shape, dtype)
+    regions = load_band(scene["regions"], shape, scene.get("mask_dtype", "int32"))
+    areas = {int(k): v for k, v in scene["areas"].items()}
+
+    if "crops" in scene:
+        # Combined label = region * n_crops + crop, so one pass reduces both masks
+        crops = load_band(scene["crops"], shape, scene.get("mask_dtype", "int32"))
+        crop_names = {int(k): v for k, v in scene["crop_names"].items()}
+        # Stride past every crop id actually present; unnamed crop classes are dropped below
+        largest = int(max(np.max(crops[block]) for block in tile_slices(crops.shape, tile)))
+        n_crops = max(max(crop_names), largest) + 1
+        labels = _CombinedLabels(regions, crops, n_crops)
+        n_labels = (max(areas) + 1) * n_crops
+    else:
+        labels, n_labels, n_crops = regions, max(areas) + 1, None
+
+    count, total, sumsq = label_ndvi(red, nir, labels, n_labels, tile, workers)
+    ids = np.nonzero(count)[0]
+    mean = total[ids] / count[ids]
+    var = np.clip(sumsq[ids] / count[ids] - mean ** 2, 0, None)
+
+    frame = {"Area": [areas.get(int(i) // n_crops if n_crops else int(i)) for i in ids]}
+    if n_crops:
+        frame["Crop"] = [crop_names.get(int(i) % n_crops) for i in ids]
+    frame.update({"Year": int(scene["year"]), "NDVI": mean, "NDVI_std": np.sqrt(var), "Pixels": count[ids]})
+    out = pd.DataFrame(frame)
+    # Labels without a name in the manifest are not regions we report on
+    return out.dropna(subset=[c for c in ("Area", "Crop") if c in out.columns]).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute per-(Area, Year) NDVI features from band rasters.")
+    parser.add_argument("manifest", help="JSON list of scenes (see scene_features)")
+    parser.add_argument("--output", default="data/satellite_data/raster/ndvi_features.csv")
+    parser.add_argument("--tile", type=int, default=DEFAULT_TILE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        scenes = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(args.manifest))
+    frames = []
+    for scene in scenes:
+        # Band paths in the manifest are relative to the manifest itself
+        for key in ("red", "nir", "regions", "crops"):
+            if key in scene:
+                scene[key] = os.path.join(base, scene[key])
+        frames.append(scene_features(scene, args.tile, args.workers))
+        print(f"🛰️ {scene['year']}: {len(frames[-1])} regions from {scene['red']}")
+
+    features = pd.concat(frames, ignore_index=True)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    features.to_csv(args.output, index=False)
+    print(f"✅ NDVI features saved at {args.output} ({len(features)} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+from src.data_preprocessing.streaming import DEFAULT_CHUNKSIZE, RunningAggregate, normalize_chunk, stream_aggregate
+
+# Finest satellite resolution we join on; files may carry any subset with Crop and/or Area
+JOIN_KEYS = ["Area", "Crop", "Year"]
+DATE_COLUMN = "Date"
+DEFAULT_TOLERANCE = 2  # years an as-of match may reach when a (Area, Crop) has no record for the exact year
+
+
+def add_year(chunk):
+    """Derives `Year` from a `Date` column when the satellite export has dates instead of years."""
+    if "Year" not in chunk.columns and DATE_COLUMN in chunk.columns:
+        chunk = chunk.assign(Year=pd.to_datetime(chunk[DATE_COLUMN], errors="coerce").dt.year)
+        chunk = chunk.drop(columns=DATE_COLUMN).dropna(subset=["Year"])
+        chunk["Year"] = chunk["Year"].astype("int64")
+    return chunk
+
+
+def satellite_keys(columns):
+    """Join keys present in a satellite header, finest first ordered as JOIN_KEYS."""
+    keys = [k for k in JOIN_KEYS if k in columns]
+    if "Crop" not in keys and "Area" not in keys:
+        raise ValueError("❌ Satellite data needs a crop (Crop / Crop_Type) or Area column to be joined.")
+    return keys
+
+
+def aggregate_satellite(paths, value_cols=None, rename=None, chunksize=DEFAULT_CHUNKSIZE, max_workers=None):
+    """
+    Streams satellite CSVs into per-(Area, Crop, Year) running totals.
+
+    The key set is the finest one every file supports (a crop-level summary
+    file in the folder limits the whole aggregate to crop level).
+
+    Args:
+        paths (list): Satellite CSV files.
+        value_cols (list, optional): Columns to aggregate; numeric non-key columns when None.
+        rename (dict, optional): Column renames, e.g. {"Crop_Type": "Crop"}.
+        chunksize (int): Rows per chunk.
+        max_workers (int, optional): Worker processes (one file each).
+
+    Returns:
+        RunningAggregate: Totals grouped by the shared join keys.
+    """
+    paths = list(paths)
+    headers = [add_year(normalize_chunk(pd.read_csv(p, nrows=5), rename)).columns for p in paths]
+    keys = [k for k in JOIN_KEYS if all(k in satellite_keys(h) for h in headers)]
+    print(f"🛰️ Aggregating satellite data by {keys}")
+    return stream_aggregate(paths, keys, value_cols, rename, chunksize, max_workers=max_workers, prepare=add_year)
+
+
+def _string_index(frame, cols):
+    """MultiIndex of `cols` as strings, so categorical / int16 / object keys compare equal."""
+    return pd.MultiIndex.from_arrays([frame[c].astype(str).to_numpy() for c in cols], names=cols)
+
+
+def _lookup(means, left, cols):
+    """Vectorized exact lookup of per-group means for every left row (NaN where absent)."""
+    means = means.copy()
+    means.index = _string_index(means.reset_index(), cols)
+    return means.reindex(_string_index(left, cols)).to_numpy(dtype=np.float64)
+
+
+def _asof(means, left, by, tolerance, direction):
+    """Nearest-year match within `tolerance` per `by` group, via one sorted merge_asof."""
+    right = means.reset_index()
+    # Joint integer codes for the `by` columns keep merge_asof on fast int keys
+    codes = pd.factorize(pd.Index(_string_index(left, by)).append(pd.Index(_string_index(right, by))))[0]
+    value_cols = list(means.columns)
+
+    left_keys = pd.DataFrame({"_row": np.arange(len(left)), "_key": codes[:len(left)],
+                              "Year": left["Year"].to_numpy(dtype=np.int64)})
+    right_keys = right[value_cols].assign(_key=codes[len(left):], Year=right["Year"].to_numpy(dtype=np.int64))
+    matched = pd.merge_asof(left_keys.sort_values("Year", kind="mergesort"),
+                            right_keys.sort_values("Year", kind="mergesort"),
+                            on="Year", by="_key", tolerance=tolerance, direction=direction)
+
+    out = np.full((len(left), len(value_cols)), np.nan)
+    out[matched["_row"].to_numpy()] = matched[value_cols].to_numpy(dtype=np.float64)
+    return out
+
+
+def spatiotemporal_join(left, satellite, tolerance=DEFAULT_TOLERANCE, direction="nearest"):
+    """
+    Attaches satellite features to yield rows at the finest available resolution.
+
+    Each row takes the (Area, Crop) record from the nearest year within
+    `tolerance`, then falls back to the (Area, Crop) all-years mean and finally
+    to the crop-level mean (the old broadcast) for whatever is still missing.
+    Fallback means are rolled up from exact counts and sums, not averaged means.
+    Satellite data keyed by (Area, Year) only, e.g. raster NDVI, joins the
+    same way on Area.
+
+    Args:
+        left (pd.DataFrame): Yield rows with Crop (and Area / Year when available).
+        satellite (RunningAggregate | pd.DataFrame): Aggregated totals (see `aggregate_satellite`)
+            or raw satellite records with Crop and/or Area and optional Year columns.
+        tolerance (int): Maximum year distance for the as-of match.
+        direction (str): merge_asof direction ("nearest", "backward" or "forward").
+
+    Returns:
+        pd.DataFrame: `left` with the satellite value columns added (same-named columns replaced).
+    """
+    if isinstance(satellite, pd.DataFrame):
+        satellite = RunningAggregate(satellite_keys(satellite.columns)).update(add_year(satellite))
+    keys = [k for k in satellite.group_cols if k in left.columns]
+    spatial = [k for k in keys if k != "Year"]
+    if not spatial:
+        raise ValueError("❌ Yield rows share no Area / Crop key with the satellite data.")
+
+    # Finest level first; each later level only fills cells still missing
+    levels = []
+    if "Year" in keys:
+        levels.append(("year ±%d" % tolerance, spatial, True))
+    levels.append(("all-years mean", spatial, False))
+    if len(spatial) > 1:
+        levels.append(("crop mean", ["Crop"], False))
+
+    left = left.reset_index(drop=True)
+    value_cols = list(satellite.mean().columns)
+    values = np.full((len(left), len(value_cols)), np.nan)
+    matched_at = np.full(len(left), len(levels), dtype=np.int8)
+    for i, (_, cols, temporal) in enumerate(levels):
+        if temporal:
+            found = _asof(satellite.rollup(cols + ["Year"]).mean(), left, cols, tolerance, direction)
+        else:
+            found = _lookup(satellite.rollup(cols).mean(), left, cols)
+        missing = np.isnan(values)
+        values[missing] = found[missing]
+        newly = (matched_at == len(levels)) & ~np.isnan(found).all(axis=1)
+        matched_at[newly] = i
+
+    counts = np.bincount(matched_at, minlength=len(levels) + 1)
+    summary = ", ".join(f"{name}: {n:,}" for (name, _, _), n in zip(levels, counts))
+    print(f"🛰️ Satellite match → {summary}, unmatched: {counts[-1]:,}")
+
+    out = left.drop(columns=[c for c in value_cols if c in left.columns])
+    return out.join(pd.DataFrame(values, columns=value_cols, index=out.index))
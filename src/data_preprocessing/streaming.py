@@ -0,0 +1,209 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 500_000
+
+
+class RunningAggregate:
+    """
+    Mergeable per-group count / sum / sum-of-squares for a set of value columns.
+
+    Chunks (and partial aggregates from other files or processes) can be folded
+    in any order; mean and variance are then derived from the exact totals, so
+    only one row per group is ever held in memory.
+    """
+
+    def __init__(self, group_cols, value_cols=None):
+        """
+        Args:
+            group_cols (list): Grouping columns, e.g. ["Crop"] or ["Area", "Crop", "Year"].
+            value_cols (list, optional): Columns to aggregate; numeric non-key columns when None.
+        """
+        self.group_cols = list(group_cols)
+        self.value_cols = list(value_cols) if value_cols is not None else None
+        self.count = None
+        self.sum = None
+        self.sumsq = None
+
+    def _value_cols(self, chunk):
+        if self.value_cols is not None:
+            return [c for c in self.value_cols if c in chunk.columns]
+        numeric = chunk.select_dtypes(include="number").columns
+        return [c for c in numeric if c not in self.group_cols]
+
+    def _fold(self, count, total, sumsq):
+        if self.count is None:
+            self.count, self.sum, self.sumsq = count, total, sumsq
+        else:
+            self.count = self.count.add(count, fill_value=0)
+            self.sum = self.sum.add(total, fill_value=0)
+            self.sumsq = self.sumsq.add(sumsq, fill_value=0)
+
+    def update(self, chunk):
+        """Folds one DataFrame chunk into the running totals."""
+        cols = self._value_cols(chunk)
+        if chunk.empty or not cols:
+            return self
+        values = chunk[cols].astype(np.float64)
+        keys = [chunk[c] for c in self.group_cols]
+        self._fold(values.notna().groupby(keys, observed=True).sum(),
+                   values.groupby(keys, observed=True).sum(),
+                   (values ** 2).groupby(keys, observed=True).sum())
+        return self
+
+    def merge(self, other):
+        """Folds another RunningAggregate (e.g. from a worker process) into this one."""
+        if other.count is not None:
+            self._fold(other.count, other.sum, other.sumsq)
+        return self
+
+    def rollup(self, group_cols):
+        """Exact totals at a coarser grouping (a subset of this aggregate's group columns)."""
+        out = RunningAggregate(group_cols, self.value_cols)
+        if self.count is not None:
+            out._fold(*(totals.groupby(level=list(group_cols), observed=True).sum()
+                        for totals in (self.count, self.sum, self.sumsq)))
+        return out
+
+    def mean(self):
+        """Per-group means (NaN where a group has no values for a column)."""
+        if self.count is None:
+            return pd.DataFrame(columns=self.group_cols)
+        return self.sum / self.count.where(self.count > 0)
+
+    def var(self, ddof=1):
+        """Per-group variances from the running totals (NaN below ddof + 1 values)."""
+        if self.count is None:
+            return pd.DataFrame(columns=self.group_cols)
+        n = self.count.where(self.count > ddof)
+        return ((self.sumsq - self.sum ** 2 / n) / (n - ddof)).clip(lower=0)
+
+    def result(self, with_var=False):
+        """Means (and optional `<col>_var` variances) as a flat frame with the group columns."""
+        out = self.mean()
+        if with_var:
+            out = out.join(self.var().add_suffix("_var"))
+        return out.reset_index()
+
+
+def normalize_chunk(chunk, rename=None):
+    """Applies column renames and drops duplicate columns, as the in-memory scripts do."""
+    if rename:
+        chunk = chunk.rename(columns=rename)
+    return chunk.loc[:, ~chunk.columns.duplicated()]
+
+
+def aggregate_file(path, group_cols, value_cols=None, rename=None, chunksize=DEFAULT_CHUNKSIZE, usecols=None,
+                   prepare=None):
+    """
+    Streams one CSV in chunks into a RunningAggregate.
+
+    Args:
+        path (str): CSV file.
+        group_cols (list): Grouping columns (after `rename`).
+        value_cols (list, optional): Columns to aggregate (after `rename`).
+        rename (dict, optional): Column renames applied to every chunk.
+        chunksize (int): Rows per chunk; bounds peak memory.
+        usecols (list, optional): Raw columns to parse.
+        prepare (callable, optional): Module-level function applied to each renamed chunk
+            (e.g. deriving `Year` from a date); must be picklable for worker processes.
+
+    Returns:
+        RunningAggregate: Totals for this file.
+    """
+    agg = RunningAggregate(group_cols, value_cols)
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=usecols):
+        chunk = normalize_chunk(chunk, rename)
+        agg.update(prepare(chunk) if prepare else chunk)
+    return agg
+
+
+def stream_aggregate(paths, group_cols, value_cols=None, rename=None, chunksize=DEFAULT_CHUNKSIZE,
+                     usecols=None, max_workers=None, prepare=None):
+    """
+    Aggregates many CSVs concurrently (one file per worker process) and merges the partials.
+
+    Returns:
+        RunningAggregate: Totals across all files.
+    """
+    paths = list(paths)
+    total = RunningAggregate(group_cols, value_cols)
+    if len(paths) == 1 or max_workers == 1:
+        for path in paths:
+            total.merge(aggregate_file(path, group_cols, value_cols, rename, chunksize, usecols, prepare))
+        return total
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(aggregate_file, path, group_cols, value_cols, rename, chunksize, usecols, prepare)
+                   for path in paths]
+        for future in futures:
+            total.merge(future.result())
+    return total
+
+
+def in_memory_aggregate(paths, group_cols, value_cols=None, rename=None):
+    """Reference implementation: load everything, concat and groupby-mean (the old scripts' approach)."""
+    df = pd.concat([normalize_chunk(pd.read_csv(p), rename) for p in paths], axis=0, ignore_index=True)
+    df = df.loc[:, ~df.columns.duplicated()]
+    if value_cols is None:
+        value_cols = [c for c in df.select_dtypes(include="number").columns if c not in group_cols]
+    return df.groupby(group_cols)[value_cols].mean().reset_index()
+
+
+def verify(paths, group_cols, value_cols=None, rename=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Checks that the streamed result equals the in-memory result.
+
+    Returns:
+        bool: True when groups match and every mean agrees to floating-point tolerance.
+    """
+    streamed = stream_aggregate(paths, group_cols, value_cols, rename, chunksize).result()
+    expected = in_memory_aggregate(paths, group_cols, value_cols, rename)
+
+    streamed = streamed.sort_values(group_cols).reset_index(drop=True)
+    expected = expected.sort_values(group_cols).reset_index(drop=True)
+    if list(streamed[group_cols].astype(str).itertuples(index=False)) != \
+            list(expected[group_cols].astype(str).itertuples(index=False)):
+        return False
+
+    value_cols = [c for c in expected.columns if c not in group_cols]
+    if sorted(value_cols) != sorted(c for c in streamed.columns if c not in group_cols):
+        return False
+    return all(np.allclose(streamed[c].to_numpy(dtype=float), expected[c].to_numpy(dtype=float),
+                           rtol=1e-9, atol=0, equal_nan=True) for c in value_cols)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked, bounded-memory group aggregation of CSV files.")
+    parser.add_argument("paths", nargs="+", help="CSV files (directories are expanded to their *.csv)")
+    parser.add_argument("--group-by", default="Crop_Type")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--output", help="Write group means (and variances) to this CSV")
+    parser.add_argument("--verify", action="store_true", help="Compare against the in-memory groupby")
+    args = parser.parse_args()
+
+    paths = []
+    for p in args.paths:
+        paths += sorted(os.path.join(p, f) for f in os.listdir(p) if f.endswith(".csv")) if os.path.isdir(p) else [p]
+    group_cols = args.group_by.split(",")
+
+    if args.verify:
+        ok = verify(paths, group_cols, chunksize=args.chunksize)
+        print("✅ Streamed aggregate matches in-memory result" if ok else "❌ Streamed aggregate differs!")
+        sys.exit(0 if ok else 1)
+
+    result = stream_aggregate(paths, group_cols, chunksize=args.chunksize).result(with_var=True)
+    if args.output:
+        result.to_csv(args.output, index=False)
+        print(f"💾 Saved {len(result)} groups to {args.output}")
+    else:
+        print(result.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+
+class YieldCube:
+    """
+    Startup-time aggregation layer for the dashboard.
+
+    Rows are sorted once by (Area, Crop, Year) and the slice bounds of every
+    (Area, Crop) series are kept in a dict, so fetching a selection is a dict
+    lookup plus a binary search on Year instead of a boolean scan of the whole
+    frame. Per-crop, per-(crop, year) and per-(area, year) yield means are
+    precomputed.
+    """
+
+    def __init__(self, df):
+        """
+        Args:
+            df (pd.DataFrame): Processed dataset with Area, Crop, Year & Yield columns.
+        """
+        # Stable sort keeps duplicate years in their original order
+        self.data = df.sort_values(["Area", "Crop", "Year"], kind="mergesort").reset_index(drop=True)
+        self._years = self.data["Year"].to_numpy()
+
+        sizes = self.data.groupby(["Area", "Crop"], sort=True, observed=True).size()
+        stops = np.cumsum(sizes.to_numpy())
+        self._bounds = dict(zip(sizes.index, zip(stops - sizes.to_numpy(), stops)))
+
+        self.crop_means = self.data.groupby("Crop", observed=True)["Yield"].mean()
+        self.crop_year_means = self.data.groupby(["Crop", "Year"], observed=True)["Yield"].mean()
+        self.best_crop = self.crop_means.idxmax() if len(self.crop_means) else None
+
+        # Choropleth inputs: one row per (Area, Year), overall and per crop
+        self._area_year_means = (self.data.groupby(["Year", "Area"], observed=True)["Yield"].mean()
+                                 .reset_index())
+        self._crop_area_year_means = {
+            crop: group.drop(columns="Crop").reset_index(drop=True)
+            for crop, group in self.data.groupby(["Crop", "Year", "Area"], observed=True)["Yield"].mean()
+                                        .reset_index().groupby("Crop", sort=False, observed=True)
+        }
+
+    def __len__(self):
+        return len(self.data)
+
+    def series(self, area, crop, year_min=None, year_max=None):
+        """
+        Rows for one (Area, Crop) pair, optionally limited to a year range (inclusive).
+
+        Returns:
+            pd.DataFrame: Matching rows in year order (empty if the pair is unknown).
+        """
+        bounds = self._bounds.get((area, crop))
+        if bounds is None:
+            return self.data.iloc[0:0]
+
+        start, stop = bounds
+        years = self._years[start:stop]
+        lo = start + (np.searchsorted(years, year_min, side="left") if year_min is not None else 0)
+        hi = start + (np.searchsorted(years, year_max, side="right") if year_max is not None else stop - start)
+        return self.data.iloc[lo:hi]
+
+    def crop_trend(self, crop):
+        """
+        Mean yield per year for a crop across all areas.
+
+        Returns:
+            pd.DataFrame: Year & Yield columns.
+        """
+        if crop not in self.crop_means.index:
+            return pd.DataFrame(columns=["Year", "Yield"])
+        return self.crop_year_means.loc[crop].reset_index()
+
+    def area_year_means(self, crop=None):
+        """
+        Mean yield per (Area, Year), for one crop or across all crops.
+
+        Returns:
+            pd.DataFrame: Year, Area & Yield columns sorted by Year then Area.
+        """
+        if crop is None:
+            return self._area_year_means
+        return self._crop_area_year_means.get(crop, self._area_year_means.iloc[0:0])
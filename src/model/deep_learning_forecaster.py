@@ -0,0 +1,301 @@
+import argparse
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.monitoring.instrumentation import span
+
+# --- File paths ---
+yield_file = "data/processed/yield_df.csv"
+model_file = "model/saved_models/global_forecaster.pkl"
+
+# Two-sided 80% normal interval, matching Prophet's default interval_width
+INTERVAL_Z = 1.2816
+
+
+def to_panel(df):
+    """
+    Pivots long yield data into one row per (Area, Crop) series (duplicate years averaged, gaps NaN).
+
+    Returns:
+        tuple: (keys DataFrame with Area & Crop, years array, yields array [n_series, n_years])
+    """
+    means = df.groupby(["Area", "Crop", "Year"], observed=True)["Yield"].mean()
+    panel = means.unstack("Year")
+    years = np.arange(int(panel.columns.min()), int(panel.columns.max()) + 1)
+    panel = panel.reindex(columns=years)
+    keys = panel.index.to_frame(index=False).astype(str)
+    return keys, years, panel.to_numpy(dtype=np.float64)
+
+
+def fill_gaps(Z):
+    """Forward-fills NaN gaps along each row, then back-fills the leading ones."""
+    n, T = Z.shape
+    idx = np.where(np.isnan(Z), 0, np.arange(T))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = Z[np.arange(n)[:, None], idx]
+    first = np.argmax(~np.isnan(Z), axis=1)
+    leading = np.arange(T)[None, :] < first[:, None]
+    return np.where(leading, Z[np.arange(n), first][:, None], filled)
+
+
+class GlobalForecaster:
+    """Direct multi-horizon forecaster (ridge + small ReLU layer) trained across every (Area, Crop) series."""
+
+    def __init__(self, lags=6, horizon=5, hidden=32, epochs=300, learning_rate=1e-3, alpha=1.0,
+                 max_samples=200_000, random_state=42):
+        """
+        Args:
+            lags (int): Years of history per sample.
+            horizon (int): Years forecast (one output per year ahead).
+            hidden (int): ReLU units on top of the ridge model; 0 keeps it linear.
+            epochs (int): Full-batch Adam steps for the non-linear part.
+            learning_rate (float): Adam step size.
+            alpha (float): L2 penalty of the ridge fit and of the hidden weights.
+            max_samples (int): Windows used for the Adam steps (the ridge fit uses all of them).
+            random_state (int): Seed for initialization and subsampling.
+        """
+        self.lags = lags
+        self.horizon = horizon
+        self.hidden = hidden
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.alpha = alpha
+        self.max_samples = max_samples
+        self.random_state = random_state
+        self.crops = []
+        self.mean = self.scale = None  # feature standardization
+        self.params = None
+        self.sigma = None  # residual std per horizon (log space), for intervals
+
+    # =====================
+    # Features
+    # =====================
+    def _features(self, windows, crop_codes):
+        """Feature matrix for log-yield windows [n, lags]."""
+        level = windows[:, -1]
+        rel = windows - level[:, None]
+        t = np.arange(self.lags) - (self.lags - 1) / 2
+        slope = rel @ (t / (t ** 2).sum())
+        onehot = np.zeros((len(windows), len(self.crops)))
+        known = crop_codes >= 0
+        onehot[np.flatnonzero(known), crop_codes[known]] = 1.0
+        return np.column_stack([rel[:, :-1], slope, level, onehot])
+
+    def _crop_codes(self, crops):
+        return pd.Categorical(crops, categories=self.crops).codes.astype(np.int64)
+
+    def _samples(self, Z, years, crop_codes):
+        """All complete training windows: (X, targets relative to the last lag, target mask, end years)."""
+        n, T = Z.shape
+        width = self.lags + self.horizon
+        if T < self.lags + 1:
+            raise ValueError(f"Need at least {self.lags + 1} years of history, got {T}")
+        # Pad so windows near the end still train the short horizons
+        padded = np.concatenate([Z, np.full((n, self.horizon - 1), np.nan)], axis=1)
+        windows = sliding_window_view(padded, width, axis=1)  # [n, starts, width]
+        inputs = windows[..., :self.lags]
+        targets = windows[..., self.lags:]
+        mask = ~np.isnan(targets)
+        usable = ~np.isnan(inputs).any(axis=2) & mask[..., 0]
+
+        series, start = np.nonzero(usable)
+        x = inputs[series, start]
+        X = self._features(x, crop_codes[series])
+        Y = targets[series, start] - x[:, -1:]
+        return X, np.nan_to_num(Y), mask[series, start].astype(np.float64), years[start + self.lags - 1]
+
+    # =====================
+    # Model
+    # =====================
+    def _forward(self, Xs, params):
+        hidden = np.maximum(Xs @ params["W1"] + params["b1"], 0.0)
+        return Xs @ params["Wl"] + hidden @ params["W2"] + params["b"], hidden
+
+    @span("global_forecaster.fit")
+    def fit(self, df):
+        """
+        Args:
+            df (pd.DataFrame): Yield data with Area, Crop, Year & Yield columns.
+
+        Returns:
+            GlobalForecaster: self.
+        """
+        start = time.perf_counter()
+        keys, years, Y = to_panel(df)
+        self.crops = sorted(keys["Crop"].unique())
+        X, T, M, end_years = self._samples(np.log1p(Y), years, self._crop_codes(keys["Crop"]))
+
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        Xs = (X - self.mean) / self.scale
+
+        # Ridge per horizon (each on the windows whose target year exists)
+        rng = np.random.default_rng(self.random_state)
+        n_features = Xs.shape[1]
+        A = np.column_stack([Xs, np.ones(len(Xs))])
+        penalty = self.alpha * np.eye(n_features + 1)
+        penalty[-1, -1] = 0.0
+        W = np.column_stack([np.linalg.solve(A.T @ (A * M[:, [h]]) + penalty, A.T @ (T[:, h] * M[:, h]))
+                             for h in range(self.horizon)])
+        params = {
+            "Wl": W[:-1], "b": W[-1],
+            "W1": rng.normal(0, np.sqrt(2 / n_features), (n_features, self.hidden)),
+            "b1": np.zeros(self.hidden),
+            "W2": np.zeros((self.hidden, self.horizon)),  # starts exactly at the ridge solution
+        }
+        ridge_loss = self._loss(Xs, T, M, params)
+
+        if self.hidden > 0 and self.epochs > 0:
+            params = self._train(Xs, T, M, params, end_years >= end_years.max() - 1, rng)
+
+        residual = (self._forward(Xs, params)[0] - T) * M
+        self.sigma = np.sqrt((residual ** 2).sum(axis=0) / np.maximum(M.sum(axis=0), 1))
+        self.params = params
+        print(f"🧠 Trained on {len(Xs):,} windows from {len(keys):,} series in {time.perf_counter() - start:.1f}s "
+              f"(log-MSE ridge {ridge_loss:.4f} → {self._loss(Xs, T, M, params):.4f})")
+        return self
+
+    def _loss(self, Xs, T, M, params):
+        return float((((self._forward(Xs, params)[0] - T) * M) ** 2).sum() / M.sum())
+
+    def _train(self, Xs, T, M, params, is_val, rng, beta1=0.9, beta2=0.999, eps=1e-8):
+        """Full-batch Adam on masked MSE, keeping the parameters with the best loss on the latest windows."""
+        val = np.flatnonzero(is_val)
+        train = rng.permutation(np.flatnonzero(~is_val))[:self.max_samples]
+        Xt, Tt, Mt = Xs[train], T[train], M[train]
+        denom = Mt.sum()
+
+        moments = {k: (np.zeros_like(v), np.zeros_like(v)) for k, v in params.items()}
+        best, best_loss = {k: v.copy() for k, v in params.items()}, self._loss(Xs[val], T[val], M[val], params)
+        for step in range(1, self.epochs + 1):
+            out, hidden = self._forward(Xt, params)
+            d = 2 * (out - Tt) * Mt / denom
+            d_hidden = (d @ params["W2"].T) * (hidden > 0)
+            grads = {
+                "Wl": Xt.T @ d, "b": d.sum(axis=0),
+                "W2": hidden.T @ d + self.alpha / denom * params["W2"],
+                "W1": Xt.T @ d_hidden + self.alpha / denom * params["W1"], "b1": d_hidden.sum(axis=0),
+            }
+            for k, g in grads.items():
+                m, v = moments[k]
+                m[:] = beta1 * m + (1 - beta1) * g
+                v[:] = beta2 * v + (1 - beta2) * g ** 2
+                params[k] -= self.learning_rate * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + eps)
+
+            if step % 10 == 0:
+                loss = self._loss(Xs[val], T[val], M[val], params)
+                if loss < best_loss:
+                    best, best_loss = {k: v.copy() for k, v in params.items()}, loss
+        return best
+
+    def _predict(self, windows, crop_codes):
+        """Log-space predictions [n, horizon] for windows of log yields."""
+        X = self._features(windows, crop_codes)
+        return self._forward((X - self.mean) / self.scale, self.params)[0] + windows[:, -1:]
+
+    # =====================
+    # Forecasting
+    # =====================
+    @span("global_forecaster.forecast")
+    def forecast(self, df, periods=None, include_history=False):
+        """
+        Forecasts every (Area, Crop) series in `df` in one vectorized pass.
+
+        Args:
+            df (pd.DataFrame): Yield data with Area, Crop, Year & Yield columns.
+            periods (int, optional): Years ahead (at most `horizon`; defaults to it).
+            include_history (bool): Also return one-step-ahead fitted values for observed years.
+
+        Returns:
+            pd.DataFrame: Area, Crop, Year, yhat, yhat_lower, yhat_upper, is_forecast
+            (the forecast store layout).
+        """
+        periods = self.horizon if periods is None else periods
+        if periods > self.horizon:
+            raise ValueError(f"Trained for {self.horizon} years ahead, asked for {periods}")
+
+        keys, years, Y = to_panel(df)
+        observed = ~np.isnan(Y)
+        keep = observed.sum(axis=1) >= 2  # same minimum history as the Prophet trainer
+        keys, Y, observed = keys[keep].reset_index(drop=True), Y[keep], observed[keep]
+        Z = fill_gaps(np.log1p(Y))
+        n, T = Z.shape
+        crop_codes = self._crop_codes(keys["Crop"])
+
+        # Window ending at each series' last observed year (clamped: short series repeat their first value)
+        last = T - 1 - np.argmax(observed[:, ::-1], axis=1)
+        cols = np.clip(last[:, None] - self.lags + 1 + np.arange(self.lags), 0, None)
+        pred = self._predict(Z[np.arange(n)[:, None], cols], crop_codes)[:, :periods]
+        spread = INTERVAL_Z * self.sigma[:periods]
+
+        frames = [pd.DataFrame({
+            "Area": np.repeat(keys["Area"].to_numpy(), periods),
+            "Crop": np.repeat(keys["Crop"].to_numpy(), periods),
+            "Year": (years[last][:, None] + np.arange(1, periods + 1)).ravel(),
+            "yhat": np.expm1(pred).ravel(),
+            "yhat_lower": np.expm1(pred - spread).ravel(),
+            "yhat_upper": np.expm1(pred + spread).ravel(),
+            "is_forecast": True,
+        })]
+
+        if include_history:
+            # One-step-ahead prediction for every observed year after a series' first
+            first = np.argmax(observed, axis=1)
+            padded = np.concatenate([np.repeat(Z[:, :1], self.lags - 1, axis=1), Z], axis=1)
+            windows = sliding_window_view(padded, self.lags, axis=1)[:, :-1]  # window ending at t-1, per t >= 1
+            series, t = np.nonzero(observed[:, 1:] & (np.arange(1, T)[None, :] > first[:, None]))
+            t = t + 1
+            fitted = self._predict(windows[series, t - 1], crop_codes[series])[:, 0]
+            frames.insert(0, pd.DataFrame({
+                "Area": keys["Area"].to_numpy()[series],
+                "Crop": keys["Crop"].to_numpy()[series],
+                "Year": years[t],
+                "yhat": np.expm1(fitted),
+                "yhat_lower": np.expm1(fitted - INTERVAL_Z * self.sigma[0]),
+                "yhat_upper": np.expm1(fitted + INTERVAL_Z * self.sigma[0]),
+                "is_forecast": False,
+            }))
+
+        out = pd.concat(frames, ignore_index=True)
+        return out.sort_values(["Area", "Crop", "Year"], ignore_index=True)
+
+    def save(self, path=model_file):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load(cls, path=model_file):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the global multi-series yield forecaster.")
+    parser.add_argument("--input", default=yield_file)
+    parser.add_argument("--output", default=model_file)
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--lags", type=int, default=6)
+    parser.add_argument("--epochs", type=int, default=300)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input)
+    df.rename(columns={"Item": "Crop", "hg/ha_yield": "Yield"}, inplace=True)
+
+    model = GlobalForecaster(lags=args.lags, horizon=args.horizon, epochs=args.epochs).fit(df)
+    start = time.perf_counter()
+    forecast = model.forecast(df)
+    print(f"📈 Forecast {forecast.groupby(['Area', 'Crop']).ngroups} series in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    model.save(args.output)
+    print(f"🎉 Saved global forecaster at {args.output}")
+
+
+if __name__ == "__main__":
+    main()
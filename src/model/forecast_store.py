@@ -0,0 +1,173 @@
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.monitoring.instrumentation import span
+
+# --- File paths ---
+yield_file = "data/processed/yield_df.csv"
+store_dir = "data/processed/forecasts"
+
+FORECAST_COLUMNS = ["Area", "Crop", "Year", "yhat", "yhat_lower", "yhat_upper", "is_forecast"]
+
+
+def _forecast_groups(groups, periods):
+    """Worker: forecasts a chunk of (area, crop, frame) groups."""
+    import logging
+    from src.model.prophet_model_trainer import ProphetModelTrainer
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    frames = []
+    for area, crop, group in groups:
+        # Each series is fitted exactly once, so a fresh trainer keeps memory flat
+        forecast = ProphetModelTrainer(cache_size=0).train(group, crop, area, periods=periods)
+        if forecast is None:
+            continue
+        last_year = group["Year"].max()
+        out = pd.DataFrame({
+            "Area": area,
+            "Crop": crop,
+            "Year": forecast["ds"].dt.year.astype("int16"),
+            "yhat": forecast["yhat"].astype("float32"),
+            "yhat_lower": forecast["yhat_lower"].astype("float32"),
+            "yhat_upper": forecast["yhat_upper"].astype("float32"),
+        })
+        out["is_forecast"] = out["Year"] > last_year
+        frames.append(out)
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+
+def _prophet_forecasts(df, periods, workers, chunk_size):
+    """One Prophet fit per (Area, Crop) series, spread over a process pool."""
+    groups = [(area, crop, group[["Area", "Crop", "Year", "Yield"]])
+              for (area, crop), group in df.groupby(["Area", "Crop"], sort=True)]
+    chunks = [groups[i:i + chunk_size] for i in range(0, len(groups), chunk_size)]
+
+    frames = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i, frame in enumerate(pool.map(_forecast_groups, chunks, [periods] * len(chunks)), 1):
+            if frame is not None:
+                frames.append(frame)
+            print(f"   {min(i * chunk_size, len(groups))}/{len(groups)} series forecast")
+    return pd.concat(frames, ignore_index=True)
+
+
+def _global_forecasts(df, periods):
+    """One GlobalForecaster trained on all series, forecasting them in a single pass."""
+    from src.model.deep_learning_forecaster import GlobalForecaster
+
+    result = GlobalForecaster(horizon=periods).fit(df).forecast(df, include_history=True)
+    return result.astype({"Year": "int16", "yhat": "float32", "yhat_lower": "float32", "yhat_upper": "float32"})
+
+
+@span("forecast_store.build")
+def build_forecast_store(df, output_dir=store_dir, periods=5, workers=None, chunk_size=16, method="prophet"):
+    """
+    Forecasts every (Area, Crop) series and writes a Parquet dataset partitioned by crop.
+
+    Args:
+        df (pd.DataFrame): Yield data with Area, Crop, Year & Yield columns.
+        output_dir (str): Dataset directory (replaced on every build).
+        periods (int): Forecast horizon in years.
+        workers (int, optional): Process count for Prophet (defaults to os.cpu_count()).
+        chunk_size (int): Series per Prophet worker task.
+        method (str): "prophet" (one model per series) or "global" (one model for all series).
+
+    Returns:
+        int: Number of series written.
+    """
+    if method == "global":
+        result = _global_forecasts(df, periods)
+    else:
+        result = _prophet_forecasts(df, periods, workers, chunk_size)
+    result = result[FORECAST_COLUMNS]
+
+    # Write to a sibling directory, then swap, so readers never see a half-written store
+    tmp_dir = f"{output_dir.rstrip(os.sep)}.tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    pq.write_to_dataset(pa.Table.from_pandas(result, preserve_index=False), tmp_dir, partition_cols=["Crop"])
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.replace(tmp_dir, output_dir)
+
+    return result.groupby(["Area", "Crop"]).ngroups
+
+
+class ForecastStore:
+    """
+    Read side of the precomputed forecast dataset.
+
+    A crop's partition is read once on first use and indexed by area, so each
+    dashboard lookup afterwards is a dict access.
+    """
+
+    def __init__(self, path=store_dir):
+        self.path = path
+        self._by_crop = {}
+
+    def available(self):
+        return os.path.isdir(self.path)
+
+    @staticmethod
+    def _index_by_area(frame):
+        frame["Area"] = frame["Area"].astype(str)
+        return {area: group.drop(columns="Area").reset_index(drop=True)
+                for area, group in frame.groupby("Area", sort=False)}
+
+    def _load_crop(self, crop):
+        table = pq.read_table(self.path, filters=[("Crop", "=", crop)],
+                              columns=["Area", "Year", "yhat", "yhat_lower", "yhat_upper", "is_forecast"])
+        return self._index_by_area(table.to_pandas())
+
+    def preload(self):
+        """Reads every partition up front so no lookup pays a Parquet read."""
+        if not self.available():
+            return self
+        frame = pq.read_table(self.path).to_pandas()
+        frame["Crop"] = frame["Crop"].astype(str)
+        for crop, group in frame.groupby("Crop", sort=False):
+            self._by_crop[crop] = self._index_by_area(group.drop(columns="Crop"))
+        return self
+
+    def lookup(self, area, crop):
+        """
+        Forecast frame for one series.
+
+        Returns:
+            pd.DataFrame: Year, yhat, yhat_lower, yhat_upper, is_forecast; None if unknown.
+        """
+        if crop not in self._by_crop:
+            if not self.available():
+                return None
+            self._by_crop[crop] = self._load_crop(crop)
+        return self._by_crop[crop].get(area)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute forecasts for every (Area, Crop).")
+    parser.add_argument("--input", default=yield_file)
+    parser.add_argument("--output", default=store_dir)
+    parser.add_argument("--periods", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--method", choices=["prophet", "global"], default="prophet",
+                        help="Per-series Prophet, or the global multi-series forecaster (seconds, not minutes)")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input)
+    df.rename(columns={"Item": "Crop", "hg/ha_yield": "Yield"}, inplace=True)
+
+    print(f"📂 Forecasting {df.groupby(['Area', 'Crop']).ngroups} series from {args.input}...")
+    start = time.perf_counter()
+    n_series = build_forecast_store(df, args.output, periods=args.periods, workers=args.workers, method=args.method)
+    print(f"💾 Saved forecasts for {n_series} series to {args.output} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
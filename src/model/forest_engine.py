@@ -0,0 +1,246 @@
+import joblib
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional, the NumPy evaluator is always available
+    njit = None
+
+# Rows evaluated per NumPy traversal block (bounds the trees x rows index arrays)
+CHUNK_ROWS = 4096
+
+
+class ForestEngine:
+    """
+    Array-backed evaluator for a trained RandomForestClassifier.
+
+    All trees are flattened into contiguous node arrays (feature, threshold,
+    children, leaf class distribution) and evaluated for a whole batch at once,
+    instead of going through sklearn's per-tree Python dispatch. The
+    StandardScaler used at training time is stored with the arrays and applied
+    inside the engine, so callers pass raw feature rows.
+
+    Predictions are bit-identical to sklearn: inputs are scaled in float64 and
+    cast to float32 before comparison, and tree probabilities are accumulated
+    in tree order, exactly as `RandomForestClassifier.predict_proba` does.
+    """
+
+    def __init__(self, feature, threshold, left, right, values, roots, max_depth,
+                 classes, mean=None, scale=None, features=None, cover=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.values = values
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.mean = mean
+        self.scale = scale
+        self.features = list(features) if features is not None else None
+        self.cover = cover  # training samples reaching each node (TreeSHAP); None in older exports
+        self.n_features_in_ = int(feature.max()) + 1 if mean is None else len(mean)
+
+    # =====================
+    # Export
+    # =====================
+    @classmethod
+    def from_sklearn(cls, model, scaler=None, features=None):
+        """
+        Flattens a fitted RandomForestClassifier (and optional StandardScaler).
+
+        Args:
+            model (RandomForestClassifier): Single-output fitted forest.
+            scaler (StandardScaler, optional): Scaler applied before the forest.
+            features (list, optional): Feature names in column order.
+
+        Returns:
+            ForestEngine: Engine holding the flattened node arrays.
+        """
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be exported.")
+
+        features_, thresholds, lefts, rights, values, roots, covers = [], [], [], [], [], [], []
+        offset, max_depth = 0, 0
+        for est in model.estimators_:
+            tree = est.tree_
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(tree.node_count)
+
+            # Leaves point at themselves so every row can take max_depth steps blindly
+            features_.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+            covers.append(tree.weighted_n_node_samples.astype(np.float64))
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features_),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.int64),
+            right=np.concatenate(rights).astype(np.int64),
+            values=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            classes=np.asarray(model.classes_),
+            mean=np.asarray(scaler.mean_, dtype=np.float64) if scaler is not None and scaler.with_mean else None,
+            scale=np.asarray(scaler.scale_, dtype=np.float64) if scaler is not None and scaler.with_std else None,
+            features=features,
+            cover=np.concatenate(covers),
+        )
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        """Builds an engine from the {"model", "scaler", "features"} dict saved by train_recommender."""
+        return cls.from_sklearn(bundle["model"], bundle.get("scaler"), bundle.get("features"))
+
+    def save(self, path):
+        """Writes the node arrays to an uncompressed .npz file."""
+        arrays = dict(feature=self.feature, threshold=self.threshold, left=self.left,
+                      right=self.right, values=self.values, roots=self.roots,
+                      max_depth=np.asarray(self.max_depth), classes=self.classes_.astype(str))
+        if self.mean is not None:
+            arrays.update(mean=self.mean)
+        if self.scale is not None:
+            arrays.update(scale=self.scale)
+        if self.features is not None:
+            arrays.update(features=np.asarray(self.features, dtype=str))
+        if self.cover is not None:
+            arrays.update(cover=self.cover)
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Loads an engine written by `save` (no pickle involved)."""
+        with np.load(path, allow_pickle=False) as npz:
+            return cls(
+                feature=npz["feature"], threshold=npz["threshold"], left=npz["left"],
+                right=npz["right"], values=npz["values"], roots=npz["roots"],
+                max_depth=int(npz["max_depth"]), classes=npz["classes"].astype(object),
+                mean=npz["mean"] if "mean" in npz else None,
+                scale=npz["scale"] if "scale" in npz else None,
+                features=npz["features"].tolist() if "features" in npz else None,
+                cover=npz["cover"] if "cover" in npz else None,
+            )
+
+    def to_shap_trees(self):
+        """
+        The forest in shap's dict-of-trees format (sklearn-style -1 leaf children).
+
+        Leaf values are pre-divided by the tree count, so the ensemble output
+        is the averaged class probability, as in `predict_proba`.
+        """
+        if self.cover is None:
+            raise ValueError("This engine was exported without node covers; re-export it to explain predictions.")
+        trees = []
+        bounds = list(self.roots) + [len(self.feature)]
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            nodes = np.arange(start, stop)
+            is_leaf = self.left[start:stop] == nodes
+            left = np.where(is_leaf, -1, self.left[start:stop] - start)
+            trees.append({
+                "children_left": left,
+                "children_right": np.where(is_leaf, -1, self.right[start:stop] - start),
+                "children_default": left,
+                "features": np.where(is_leaf, -2, self.feature[start:stop]),
+                "thresholds": np.where(is_leaf, -2.0, self.threshold[start:stop]),
+                "values": self.values[start:stop] / len(self.roots),
+                "node_sample_weight": self.cover[start:stop],
+            })
+        return {"trees": trees, "base_offset": 0.0, "tree_output": "probability",
+                "objective": "squared_error", "input_dtype": np.float32, "internal_dtype": np.float64}
+
+    # =====================
+    # Inference
+    # =====================
+    def transform(self, X):
+        """Applies the stored scaler and casts to float32 like sklearn's tree input check."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.mean is not None:
+            X = X - self.mean
+        if self.scale is not None:
+            X = X / self.scale
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _leaves(self, Xs):
+        """Leaf node index reached in every tree, shape (n_trees, n_rows)."""
+        rows = np.arange(len(Xs))[None, :]
+        nodes = np.repeat(self.roots[:, None], len(Xs), axis=1)
+        for _ in range(self.max_depth):
+            go_left = Xs[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def _predict_proba_numpy(self, Xs):
+        proba = np.empty((len(Xs), self.values.shape[1]), dtype=np.float64)
+        for start in range(0, len(Xs), CHUNK_ROWS):
+            leaves = self._leaves(Xs[start:start + CHUNK_ROWS])
+            block = np.zeros((leaves.shape[1], self.values.shape[1]), dtype=np.float64)
+            for tree_leaves in leaves:  # tree order, matching sklearn's accumulation
+                block += self.values[tree_leaves]
+            proba[start:start + CHUNK_ROWS] = block
+        return proba / len(self.roots)
+
+    def predict_proba(self, X, backend="auto"):
+        """
+        Class probabilities for a batch of raw feature rows.
+
+        Args:
+            X (array-like): Raw (unscaled) features, shape (n_rows, n_features).
+            backend (str): "numpy", "numba" or "auto" (numba when installed).
+
+        Returns:
+            np.ndarray: Probabilities, shape (n_rows, n_classes).
+        """
+        Xs = self.transform(X)
+        if backend == "numba" or (backend == "auto" and njit is not None):
+            if njit is None:
+                raise ImportError("numba is not installed; use backend='numpy'.")
+            return _predict_proba_numba(Xs, self.feature, self.threshold, self.left, self.right,
+                                        self.values, self.roots) / len(self.roots)
+        return self._predict_proba_numpy(Xs)
+
+    def predict(self, X, backend="auto"):
+        """Most probable crop per row."""
+        return self.classes_.take(np.argmax(self.predict_proba(X, backend=backend), axis=1))
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _predict_proba_numba(Xs, feature, threshold, left, right, values, roots):
+        n_rows, n_classes = Xs.shape[0], values.shape[1]
+        proba = np.zeros((n_rows, n_classes))
+        for i in prange(n_rows):
+            for t in range(roots.shape[0]):
+                node = roots[t]
+                while left[node] != node:
+                    if Xs[i, feature[node]] <= threshold[node]:
+                        node = left[node]
+                    else:
+                        node = right[node]
+                for c in range(n_classes):
+                    proba[i, c] += values[node, c]
+        return proba
+
+
+def load_recommender(path):
+    """
+    Loads a recommender for inference: a ForestEngine for `.npz` exports,
+    otherwise whatever was pickled (estimator or training bundle).
+    """
+    if str(path).endswith(".npz"):
+        return ForestEngine.load(path)
+    return joblib.load(path)
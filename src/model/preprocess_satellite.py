@@ -1,12 +1,15 @@
 import pandas as pd
 import os
 
+from src.data_preprocessing.spatiotemporal_join import DATE_COLUMN, add_year
+from src.data_preprocessing.streaming import aggregate_file
+
 # Paths
 sat_file = "data/satellite_data/crop_health_env_stress.csv"
 processed_file = "data/satellite_data/processed_satellite.csv"
 
-# Load satellite data
-sat_df = pd.read_csv(sat_file)
+# Peek at the satellite data (the full file is streamed in chunks below)
+sat_df = pd.read_csv(sat_file, nrows=5)
 print("Columns:", list(sat_df.columns))
 print("Sample data:\n", sat_df.head())
 
@@ -21,16 +24,16 @@ for col in required_cols:
     if col not in sat_df.columns:
         raise ValueError(f"❌ Column '{col}' not found in satellite dataset!")
 
-sat_df = sat_df[required_cols]
+# Keep the finest keys the export has (Area, Year or a Date) so yields can be joined
+# by (Area, Crop, Year) instead of one broadcast mean per crop
+key_cols = ['Crop_Type'] + [c for c in ('Area', 'Year') if c in sat_df.columns]
+extra_cols = [c for c in ('Area', 'Year', DATE_COLUMN) if c in sat_df.columns]
+if DATE_COLUMN in sat_df.columns and 'Year' not in key_cols:
+    key_cols.append('Year')
 
-# Aggregate by crop type (mean values)
-sat_agg = sat_df.groupby('Crop_Type').agg({
-    'NDVI': 'mean',
-    'Temperature': 'mean',
-    'Rainfall': 'mean',
-    'Humidity': 'mean',
-    'Soil_Moisture': 'mean'
-}).reset_index()
+# Aggregate by those keys (mean values), chunk by chunk with bounded memory
+sat_agg = aggregate_file(sat_file, key_cols, value_cols=required_cols[1:],
+                         usecols=required_cols + extra_cols, prepare=add_year).result()
 
 # Save processed satellite data
 os.makedirs(os.path.dirname(processed_file), exist_ok=True)
@@ -1,76 +1,191 @@
+import logging
+from collections import OrderedDict
+
 import pandas as pd
 from prophet import Prophet
 import plotly.express as px
 
+logger = logging.getLogger(__name__)
+
+PROPHET_PARAMS = {"yearly_seasonality": True, "daily_seasonality": False, "weekly_seasonality": False}
+
+
+def stan_init(model):
+    """
+    Extracts fitted parameters from a Prophet model to warm-start another fit.
+
+    Args:
+        model (Prophet): A fitted model.
+
+    Returns:
+        dict: Initial values for k, m, sigma_obs, delta and beta.
+    """
+    res = {}
+    for pname in ["k", "m", "sigma_obs"]:
+        res[pname] = model.params[pname][0][0]
+    for pname in ["delta", "beta"]:
+        res[pname] = model.params[pname][0]
+    return res
+
+
+def n_changepoints(data):
+    """Number of changepoints Prophet will fit on `data` (fewer than the default for short series)."""
+    return len(Prophet(**PROPHET_PARAMS).preprocess(data).t_change)
+
+
 class ProphetModelTrainer:
     """
     Wrapper class for training and forecasting crop yields using Facebook Prophet.
+
+    Models are kept per group key (area, crop) so forecasts for different
+    countries are not pooled together. When a group's data changes (e.g. new
+    years are appended) the previous fit is used as a warm start, and forecast
+    frames are cached by (area, crop, horizon, data version) so repeated calls
+    skip Prophet entirely. Both are LRUs, so a long-running process holds at
+    most `model_cache_size` fitted models (a group evicted from it refits cold).
     """
 
-    def __init__(self):
-        """Initialize the Prophet forecaster with default parameters."""
+    def __init__(self, cache_size=256, model_cache_size=64):
+        """
+        Initialize the Prophet forecaster with default parameters.
+
+        Args:
+            cache_size (int): Maximum number of forecast frames kept in memory.
+            model_cache_size (int): Maximum number of fitted models kept for warm starts.
+        """
         self.model = None
         self.forecast = None
+        self.cache_size = cache_size
+        self.model_cache_size = model_cache_size
+        self._models = OrderedDict()      # group key -> (data version, fitted Prophet)
+        self._forecasts = OrderedDict()   # (area, crop, periods, data version) -> forecast frame
 
-    def prepare_data(self, df, crop_name):
+    @staticmethod
+    def group_key(crop_name, area=None):
+        """Group key used for models and caches; area=None pools all countries."""
+        return (area, crop_name)
+
+    def prepare_data(self, df, crop_name, area=None):
         """
         Prepares crop-specific data for Prophet.
-        
+
         Args:
             df (pd.DataFrame): Dataset with Year & Yield columns.
             crop_name (str): Crop name to filter.
-        
+            area (str, optional): Country to filter; all countries when None.
+
         Returns:
             pd.DataFrame: Data formatted for Prophet.
         """
-        crop_df = df[df["Crop"] == crop_name][["Year", "Yield"]].dropna()
+        mask = df["Crop"] == crop_name
+        if area is not None:
+            mask &= df["Area"] == area
+        crop_df = df.loc[mask, ["Year", "Yield"]].dropna()
         if crop_df.empty:
             return pd.DataFrame(columns=["ds", "y"])
 
         # Prophet expects 'ds' as datetime and 'y' as target
         crop_df = crop_df.rename(columns={"Year": "ds", "Yield": "y"})
         crop_df["ds"] = pd.to_datetime(crop_df["ds"], format="%Y")
-        return crop_df
+        return crop_df.sort_values("ds").reset_index(drop=True)
+
+    @staticmethod
+    def data_version(data):
+        """Content hash of a prepared (ds, y) frame."""
+        return int(pd.util.hash_pandas_object(data, index=False).sum())
+
+    def _remember(self, key, version, model):
+        self._models[key] = (version, model)
+        self._models.move_to_end(key)
+        while len(self._models) > self.model_cache_size:
+            self._models.popitem(last=False)
+
+    def _fit(self, key, data, version):
+        """Fits a model for `key`, warm-starting from the group's previous fit when there is one."""
+        previous = self._models.get(key)
+        if previous is not None and previous[0] == version:
+            self._models.move_to_end(key)
+            return previous[1]
+
+        model = Prophet(**PROPHET_PARAMS)
+        # Warm start only when the new fit has as many changepoints as the previous one
+        # (Prophet lowers the count for short histories, so it grows with the data)
+        if previous is not None and len(previous[1].params["delta"][0]) == n_changepoints(data):
+            try:
+                model.fit(data, init=stan_init(previous[1]))
+                self._remember(key, version, model)
+                return model
+            except Exception as e:  # fall back to a cold fit
+                logger.info("Warm start failed for %s, refitting from scratch: %s", key, e)
+                model = Prophet(**PROPHET_PARAMS)
+
+        model.fit(data)
+        self._remember(key, version, model)
+        return model
+
+    def _forecast(self, df, crop_name, area=None, periods=5):
+        """Returns (prepared data, forecast frame), using the forecast cache when possible."""
+        data = self.prepare_data(df, crop_name, area)
+        if len(data) < 2:
+            return data, None
+
+        key = self.group_key(crop_name, area)
+        version = self.data_version(data)
+        cache_key = (area, crop_name, periods, version)
+
+        forecast = self._forecasts.get(cache_key)
+        if forecast is not None:
+            self._forecasts.move_to_end(cache_key)
+            # The fitted model may already be evicted; the cached forecast does not need it
+            model = self._models.get(key, (None, None))[1]
+        else:
+            model = self._fit(key, data, version)
+            # Create future dataframe (yearly steps, aligned with the Jan-1 history dates)
+            future = model.make_future_dataframe(periods=periods, freq="YS")
+            forecast = model.predict(future)
+            self._forecasts[cache_key] = forecast
+            if len(self._forecasts) > self.cache_size:
+                self._forecasts.popitem(last=False)
 
-    def train(self, df, crop_name):
+        self.model = model
+        self.forecast = forecast
+        return data, forecast
+
+    def train(self, df, crop_name, area=None, periods=5):
         """
         Trains a Prophet model on historical crop yield data.
-        
+
         Args:
             df (pd.DataFrame): Input dataset with Year & Yield.
             crop_name (str): Crop to forecast.
-        """
-        data = self.prepare_data(df, crop_name)
-        if data.empty:
-            return None
+            area (str, optional): Country to forecast; all countries when None.
+            periods (int): Number of years to forecast.
 
-        self.model = Prophet(yearly_seasonality=True, daily_seasonality=False, weekly_seasonality=False)
-        self.model.fit(data)
-
-        # Create future dataframe (next 5 years)
-        future = self.model.make_future_dataframe(periods=5, freq="Y")
-        self.forecast = self.model.predict(future)
-        return self.forecast
+        Returns:
+            pd.DataFrame: Prophet forecast frame, or None when there is no data.
+        """
+        return self._forecast(df, crop_name, area, periods)[1]
 
-    def forecast_crop(self, df, crop_name):
+    def forecast_crop(self, df, crop_name, area=None, periods=5):
         """
         Generates a forecast figure for the given crop.
-        
+
         Args:
             df (pd.DataFrame): Dataset with Year & Yield.
             crop_name (str): Crop to forecast.
-        
+            area (str, optional): Country to forecast; all countries when None.
+            periods (int): Number of years to forecast.
+
         Returns:
             plotly.graph_objects.Figure: Forecast visualization.
         """
-        forecast = self.train(df, crop_name)
+        label = crop_name if area is None else f"{crop_name} ({area})"
+        data, forecast = self._forecast(df, crop_name, area, periods)
         if forecast is None:
-            return px.line(title=f"No forecast available for {crop_name}")
+            return px.line(title=f"No forecast available for {label}")
 
         # Merge actual + forecast
-        data = self.prepare_data(df, crop_name)
-
-        fig = px.line(forecast, x="ds", y="yhat", title=f"📈 Forecasted Yield for {crop_name}")
+        fig = px.line(forecast, x="ds", y="yhat", title=f"📈 Forecasted Yield for {label}")
         fig.add_scatter(x=data["ds"], y=data["y"], mode="markers+lines",
                         name="Actual Yield", line=dict(width=3))
         fig.update_layout(template="plotly_dark", height=250, margin=dict(l=30, r=30, t=30, b=30))
@@ -0,0 +1,250 @@
+import argparse
+import math
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+from src.data_preprocessing.data_preprocessing import load_processed_data
+from src.monitoring.instrumentation import span
+
+data_file = "data/processed/processed_data.csv"
+engine_file = "model/saved_models/recommendation_engine.pkl"
+
+# Location-level conditions the yield model may use (whichever the dataset has)
+CONDITION_FEATURES = [
+    "average_rain_fall_mm_per_year", "pesticides_tonnes", "avg_temp",
+    "NDVI_sat", "Temperature_sat", "Rainfall_sat", "Humidity", "Soil_Moisture", "NDVI_raster",
+]
+
+# HistGradientBoosting's limit on categories per native categorical feature
+MAX_CATEGORIES = 255
+
+# Exact Shapley values predict 2^n coalitions; 12 conditions is 4096 rows
+MAX_EXACT_FEATURES = 12
+
+
+class RecommendationEngine:
+    """
+    Ranks crops for a location by expected yield.
+
+    A gradient-boosted regressor learns log yield from (Area, Crop, Year,
+    conditions), with Area and Crop as native categorical features (beyond
+    MAX_CATEGORIES areas, Area becomes its mean log-yield residual). Ranking an
+    area builds one row per candidate crop and scores them in a single
+    predict call; `precompute()` does that for every area at once so the
+    dashboard only does a dict lookup.
+    """
+
+    area_effect = None  # per-area encoding when there are too many areas to be categorical
+
+    def __init__(self, model, areas, crops, conditions, area_conditions, area_crops, crop_means):
+        self.model = model
+        self.areas = list(areas)
+        self.crops = list(crops)
+        self.conditions = list(conditions)
+        self.area_conditions = area_conditions  # Area -> (latest Year, condition values)
+        self.area_crops = area_crops            # Area -> crops grown there
+        self.crop_means = crop_means            # Crop -> mean observed yield
+        self._cache = {}
+
+    @classmethod
+    @span("recommendation_engine.fit")
+    def fit(cls, df, max_iter=300, random_state=42):
+        """
+        Args:
+            df (pd.DataFrame): Processed dataset with Area, Crop, Year, Yield and condition columns.
+
+        Returns:
+            RecommendationEngine: Fitted engine.
+        """
+        df = df.dropna(subset=["Area", "Crop", "Year", "Yield"])
+        conditions = [c for c in CONDITION_FEATURES if c in df.columns]
+        areas = sorted(df["Area"].astype(str).unique())
+        crops = sorted(df["Crop"].astype(str).unique())
+
+        engine = cls(None, areas, crops, conditions, {}, {}, {})
+        target = np.log1p(df["Yield"].to_numpy(dtype=np.float64))
+        if len(areas) > MAX_CATEGORIES:
+            # How far an area's log yields sit above each crop's mean, averaged per area
+            residual = target - pd.Series(target).groupby(df["Crop"].astype(str).to_numpy()).transform("mean")
+            effect = residual.groupby(df["Area"].astype(str).to_numpy()).mean()
+            engine.area_effect = effect.reindex(areas).to_numpy(dtype=np.float64)
+        X = engine._matrix(df["Area"].astype(str), df["Crop"].astype(str), df["Year"], df[conditions])
+        categorical = [1] if engine.area_effect is not None else [0, 1]
+        model = HistGradientBoostingRegressor(max_iter=max_iter, categorical_features=categorical,
+                                              random_state=random_state)
+        model.fit(X, target)
+        engine.model = model
+
+        # Default conditions of an area: its most recent year's (mean) values
+        latest = df[df["Year"] == df.groupby("Area", observed=True)["Year"].transform("max")]
+        per_area = latest.groupby("Area", observed=True).agg({"Year": "max", **{c: "mean" for c in conditions}})
+        engine.area_conditions = {str(a): (int(r["Year"]), r[conditions].to_numpy(dtype=np.float64))
+                                  for a, r in per_area.iterrows()}
+        engine.area_crops = {str(a): sorted(g.astype(str).unique())
+                             for a, g in df.groupby("Area", observed=True)["Crop"]}
+        engine.crop_means = df.groupby("Crop", observed=True)["Yield"].mean().rename(index=str).to_dict()
+        return engine
+
+    def _matrix(self, areas, crops, years, conditions):
+        """Float feature matrix; unknown areas/crops become NaN (missing) categories."""
+        area_codes = pd.Categorical(areas, categories=self.areas).codes.astype(np.float64)
+        crop_codes = pd.Categorical(crops, categories=self.crops).codes.astype(np.float64)
+        area_codes[area_codes < 0] = np.nan
+        crop_codes[crop_codes < 0] = np.nan
+        if self.area_effect is not None:
+            known = ~np.isnan(area_codes)
+            area_codes[known] = self.area_effect[area_codes[known].astype(np.int64)]
+        cond = np.asarray(conditions, dtype=np.float64).reshape(len(area_codes), len(self.conditions))
+        return np.column_stack([area_codes, crop_codes, np.asarray(years, dtype=np.float64), cond])
+
+    def _candidates(self, area, candidates):
+        if candidates == "grown" and area in self.area_crops:
+            return self.area_crops[area]
+        return self.crops
+
+    def rank(self, area, conditions=None, year=None, candidates="grown", top_k=None):
+        """
+        Expected yield of every candidate crop for one area, best first.
+
+        Args:
+            area (str): Country / region.
+            conditions (dict, optional): Overrides of the area's latest conditions, e.g. {"avg_temp": 21.5}.
+            year (int, optional): Year to predict for (area's latest year by default).
+            candidates (str): "grown" (crops the area has grown) or "all".
+            top_k (int, optional): Keep only the best k.
+
+        Returns:
+            pd.DataFrame: Crop, expected_yield and relative_yield (vs the crop's global mean).
+        """
+        cache_key = (area, candidates) if conditions is None and year is None else None
+        if cache_key in self._cache:
+            ranked = self._cache[cache_key]
+            return ranked if top_k is None else ranked.head(top_k)
+
+        default_year, values = self.area_conditions.get(area, (None, None))
+        if values is None:  # unseen area: only caller-supplied conditions are known
+            default_year = max(y for y, _ in self.area_conditions.values())
+            values = np.full(len(self.conditions), np.nan)
+        values = values.copy()
+        for name, value in (conditions or {}).items():
+            if name in self.conditions:
+                values[self.conditions.index(name)] = value
+
+        crops = self._candidates(area, candidates)
+        n = len(crops)
+        X = self._matrix([area] * n, crops, [year or default_year] * n, np.tile(values, (n, 1)))
+        expected = np.expm1(self.model.predict(X))
+        ranked = pd.DataFrame({
+            "Crop": crops,
+            "expected_yield": expected,
+            "relative_yield": expected / np.array([self.crop_means.get(c, np.nan) for c in crops]),
+        }).sort_values("expected_yield", ascending=False, ignore_index=True)
+
+        if cache_key is not None:
+            self._cache[cache_key] = ranked
+        return ranked if top_k is None else ranked.head(top_k)
+
+    def explain(self, area, crop):
+        """
+        How each condition moves `crop`'s expected yield in `area` away from a typical area's.
+
+        Exact Shapley values over the condition features, against the mean
+        conditions of all areas (Area, Crop and Year held fixed), computed from
+        one predict over every coalition (2^n_conditions rows, 512 for the full
+        feature set). Contributions sum to the log-yield difference between
+        the area's conditions and the baseline. shap's TreeExplainer is not
+        used here because it reads the model's native categorical splits as
+        numeric thresholds.
+
+        Returns:
+            pd.DataFrame: feature, value, baseline, contribution (log yield) and
+            effect (multiplicative, 0.12 = +12%), largest first; empty for unknown areas.
+
+        Raises:
+            ValueError: The engine has more than MAX_EXACT_FEATURES conditions.
+        """
+        if len(self.conditions) > MAX_EXACT_FEATURES:
+            raise ValueError(f"Exact Shapley values over {len(self.conditions)} conditions "
+                             f"exceed MAX_EXACT_FEATURES={MAX_EXACT_FEATURES}")
+        if area not in self.area_conditions or not self.conditions:
+            return pd.DataFrame(columns=["feature", "value", "baseline", "contribution", "effect"])
+        year, values = self.area_conditions[area]
+        known = np.stack([v for _, v in self.area_conditions.values()])
+        baseline = np.nanmean(known, axis=0) if not np.isnan(known).all() else np.zeros(len(self.conditions))
+        values = np.where(np.isnan(values), baseline, values)
+
+        n = len(self.conditions)
+        coalitions = np.arange(2 ** n)
+        present = (coalitions[:, None] >> np.arange(n)) & 1
+        rows = np.where(present == 1, values, baseline)
+        payoff = self.model.predict(self._matrix([area] * len(rows), [crop] * len(rows), [year] * len(rows), rows))
+
+        # phi_i = sum over coalitions S without i of |S|!(n-|S|-1)!/n! * (v(S + i) - v(S))
+        size = present.sum(axis=1)
+        weight = np.array([math.factorial(s) * math.factorial(n - s - 1) / math.factorial(n) if s < n else 0.0
+                           for s in range(n + 1)])[size]
+        contribution = np.array([((payoff[coalitions | (1 << i)] - payoff) * weight * (present[:, i] == 0)).sum()
+                                 for i in range(n)])
+        return pd.DataFrame({
+            "feature": self.conditions, "value": values, "baseline": baseline,
+            "contribution": contribution, "effect": np.expm1(contribution),
+        }).sort_values("contribution", key=np.abs, ascending=False, ignore_index=True)
+
+    def precompute(self, candidates="grown"):
+        """Ranks every known area in one predict call and fills the per-area cache."""
+        start = time.perf_counter()
+        rows = [(area, crop) for area in self.areas for crop in self._candidates(area, candidates)]
+        areas = [a for a, _ in rows]
+        crops = [c for _, c in rows]
+        years = [self.area_conditions[a][0] for a in areas]
+        conditions = np.stack([self.area_conditions[a][1] for a in areas]) if rows else np.empty((0, 0))
+        expected = np.expm1(self.model.predict(self._matrix(areas, crops, years, conditions)))
+
+        scored = pd.DataFrame({"Area": areas, "Crop": crops, "expected_yield": expected})
+        scored["relative_yield"] = expected / scored["Crop"].map(self.crop_means).to_numpy(dtype=np.float64)
+        scored = scored.sort_values(["Area", "expected_yield"], ascending=[True, False], kind="mergesort")
+        for area, ranked in scored.groupby("Area", sort=False):
+            self._cache[(area, candidates)] = ranked.drop(columns="Area").reset_index(drop=True)
+        print(f"🌱 Ranked crops for {len(self.areas)} areas in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return self
+
+    def save(self, path=engine_file):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        cache, self._cache = self._cache, {}
+        try:
+            with open(path, "wb") as f:
+                pickle.dump(self, f)
+        finally:
+            self._cache = cache
+
+    @classmethod
+    def load(cls, path=engine_file):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the per-area crop recommendation engine.")
+    parser.add_argument("--input", default=data_file)
+    parser.add_argument("--output", default=engine_file)
+    args = parser.parse_args()
+
+    df = load_processed_data(args.input)
+    if "Crop" not in df.columns:
+        df = df.rename(columns={"Item": "Crop", "hg/ha_yield": "Yield"})
+
+    start = time.perf_counter()
+    engine = RecommendationEngine.fit(df)
+    print(f"✅ Trained on {len(df)} rows, {len(engine.areas)} areas, {len(engine.crops)} crops "
+          f"({time.perf_counter() - start:.1f}s)")
+    engine.save(args.output)
+    print(f"🎉 Saved recommendation engine at {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.model.recommendation_engine import RecommendationEngine, engine_file
+from src.monitoring.instrumentation import span
+
+# --- File paths ---
+scenario_dir = "data/processed/scenarios"
+
+# Environmental features a scenario may perturb (whichever the engine was trained on)
+SCENARIO_FEATURES = [
+    "Rainfall_sat", "Temperature_sat", "NDVI_sat", "Soil_Moisture", "avg_temp", "average_rain_fall_mm_per_year",
+    "NDVI_raster",
+]
+
+# Shorthands that perturb every column measuring the same quantity
+FEATURE_GROUPS = {
+    "rainfall": ["average_rain_fall_mm_per_year", "Rainfall_sat"],
+    "temperature": ["avg_temp", "Temperature_sat"],
+    "ndvi": ["NDVI_sat", "NDVI_raster"],
+    "soil_moisture": ["Soil_Moisture"],
+}
+
+SCENARIO_SCHEMA = pa.schema([("Area", pa.string()), ("Crop", pa.string()), ("expected_yield", pa.float32())])
+
+
+def parse_scenario(text):
+    """
+    Parses "rainfall=-20%, temperature=+1.5" (percent scales, plain numbers shift) into perturbations.
+
+    Returns:
+        dict: Feature -> (scale, shift); empty for the baseline ("" or "baseline").
+    """
+    scenario = {}
+    text = text.strip()
+    if text in ("", "baseline"):
+        return scenario
+    for term in text.split(","):
+        match = re.fullmatch(r"\s*([A-Za-z_]+)\s*=\s*([+-]?\d+(?:\.\d+)?)\s*(%?)\s*", term)
+        if match is None:
+            raise ValueError(f"Invalid scenario term {term!r}; expected e.g. 'rainfall=-20%' or 'avg_temp=+1.5'")
+        name, amount, percent = match.group(1), float(match.group(2)), match.group(3)
+        features = FEATURE_GROUPS.get(name.lower(), [name])
+        for feature in features:
+            if feature not in SCENARIO_FEATURES:
+                raise ValueError(f"Unknown scenario feature {feature!r}; choose from "
+                                 f"{sorted(FEATURE_GROUPS) + SCENARIO_FEATURES}")
+            scale, shift = scenario.get(feature, (1.0, 0.0))
+            scenario[feature] = (scale * (1 + amount / 100), shift) if percent else (scale, shift + amount)
+    return scenario
+
+
+def _init_worker(model):
+    """Worker: keeps the model for every chunk it scores, one BLAS/OpenMP thread per process."""
+    global _worker_model
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(1)
+    _worker_model = model
+
+
+def _score_chunk(X):
+    """Worker: expected yields of one chunk of grid rows."""
+    return np.expm1(_worker_model.predict(X)).astype(np.float32)
+
+
+class ScenarioEngine:
+    """What-if climate scenarios over every (Area, Crop) at once, cached per scenario and model in Parquet."""
+
+    def __init__(self, engine, cache_dir=scenario_dir, candidates="grown", chunk_size=100_000, workers=None,
+                 memory_size=32, parallel_rows=1_000_000):
+        """
+        Args:
+            engine (RecommendationEngine): Fitted expected-yield model.
+            cache_dir (str): Directory of per-scenario Parquet results.
+            candidates (str): "grown" (crops each area has grown) or "all".
+            chunk_size (int): Grid rows per predict call.
+            workers (int, optional): Processes for large grids (defaults to os.cpu_count()).
+            memory_size (int): Scenario results kept in memory.
+            parallel_rows (int): Grids with more rows than this are scored across the process pool.
+        """
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.candidates = candidates
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        self.memory_size = memory_size
+        self.parallel_rows = parallel_rows
+        self._memory = OrderedDict()  # scenario hash -> result frame
+        self._pool = None
+
+        pairs = [(area, crop) for area in engine.areas if area in engine.area_conditions
+                 for crop in engine._candidates(area, candidates)]
+        self.pairs = pd.DataFrame(pairs, columns=["Area", "Crop"])
+        areas, crops = self.pairs["Area"].tolist(), self.pairs["Crop"].tolist()
+        years = [engine.area_conditions[a][0] for a in areas]
+        conditions = (np.stack([engine.area_conditions[a][1] for a in areas]) if pairs
+                      else np.empty((0, len(engine.conditions))))
+        self._base = engine._matrix(areas, crops, years, conditions)  # [pairs, features]
+        self._offset = self._base.shape[1] - len(engine.conditions)   # Area, Crop, Year come first
+
+        h = hashlib.sha256(pickle.dumps((engine.model, engine.area_effect, engine.area_conditions)))
+        h.update(pd.util.hash_pandas_object(self.pairs, index=False).values.tobytes())
+        self.engine_fingerprint = h.hexdigest()[:16]
+
+    # =====================
+    # Grid
+    # =====================
+    def scenario_hash(self, scenario):
+        canonical = {"engine": self.engine_fingerprint, "candidates": self.candidates,
+                     "scenario": sorted([f, round(s, 9), round(d, 9)] for f, (s, d) in scenario.items())}
+        return hashlib.sha256(json.dumps(canonical).encode()).hexdigest()[:16]
+
+    def grid(self, scenarios):
+        """
+        Feature rows of every (scenario, Area, Crop).
+
+        Returns:
+            np.ndarray: [len(scenarios), len(self.pairs), n_features].
+        """
+        n_features = self._base.shape[1]
+        scale = np.ones((len(scenarios), n_features))
+        shift = np.zeros((len(scenarios), n_features))
+        for i, scenario in enumerate(scenarios):
+            for feature, (s, d) in scenario.items():
+                if feature in self.engine.conditions:  # features the model never saw cannot move it
+                    j = self._offset + self.engine.conditions.index(feature)
+                    scale[i, j], shift[i, j] = s, d
+        return self._base[None, :, :] * scale[:, None, :] + shift[:, None, :]
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def _worker_pool(self):
+        """The process pool, started on the first large grid and kept for the following ones."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self.engine.model,))
+        return self._pool
+
+    def close(self):
+        """Stops the worker processes (if any were started)."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    @span("scenario_engine.score")
+    def _score(self, scenarios, keys):
+        """Scores the scenarios' grid chunk by chunk, streaming each scenario to its Parquet file."""
+        grid = self.grid(scenarios)
+        n_pairs = grid.shape[1]
+        tasks = [(s, start) for s in range(len(scenarios)) for start in range(0, n_pairs, self.chunk_size)]
+        chunks = (grid[s, start:start + self.chunk_size] for s, start in tasks)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        if self.workers > 1 and len(tasks) > 1 and len(scenarios) * n_pairs > self.parallel_rows:
+            results = self._worker_pool().map(_score_chunk, chunks)
+        else:
+            results = (np.expm1(self.engine.model.predict(X)).astype(np.float32) for X in chunks)
+
+        writer = None
+        try:
+            for (s, start), expected in zip(tasks, results):
+                if start == 0:
+                    # Written under a temporary name, then renamed, so a crash never leaves a partial result
+                    metadata = {b"scenario": json.dumps(scenarios[s]).encode()}
+                    writer = pq.ParquetWriter(f"{self._path(keys[s])}.tmp",
+                                              SCENARIO_SCHEMA.with_metadata(metadata))
+                rows = self.pairs.iloc[start:start + len(expected)]
+                writer.write_table(pa.table({"Area": rows["Area"].to_numpy(), "Crop": rows["Crop"].to_numpy(),
+                                             "expected_yield": expected}, schema=SCENARIO_SCHEMA))
+                if start + self.chunk_size >= n_pairs:
+                    writer.close()
+                    writer = None
+                    os.replace(f"{self._path(keys[s])}.tmp", self._path(keys[s]))
+        finally:
+            if writer is not None:
+                writer.close()
+
+    # =====================
+    # Results
+    # =====================
+    def run(self, scenarios):
+        """
+        Expected yields of every (Area, Crop) under each scenario, scoring only those not cached.
+
+        Args:
+            scenarios (list): Scenarios from `parse_scenario` (dicts of feature -> (scale, shift)).
+
+        Returns:
+            list: One DataFrame (Area, Crop, expected_yield) per scenario.
+        """
+        if self.pairs.empty:  # nothing to score, and no file is ever written
+            return [SCENARIO_SCHEMA.empty_table().to_pandas() for _ in scenarios]
+        keys = [self.scenario_hash(s) for s in scenarios]
+        missing = {}
+        for scenario, key in zip(scenarios, keys):
+            if key not in self._memory and not os.path.exists(self._path(key)):
+                missing.setdefault(key, scenario)
+        if missing:
+            start = time.perf_counter()
+            self._score(list(missing.values()), list(missing))
+            print(f"🌦 Scored {len(missing)} scenario(s) x {len(self.pairs)} (Area, Crop) pairs "
+                  f"in {time.perf_counter() - start:.2f}s")
+
+        results = []
+        for key in keys:
+            if key not in self._memory:
+                frame = pq.read_table(self._path(key)).to_pandas()
+                self._memory[key] = frame
+            self._memory.move_to_end(key)
+            results.append(self._memory[key])
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+        return results
+
+    def compare(self, scenario, baseline=None):
+        """
+        How a scenario shifts yields and recommendations against a baseline (current conditions by default).
+
+        Returns:
+            tuple: (pairs, areas). `pairs`: Area, Crop, baseline_yield, expected_yield and change
+            (relative, -0.1 = -10%). `areas`: per Area, baseline_crop and scenario_crop (top crop
+            by expected yield), their yields and whether the recommendation changed.
+        """
+        base, result = self.run([baseline or {}, scenario])
+        pairs = base.rename(columns={"expected_yield": "baseline_yield"})
+        pairs["expected_yield"] = result["expected_yield"].to_numpy()
+        pairs["change"] = pairs["expected_yield"] / pairs["baseline_yield"] - 1
+
+        top_base = pairs.loc[pairs.groupby("Area", sort=True)["baseline_yield"].idxmax()]
+        top_scenario = pairs.loc[pairs.groupby("Area", sort=True)["expected_yield"].idxmax()]
+        areas = pd.DataFrame({
+            "Area": top_base["Area"].to_numpy(),
+            "baseline_crop": top_base["Crop"].to_numpy(),
+            "baseline_yield": top_base["baseline_yield"].to_numpy(),
+            "scenario_crop": top_scenario["Crop"].to_numpy(),
+            "scenario_yield": top_scenario["expected_yield"].to_numpy(),
+        })
+        areas["changed"] = areas["baseline_crop"] != areas["scenario_crop"]
+        return pairs, areas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score what-if climate scenarios for every area and crop.")
+    parser.add_argument("--engine", default=engine_file)
+    parser.add_argument("--scenario", action="append", required=True,
+                        help='e.g. "rainfall=-20%%,temperature=+1.5" (repeatable)')
+    parser.add_argument("--output-dir", default=scenario_dir)
+    parser.add_argument("--candidates", choices=["grown", "all"], default="grown")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--parallel-rows", type=int, default=1_000_000,
+                        help="Grids larger than this are scored across worker processes")
+    args = parser.parse_args()
+
+    engine = RecommendationEngine.load(args.engine)
+    scenarios = ScenarioEngine(engine, args.output_dir, args.candidates, args.chunk_size, args.workers,
+                               parallel_rows=args.parallel_rows)
+    parsed = [parse_scenario(text) for text in args.scenario]
+    scenarios.run([{}] + parsed)
+
+    for text, scenario in zip(args.scenario, parsed):
+        pairs, areas = scenarios.compare(scenario)
+        print(f"\n📊 {text} -> {scenarios._path(scenarios.scenario_hash(scenario))}")
+        print(f"   Median yield change: {pairs['change'].median():+.1%} "
+              f"(p10 {pairs['change'].quantile(0.1):+.1%}, p90 {pairs['change'].quantile(0.9):+.1%})")
+        print(f"   Top crop changes in {int(areas['changed'].sum())} of {len(areas)} areas")
+        shifts = areas[areas["changed"]].groupby(["baseline_crop", "scenario_crop"]).size()
+        for (before, after), count in shifts.sort_values(ascending=False).head(5).items():
+            print(f"     {before} -> {after}: {count} areas")
+    scenarios.close()
+
+
+if __name__ == "__main__":
+    main()
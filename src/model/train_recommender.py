@@ -1,66 +1,254 @@
-import pandas as pd
+import argparse
+import os
 import pickle
+import time
+
+import pandas as pd
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401  (registers HalvingGridSearchCV)
+from sklearn.model_selection import HalvingGridSearchCV, StratifiedKFold
 from sklearn.preprocessing import StandardScaler
+import numpy as np
+
+from src.data_preprocessing.data_preprocessing import load_processed_data
+from src.model.forest_engine import ForestEngine
+from src.monitoring.instrumentation import span
 
 # File paths
-data_file = "data/processed_data.csv"
+data_file = "data/processed/processed_data.csv"
 model_file = "model/saved_models/recommender_model.pkl"
+engine_file = "model/saved_models/recommender_engine.npz"
+report_file = "model/saved_models/recommender_tuning.csv"
 
-# Load dataset
-df = pd.read_csv(data_file)
+# Search spaces for --tune; successive halving prunes most of these on small subsamples
+SEARCH_SPACES = {
+    "random_forest": (
+        RandomForestClassifier(random_state=42),
+        {"n_estimators": [25, 50, 100, 200, 400], "max_depth": [None, 12, 20],
+         "min_samples_leaf": [1, 3]},
+    ),
+    "hist_gradient_boosting": (
+        HistGradientBoostingClassifier(random_state=42),
+        {"max_iter": [100, 200], "learning_rate": [0.05, 0.1], "max_leaf_nodes": [15, 31, 63]},
+    ),
+}
 
-print("📊 Columns in dataset:", df.columns.tolist())
 
-# Rename columns for consistency
-col_mapping = {
-    'hg/ha_yield': 'Yield',
-    'NDVI_sat': 'NDVI',
-    'Temperature_sat': 'Temperature',
-    'Rainfall_sat': 'Rainfall',
-    'avg_temp': 'Temperature_yield',
-    'average_rain_fall_mm_per_year': 'Rainfall_yield'
-}
-df.rename(columns=col_mapping, inplace=True)
+def load_features(path=data_file):
+    """Loads the processed dataset and returns (X, y, feature_cols)."""
+    # Load dataset (typed Parquet copy when available)
+    df = load_processed_data(path)
+
+    print("📊 Columns in dataset:", df.columns.tolist())
+
+    # Rename columns for consistency
+    col_mapping = {
+        'hg/ha_yield': 'Yield',
+        'NDVI_sat': 'NDVI',
+        'Temperature_sat': 'Temperature',
+        'Rainfall_sat': 'Rainfall',
+        'avg_temp': 'Temperature_yield',
+        'average_rain_fall_mm_per_year': 'Rainfall_yield'
+    }
+    df.rename(columns=col_mapping, inplace=True)
+
+    # ✅ Select features (all available environment + yield features)
+    feature_cols = [
+        'NDVI', 'Temperature', 'Rainfall', 'Humidity', 'Soil_Moisture',
+        'pesticides_tonnes', 'Temperature_yield', 'Rainfall_yield'
+    ]
+
+    # Keep only existing features
+    feature_cols = [col for col in feature_cols if col in df.columns]
+
+    print("✅ Features used:", feature_cols)
+
+    # Crop name: `Item` in the raw yield export, `Crop` after prepare_dashboard_data
+    label_col = 'Item' if 'Item' in df.columns else 'Crop'
+
+    # Drop rows with missing values
+    df = df.dropna(subset=feature_cols + [label_col])
+
+    # Define X and y; float64 even when the typed store holds float32, so the
+    # scaler fitted here matches ForestEngine.transform (float64) exactly
+    X = df[feature_cols].astype("float64")
+    y = df[label_col].astype(str)   # Crop name
+    return X, y, feature_cols
+
+
+def model_size_bytes(model):
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def measure_latency(model, X, repeats=50, batch_size=1000):
+    """Median single-row predict latency (ms) and batch throughput (rows/s)."""
+    row = X[:1]
+    model.predict(row)  # warm-up
+    single = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        single.append(time.perf_counter() - start)
+
+    batch = X[:batch_size]
+    start = time.perf_counter()
+    model.predict(batch)
+    return float(np.median(single) * 1000), len(batch) / (time.perf_counter() - start)
+
+
+def pareto_front(report):
+    """Marks configurations no other one beats on accuracy, latency and size at once."""
+    values = report[["test_accuracy", "latency_ms", "size_mb"]].to_numpy()
+    optimal = []
+    for acc, lat, size in values:
+        dominated = ((values[:, 0] >= acc) & (values[:, 1] <= lat) & (values[:, 2] <= size) &
+                     ((values[:, 0] > acc) | (values[:, 1] < lat) | (values[:, 2] < size))).any()
+        optimal.append(not dominated)
+    return np.array(optimal)
+
+
+def tune(X_train, y_train, X_test, y_test, cv=5, n_jobs=-1, top=4, factor=3):
+    """
+    Successive-halving search over both model families, then a Pareto report.
+
+    Every configuration starts on a small sample; only the best 1/`factor`
+    advance to `factor`x more data each round. The `top` survivors per family
+    are refit on the full training split and measured for test accuracy,
+    single-row latency, throughput and pickled size.
+
+    Returns:
+        tuple: (report DataFrame sorted by accuracy, {config name: fitted model})
+    """
+    folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=42)
+    rows, fitted = [], {}
+    for family, (estimator, grid) in SEARCH_SPACES.items():
+        start = time.perf_counter()
+        search = HalvingGridSearchCV(estimator, grid, cv=folds, factor=factor, n_jobs=n_jobs,
+                                     scoring="accuracy", refit=False, random_state=42)
+        search.fit(X_train, y_train)
+        results = pd.DataFrame(search.cv_results_)
+        n_candidates = len(results[results["iter"] == 0])
+        print(f"🔎 {family}: {n_candidates} configs, {search.n_iterations_} halving rounds "
+              f"({time.perf_counter() - start:.1f}s)")
+
+        # Survivors of the last round they reached, best CV score first
+        last = results.sort_values(["iter", "mean_test_score"], ascending=False).drop_duplicates(
+            subset="params", keep="first")
+        for _, result in last.head(top).iterrows():
+            model = clone(estimator).set_params(**result["params"])
+            fit_start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_seconds = time.perf_counter() - fit_start
+            latency_ms, rows_per_s = measure_latency(model, X_test)
+            name = f"{family}:" + ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+            fitted[name] = model
+            rows.append({
+                "config": name,
+                "family": family,
+                "cv_accuracy": result["mean_test_score"],
+                "cv_samples": int(result["n_resources"]),
+                "test_accuracy": model.score(X_test, y_test),
+                "latency_ms": latency_ms,
+                "rows_per_s": rows_per_s,
+                "size_mb": model_size_bytes(model) / 1e6,
+                "fit_seconds": fit_seconds,
+            })
+
+    report = pd.DataFrame(rows)
+    report["pareto"] = pareto_front(report)
+    return report.sort_values("test_accuracy", ascending=False, ignore_index=True), fitted
+
+
+def pick_model(report, latency_budget_ms=None, size_budget_mb=None):
+    """Most accurate Pareto-optimal configuration within the serving budgets."""
+    candidates = report[report["pareto"]]
+    if latency_budget_ms is not None:
+        candidates = candidates[candidates["latency_ms"] <= latency_budget_ms]
+    if size_budget_mb is not None:
+        candidates = candidates[candidates["size_mb"] <= size_budget_mb]
+    if candidates.empty:
+        print("⚠️ No configuration meets the budget; using the fastest Pareto-optimal one")
+        candidates = report[report["pareto"]].sort_values("latency_ms")
+    return candidates.iloc[0]["config"]
+
+
+def save_model(model, scaler, feature_cols, X, X_scaled):
+    # Save model + scaler
+    os.makedirs(os.path.dirname(model_file), exist_ok=True)
+    with open(model_file, "wb") as f:
+        pickle.dump({"model": model, "scaler": scaler, "features": feature_cols}, f)
+
+    print(f"🎉 Saved recommender model at {model_file}")
+
+    if not isinstance(model, RandomForestClassifier):
+        # The array-backed engine only covers forests; the API serves the pickle bundle instead
+        if os.path.exists(engine_file):
+            os.remove(engine_file)
+        print(f"ℹ️ {type(model).__name__} has no array-backed engine export; serve {model_file}")
+        return
+
+    # Export array-backed engine (loaded by the API instead of the pickle)
+    engine = ForestEngine.from_sklearn(model, scaler, feature_cols)
+    if not np.array_equal(engine.predict(X.to_numpy()), model.predict(X_scaled)):
+        raise RuntimeError("❌ Exported engine disagrees with the sklearn model on training data!")
+    engine.save(engine_file)
+
+    print(f"⚡ Saved array-backed recommender engine at {engine_file}")
+
 
-# ✅ Select features (all available environment + yield features)
-feature_cols = [
-    'NDVI', 'Temperature', 'Rainfall', 'Humidity', 'Soil_Moisture',
-    'pesticides_tonnes', 'Temperature_yield', 'Rainfall_yield'
-]
+def main():
+    parser = argparse.ArgumentParser(description="Train the crop recommender.")
+    parser.add_argument("--data", default=data_file)
+    parser.add_argument("--tune", action="store_true",
+                        help="Successive-halving CV search over RandomForest and HistGradientBoosting")
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel CV fits (-1 = all cores)")
+    parser.add_argument("--latency-budget-ms", type=float, default=None,
+                        help="Single-row predict budget for picking the tuned model")
+    parser.add_argument("--size-budget-mb", type=float, default=None)
+    parser.add_argument("--report", default=report_file, help="Where --tune writes the Pareto table")
+    args = parser.parse_args()
 
-# Keep only existing features
-feature_cols = [col for col in feature_cols if col in df.columns]
+    X, y, feature_cols = load_features(args.data)
 
-print("✅ Features used:", feature_cols)
+    # Standardize features
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
 
-# Drop rows with missing values
-df = df.dropna(subset=feature_cols + ['Item'])
+    # Split into train/test
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_scaled, y, test_size=0.2, random_state=42, stratify=y
+    )
 
-# Define X and y
-X = df[feature_cols]
-y = df['Item']   # Crop name
+    if args.tune:
+        with span("train_recommender.tune"):
+            report, fitted = tune(X_train, y_train, X_test, y_test, cv=args.cv, n_jobs=args.n_jobs)
+        os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+        report.to_csv(args.report, index=False)
 
-# Standardize features
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+        print("\n📋 Accuracy vs latency vs size (⭐ = Pareto-optimal):")
+        table = report.assign(pareto=np.where(report["pareto"], "⭐", ""))
+        print(table[["pareto", "config", "cv_accuracy", "test_accuracy", "latency_ms", "rows_per_s",
+                     "size_mb", "fit_seconds"]].to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+        print(f"💾 Tuning report saved at {args.report}")
 
-# Split into train/test
-X_train, X_test, y_train, y_test = train_test_split(
-    X_scaled, y, test_size=0.2, random_state=42, stratify=y
-)
+        chosen = pick_model(report, args.latency_budget_ms, args.size_budget_mb)
+        model = fitted[chosen]
+        print(f"🏆 Selected {chosen}")
+    else:
+        # Train RandomForest classifier
+        model = RandomForestClassifier(n_estimators=200, random_state=42)
+        with span("train_recommender.fit"):
+            model.fit(X_train, y_train)
 
-# Train RandomForest classifier
-model = RandomForestClassifier(n_estimators=200, random_state=42)
-model.fit(X_train, y_train)
+    print("✅ Recommender model trained successfully!")
+    print("🔍 Training accuracy:", model.score(X_train, y_train))
+    print("🔍 Testing accuracy:", model.score(X_test, y_test))
 
-print("✅ Recommender model trained successfully!")
-print("🔍 Training accuracy:", model.score(X_train, y_train))
-print("🔍 Testing accuracy:", model.score(X_test, y_test))
+    save_model(model, scaler, feature_cols, X, X_scaled)
 
-# Save model + scaler
-with open(model_file, "wb") as f:
-    pickle.dump({"model": model, "scaler": scaler, "features": feature_cols}, f)
 
-print(f"🎉 Saved recommender model at {model_file}")
+if __name__ == "__main__":
+    main()
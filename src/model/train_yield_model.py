@@ -1,67 +1,215 @@
-import pandas as pd
+import argparse
+import hashlib
+import json
+import logging
 import os
-from prophet import Prophet
 import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import pandas as pd
+import prophet
+from prophet import Prophet
+
+from src.data_preprocessing.spatiotemporal_join import spatiotemporal_join
+from src.monitoring.instrumentation import SPAN_SECONDS
 
 # --- File paths ---
-yield_file = "data/yield_df.csv"  # Your crop yield dataset
+yield_file = "data/processed/yield_df.csv"  # Your crop yield dataset
 sat_file = "data/satellite_data/processed_satellite.csv"  # Your processed satellite data
 model_dir = "model/saved_models/prophet_models"
-os.makedirs(model_dir, exist_ok=True)
-
-# --- Load datasets ---
-df_yield = pd.read_csv(yield_file)
-df_sat = pd.read_csv(sat_file)
-
-print("Yield columns:", df_yield.columns)
-print("Satellite columns:", df_sat.columns)
-
-# --- Rename satellite columns to avoid conflicts ---
-df_sat.rename(columns={
-    "Temperature": "Temperature_sat",
-    "Rainfall": "Rainfall_sat",
-    "NDVI": "NDVI_sat"
-}, inplace=True)
-
-# Rename yield columns for clarity
-df_yield.rename(columns={
-    "avg_temp": "Temperature_yield",
-    "average_rain_fall_mm_per_year": "Rainfall_yield",
-    "hg/ha_yield": "Yield",
-    "Item": "Crop"
-}, inplace=True)
-
-# --- Merge datasets on Crop ---
-df = pd.merge(df_yield, df_sat, left_on="Crop", right_on="Crop_Type", how="left")
-print("✅ Merged dataset shape:", df.shape)
-
-# --- Drop unnecessary or NA rows ---
-required_columns = ['Yield', 'NDVI_sat', 'Temperature_sat', 'Rainfall_sat', 'Humidity', 'Soil_Moisture']
-df = df.dropna(subset=required_columns)
-print("✅ Dataset after dropping missing values:", df.shape)
-
-# --- Train Prophet models for each crop ---
-crops = df['Crop'].unique()
-for crop in crops:
-    print(f"Training model for {crop}...")
-    
-    df_crop = df[df['Crop'] == crop][['Year', 'Yield']].copy()
-    df_crop.rename(columns={"Year": "ds", "Yield": "y"}, inplace=True)
-    
-    # Prophet requires datetime, convert Year to datetime
-    df_crop['ds'] = pd.to_datetime(df_crop['ds'], format='%Y')
-    
-    model = Prophet()
-    model.fit(df_crop)
-    
-    # Save model with pickle
-    crop_file = os.path.join(model_dir, f"{crop}_prophet.pkl")
-    with open(crop_file, "wb") as f:
+MANIFEST_NAME = "manifest.json"
+MIN_OBSERVATIONS = 2  # Prophet cannot fit fewer non-NaN rows
+
+# Anything that changes the fitted model must be part of the fingerprint
+PROPHET_PARAMS = {}
+
+
+def load_training_data(yield_path=yield_file, sat_path=sat_file):
+    """Loads yield + satellite data and returns the merged training frame."""
+    df_yield = pd.read_csv(yield_path)
+    df_sat = pd.read_csv(sat_path)
+
+    print("Yield columns:", df_yield.columns)
+    print("Satellite columns:", df_sat.columns)
+
+    # --- Rename satellite columns to avoid conflicts ---
+    df_sat.rename(columns={
+        "Crop_Type": "Crop",
+        "Temperature": "Temperature_sat",
+        "Rainfall": "Rainfall_sat",
+        "NDVI": "NDVI_sat"
+    }, inplace=True)
+
+    # Rename yield columns for clarity
+    df_yield.rename(columns={
+        "avg_temp": "Temperature_yield",
+        "average_rain_fall_mm_per_year": "Rainfall_yield",
+        "hg/ha_yield": "Yield",
+        "Item": "Crop"
+    }, inplace=True)
+
+    # --- Join satellite features by (Area, Crop, Year), falling back to crop means ---
+    df = spatiotemporal_join(df_yield, df_sat)
+    print("✅ Merged dataset shape:", df.shape)
+
+    # --- Drop unnecessary or NA rows ---
+    required_columns = ['Yield', 'NDVI_sat', 'Temperature_sat', 'Rainfall_sat', 'Humidity', 'Soil_Moisture']
+    df = df.dropna(subset=required_columns)
+    print("✅ Dataset after dropping missing values:", df.shape)
+    return df
+
+
+def model_filename(key):
+    """`Wheat_prophet.pkl` for per-crop models, `India__Wheat_prophet.pkl` for (Area, Crop)."""
+    name = "__".join(str(k) for k in key).replace(os.sep, "-")
+    return f"{name}_prophet.pkl"
+
+
+def series_fingerprint(series):
+    """Hash of a series' (ds, y) values plus the Prophet version and parameters."""
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(series[["ds", "y"]], index=False).values.tobytes())
+    h.update(json.dumps({"prophet": prophet.__version__, "params": PROPHET_PARAMS}, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def build_series(df, group_by):
+    """Splits the training frame into Prophet-ready (ds, y) series keyed by `group_by` values."""
+    series = {}
+    for key, group in df.groupby(group_by, sort=True):
+        key = key if isinstance(key, tuple) else (key,)
+        if group["Yield"].notna().sum() < MIN_OBSERVATIONS:
+            print(f"⚠️ Skipping {'/'.join(map(str, key))}: fewer than {MIN_OBSERVATIONS} observations")
+            continue
+        df_crop = group[['Year', 'Yield']].rename(columns={"Year": "ds", "Yield": "y"})
+        # Prophet requires datetime, convert Year to datetime
+        df_crop['ds'] = pd.to_datetime(df_crop['ds'], format='%Y')
+        series[key] = df_crop.reset_index(drop=True)
+    return series
+
+
+def fit_series(key, series, path):
+    """Worker: fits one Prophet model and pickles it to `path`. Returns the fit time."""
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    start = time.perf_counter()
+    model = Prophet(**PROPHET_PARAMS)
+    model.fit(series)
+    fit_seconds = time.perf_counter() - start
+
+    # Write-then-rename so a crash never leaves a truncated model behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
         pickle.dump(model, f)
-    
-    print(f"✅ Saved Prophet model for {crop} at {crop_file}")
+    os.replace(tmp_path, path)
+    return key, fit_seconds
+
+
+def load_manifest(directory):
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def train_all(df, directory=model_dir, group_by=("Crop",), workers=None, force=False):
+    """
+    Trains one Prophet model per series, fanning fits out over a process pool.
+
+    Series whose input fingerprint matches the manifest entry (and whose model
+    file still exists) are skipped, so reruns only refit changed series.
+    Entries of the same grouping whose series no longer exist in `df` are
+    dropped along with their model files; other groupings sharing the
+    directory (crop-level vs per-area models) are left alone.
+
+    Args:
+        df (pd.DataFrame): Training frame with Year, Yield and the group_by columns.
+        directory (str): Where models and manifest.json are written.
+        group_by (tuple): ("Crop",) or ("Area", "Crop").
+        workers (int, optional): Process count (defaults to os.cpu_count()).
+        force (bool): Refit every series regardless of fingerprints.
+
+    Returns:
+        dict: The updated manifest.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = load_manifest(directory)
+    series = build_series(df, list(group_by))
+
+    current = {model_filename(key) for key in series}
+    stale = [name for name, entry in manifest.items()
+             if list(entry.get("key", {})) == list(group_by) and name not in current]
+    for name in stale:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
+        del manifest[name]
+    if stale:
+        save_manifest(directory, manifest)
+        print(f"🧹 Removed {len(stale)} model(s) for series no longer in the data")
+
+    todo = {}
+    for key, data in series.items():
+        name = model_filename(key)
+        fingerprint = series_fingerprint(data)
+        entry = manifest.get(name)
+        if (not force and entry and entry["fingerprint"] == fingerprint
+                and os.path.exists(os.path.join(directory, name))):
+            continue
+        todo[key] = (name, fingerprint)
+
+    print(f"🔍 {len(series)} series, {len(series) - len(todo)} up to date, {len(todo)} to train")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fit_series, key, series[key], os.path.join(directory, name)): key
+                   for key, (name, _) in todo.items()}
+        for future in as_completed(futures):
+            try:
+                key, fit_seconds = future.result()
+                SPAN_SECONDS.observe(fit_seconds, span="prophet.fit")  # timed in the worker
+            except Exception as e:
+                print(f"❌ Failed to train {'/'.join(map(str, futures[future]))}: {e}")
+                continue
+            name, fingerprint = todo[key]
+            manifest[name] = {
+                "key": dict(zip(group_by, key)),
+                "fingerprint": fingerprint,
+                "n_obs": len(series[key]),
+                "fit_seconds": round(fit_seconds, 3),
+                "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            # Persist progress so an interrupted run keeps finished fits
+            save_manifest(directory, manifest)
+            print(f"✅ Saved Prophet model for {'/'.join(map(str, key))} ({fit_seconds:.2f}s)")
+
+    save_manifest(directory, manifest)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train per-series Prophet yield models.")
+    parser.add_argument("--group-by", default="Crop", help="Comma-separated keys, e.g. 'Area,Crop'")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="Refit every series")
+    args = parser.parse_args()
+
+    df = load_training_data()
+    start = time.perf_counter()
+    train_all(df, group_by=tuple(args.group_by.split(",")), workers=args.workers, force=args.force)
+    print(f"🎉 All available crop models trained and saved! ({time.perf_counter() - start:.1f}s)")
+
+    # --- Optional: save merged dataset for dashboard ---
+    df.to_csv("data/merged_crop_data.csv", index=False)
 
-print("🎉 All available crop models trained and saved!")
 
-# --- Optional: save merged dataset for dashboard ---
-df.to_csv("data/merged_crop_data.csv", index=False)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ContextDecorator, contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Opt-in sampling profiler: unset (or 0) threshold disables it
+PROFILE_THRESHOLD_MS = float(os.getenv("PROFILE_THRESHOLD_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# Batch jobs (pipeline stages) write their metrics here on exit instead of serving /metrics
+METRICS_FILE = os.getenv("METRICS_FILE")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans the dashboard/API care about range from sub-ms lookups to multi-second fits
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+                   60.0, 300.0)
+
+
+# =====================
+# 📊 Metrics
+# =====================
+class Histogram:
+    """
+    Thread-safe Prometheus histogram with labels.
+
+    Rendered in the text exposition format, so a scrape needs no client
+    library: cumulative `_bucket{le=...}` series plus `_sum` and `_count`.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf bucket count, sum, count]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:  # above every bound: only the +Inf bucket holds it
+                series[len(self.buckets)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        """{label values: (sum, count)} for summaries outside Prometheus."""
+        with self._lock:
+            return {key: (series[-2], series[-1]) for key, series in self._series.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-2]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{{{','.join(labels + [le])}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {series[-2]}")
+            lines.append(f"{self.name}_count{suffix} {series[-1]}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = []
+
+SPAN_SECONDS = Histogram("agrivision_span_seconds", "Duration of instrumented code spans.", ["span"])
+REQUEST_SECONDS = Histogram("agrivision_request_seconds", "HTTP request latency.",
+                            ["app", "method", "route", "status"])
+
+
+def render_metrics():
+    """All registered metrics in the Prometheus text format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+def write_metrics(path):
+    """Writes the metrics to a file (for node_exporter's textfile collector), atomically."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render_metrics())
+    os.replace(tmp, path)
+
+
+def _write_metrics_at_exit():
+    # Spawned worker processes re-import this module; only the main process owns the file
+    if multiprocessing.parent_process() is None:
+        write_metrics(METRICS_FILE)
+
+
+if METRICS_FILE:
+    atexit.register(_write_metrics_at_exit)
+
+
+# =====================
+# ⏱️ Spans
+# =====================
+class span(ContextDecorator):
+    """
+    Times a block or function into `agrivision_span_seconds{span=name}`.
+
+    Usable as `with span("model_load"):` or as a `@span("predict")` decorator.
+    Under `lru_cache`, put it innermost so only cache misses are timed.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._starts = threading.local()
+
+    def __enter__(self):
+        stack = self._starts.__dict__.setdefault("stack", [])
+        stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._starts.stack.pop()
+        SPAN_SECONDS.observe(elapsed, span=self.name)
+        logger.debug("%s took %.2f ms", self.name, elapsed * 1000)
+        return False
+
+
+# =====================
+# 🔥 Sampling profiler
+# =====================
+# Innermost frames of a thread that is blocked, not working; those samples are skipped
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "socket.py", "socketserver.py")
+
+
+def _fold(frame, max_depth=64):
+    """Collapsed stack (root first, `;`-separated), the format flame graph tools read."""
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's stack while profiled requests are in flight.
+
+    A daemon thread reads `sys._current_frames()` every `interval_ms`
+    (only while at least one request is active) and counts each busy
+    thread's collapsed stack against every active request. A request that
+    took at least `threshold_ms` has its counts written to
+    `<output_dir>/<time>_<name>_<ms>ms.folded` for flamegraph.pl/speedscope.
+    Work handed to thread pools (model predicts, Prophet) is captured too;
+    on a busy server a profile also includes concurrent requests' stacks.
+    """
+
+    def __init__(self, threshold_ms, interval_ms=5.0, output_dir="profiles"):
+        self.threshold_ms = threshold_ms
+        self.interval = interval_ms / 1000
+        self.output_dir = output_dir
+        self._records = {}  # id -> in-flight request record
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.dumped = 0
+
+    def begin(self, name):
+        record = {"name": name, "start": time.perf_counter(), "stacks": Counter(), "samples": 0}
+        with self._lock:
+            self._records[id(record)] = record
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return record
+
+    def end(self, record):
+        with self._lock:
+            self._records.pop(id(record), None)
+        elapsed_ms = (time.perf_counter() - record["start"]) * 1000
+        if elapsed_ms >= self.threshold_ms:
+            self.dump(record, elapsed_ms)
+        return elapsed_ms
+
+    @contextmanager
+    def request(self, name):
+        record = self.begin(name)
+        try:
+            yield record
+        finally:
+            self.end(record)
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            self._wake.wait()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = [f"{names.get(ident, ident)};{_fold(frame)}"
+                      for ident, frame in sys._current_frames().items()
+                      if ident != me and os.path.basename(frame.f_code.co_filename) not in IDLE_FILES]
+            # Counted under the lock: a finished request is removed (and dumped) atomically
+            with self._lock:
+                if not self._records:
+                    self._wake.clear()
+                    continue
+                for record in self._records.values():
+                    record["stacks"].update(stacks)
+                    record["samples"] += 1
+            time.sleep(self.interval)
+
+    def dump(self, record, elapsed_ms):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%f")
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in record["name"]).strip("_") or "request"
+        path = os.path.join(self.output_dir, f"{stamp}_{safe}_{elapsed_ms:.0f}ms.folded")
+        with open(path, "w") as f:
+            for stack, count in record["stacks"].most_common():
+                f.write(f"{stack} {count}\n")
+        self.dumped += 1
+        logger.warning("Slow request %s took %.0f ms (threshold %.0f ms); %d samples written to %s",
+                       record["name"], elapsed_ms, self.threshold_ms, record["samples"], path)
+        return path
+
+
+profiler = SamplingProfiler(PROFILE_THRESHOLD_MS, PROFILE_INTERVAL_MS, PROFILE_DIR) \
+    if PROFILE_THRESHOLD_MS > 0 else None
+
+
+# =====================
+# 🌐 Web app hooks
+# =====================
+class MetricsMiddleware:
+    """
+    ASGI middleware: request latency histogram (+ slow-request profiles).
+
+    Routes are labelled by their template (`/forecast`, not the query), and
+    requests that match no route as "unmatched", to keep label cardinality
+    bounded.
+    """
+
+    def __init__(self, app, app_name="api"):
+        self.app = app
+        self.app_name = app_name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        record = profiler.begin(f"{scope['method']} {scope['path']}") if profiler else None
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if record is not None:
+                profiler.end(record)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(time.perf_counter() - start, app=self.app_name, method=scope["method"],
+                                    route=route, status=status["code"])
+
+
+def instrument_fastapi(app, app_name="api"):
+    """Adds the latency middleware and a `/metrics` route to a FastAPI app."""
+    from fastapi.responses import PlainTextResponse
+
+    app.add_middleware(MetricsMiddleware, app_name=app_name)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+    return app
+
+
+def instrument_flask(server, app_name="dashboard"):
+    """Adds request timing hooks and a `/metrics` route to a Flask server (e.g. Dash's `app.server`)."""
+    from flask import Response, g, request
+
+    @server.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_profile = profiler.begin(f"{request.method} {request.path}") if profiler else None
+
+    @server.teardown_request
+    def _observe(exc):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return
+        record = g.pop("metrics_profile", None)
+        if record is not None:
+            profiler.end(record)
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        status = 500 if exc is not None else g.pop("metrics_status", 200)
+        REQUEST_SECONDS.observe(time.perf_counter() - start, app=app_name, method=request.method,
+                                route=route, status=status)
+
+    @server.after_request
+    def _status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @server.route("/metrics")
+    def metrics():
+        return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+    return server
@@ -0,0 +1,321 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+import yaml
+
+from src.monitoring.instrumentation import SPAN_SECONDS, write_metrics
+
+
+class Stage:
+    """One pipeline step from config.yaml: a command plus the files it reads and writes."""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.cmd = spec["cmd"]
+        self.code = list(spec.get("code", []))
+        self.inputs = list(spec.get("inputs", []))
+        self.outputs = list(spec.get("outputs", []))
+        self.after = list(spec.get("after", []))
+        self.deps = set()
+
+    def entry_point(self):
+        """Repo file the command runs (`python -m pkg.mod` or `python path.py`), if any."""
+        argv = shlex.split(self.cmd)
+        if len(argv) >= 3 and argv[0] == "python" and argv[1] == "-m":
+            return module_path(argv[2])
+        if len(argv) >= 2 and argv[0] == "python" and argv[1].endswith(".py"):
+            return os.path.normpath(argv[1])
+        return None
+
+    def argv(self):
+        argv = shlex.split(self.cmd)
+        if argv and argv[0] == "python":
+            argv[0] = sys.executable  # same interpreter/venv as the runner
+        return argv
+
+
+def module_path(name):
+    """Repo file of a dotted module name; None for stdlib / third-party modules."""
+    base = name.replace(".", os.sep)
+    for path in (f"{base}.py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(path):
+            return os.path.normpath(path)
+    return None
+
+
+def python_sources(paths):
+    """The given Python files plus every repo module they import (via `ast`), transitively."""
+    seen = set()
+    queue = [os.path.normpath(p) for p in paths]
+    while queue:
+        path = queue.pop()
+        if path in seen or not path.endswith(".py") or not os.path.isfile(path):
+            continue
+        seen.add(path)
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                # `from pkg import mod` may name a module as well as an attribute
+                names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            queue.extend(found for found in map(module_path, names) if found is not None)
+    return sorted(seen)
+
+
+def load_stages(config):
+    """Builds the stage DAG from config: inputs produced by another stage, or `after`, are dependencies."""
+    stages = {name: Stage(name, spec) for name, spec in config["pipeline"]["stages"].items()}
+    for stage in stages.values():
+        entry = stage.entry_point()
+        derived = python_sources(stage.code + ([entry] if entry else []))
+        stage.code = list(dict.fromkeys([os.path.normpath(c) for c in stage.code] + derived))
+        for other in stages.values():
+            if other is stage:
+                continue
+            produced = [os.path.normpath(o) for o in other.outputs]
+            for path in map(os.path.normpath, stage.inputs):
+                if any(path == o or path.startswith(o + os.sep) or o.startswith(path + os.sep) for o in produced):
+                    stage.deps.add(other.name)
+        unknown = set(stage.after) - set(stages)
+        if unknown:
+            raise ValueError(f"Stage '{stage.name}' runs after unknown stage(s): {sorted(unknown)}")
+        stage.deps.update(stage.after)
+
+    # Reject cycles up front (Kahn's algorithm)
+    indegree = {name: len(s.deps) for name, s in stages.items()}
+    ready = [name for name, d in indegree.items() if d == 0]
+    seen = 0
+    while ready:
+        name = ready.pop()
+        seen += 1
+        for other in stages.values():
+            if name in other.deps:
+                indegree[other.name] -= 1
+                if indegree[other.name] == 0:
+                    ready.append(other.name)
+    if seen != len(stages):
+        raise ValueError("Pipeline stages form a cycle.")
+    return stages
+
+
+class FileHasher:
+    """Content hashes, reused while a file's size and mtime are unchanged."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def file(self, path):
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        cached = self.cache.get(key)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            return cached["sha256"]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        self.cache[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+        return digest
+
+    def path(self, path, exclude=()):
+        """Digest of a file, or of every file under a directory (names included)."""
+        if os.path.isfile(path):
+            return self.file(path)
+        if not os.path.isdir(path):
+            return "missing"
+        h = hashlib.sha256()
+        excluded = {os.path.normpath(e) for e in exclude}
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                if os.path.normpath(full) in excluded:
+                    continue
+                h.update(os.path.relpath(full, path).encode())
+                h.update(self.file(full).encode())
+        return h.hexdigest()
+
+
+def stage_fingerprint(stage, hasher):
+    """Hash of the stage's command, code files and inputs (its own outputs excluded)."""
+    h = hashlib.sha256(stage.cmd.encode())
+    for path in stage.code + stage.inputs:
+        h.update(path.encode())
+        h.update(hasher.path(path, exclude=stage.outputs).encode())
+    return h.hexdigest()
+
+
+def run_stage(stage, log_dir, metrics_dir):
+    """
+    Runs the stage command, teeing output to <log_dir>/<stage>.log.
+
+    The stage's own spans (model fits etc.) land in <metrics_dir>/<stage>.prom.
+    """
+    start = time.perf_counter()
+    log_path = os.path.join(log_dir, f"{stage.name}.log")
+    env = {**os.environ, "METRICS_FILE": os.path.abspath(os.path.join(metrics_dir, f"{stage.name}.prom"))}
+    with open(log_path, "w") as log:
+        proc = subprocess.run(stage.argv(), stdout=log, stderr=subprocess.STDOUT, env=env)
+    seconds = time.perf_counter() - start
+    SPAN_SECONDS.observe(seconds, span=f"pipeline.{stage.name}")
+    return proc.returncode, seconds, log_path
+
+
+def run_pipeline(config, only=None, force=False, dry_run=False, max_workers=None):
+    """
+    Runs out-of-date stages in dependency order, independent stages in parallel.
+
+    Args:
+        config (dict): Parsed config.yaml.
+        only (list, optional): Stage names to consider (others are treated as done).
+        force (bool): Run every selected stage regardless of fingerprints.
+        dry_run (bool): Only report what would run.
+        max_workers (int, optional): Concurrent stages (config `pipeline.max_workers` by default).
+
+    Returns:
+        dict: Per-stage status and timing, as appended to the run log.
+    """
+    settings = config["pipeline"]
+    state_dir = settings.get("state_dir", ".pipeline")
+    os.makedirs(os.path.join(state_dir, "logs"), exist_ok=True)
+    metrics_dir = settings.get("metrics_dir", os.path.join(state_dir, "metrics"))
+    os.makedirs(metrics_dir, exist_ok=True)
+    state_path = os.path.join(state_dir, "state.json")
+    state = {"stages": {}, "files": {}}
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+
+    stages = load_stages(config)
+    selected = set(only or stages)
+    hasher = FileHasher(state["files"])
+    results = {}
+    pending = {name for name in stages if name in selected}
+    done = set(stages) - pending
+    failed = set()
+    max_workers = max_workers or settings.get("max_workers", os.cpu_count())
+    run_start = time.perf_counter()
+
+    def up_to_date(stage, fingerprint):
+        return (not force and state["stages"].get(stage.name, {}).get("fingerprint") == fingerprint
+                and all(os.path.exists(o) for o in stage.outputs))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = {}
+        while pending or running:
+            # Repeat the scheduling pass while up-to-date stages unblock others
+            progress = True
+            while progress:
+                progress = False
+                for name in sorted(pending):
+                    stage = stages[name]
+                    if stage.deps & failed:
+                        pending.discard(name)
+                        failed.add(name)
+                        results[name] = {"status": "blocked", "seconds": 0.0}
+                        print(f"⏭️  {name}: blocked by failed dependency")
+                        progress = True
+                        continue
+                    if not stage.deps <= done:
+                        continue
+                    pending.discard(name)
+
+                    # Fingerprint only once dependencies have (re)written this stage's inputs
+                    fingerprint = stage_fingerprint(stage, hasher)
+                    fresh = up_to_date(stage, fingerprint)
+                    if fresh or dry_run:
+                        status = "up-to-date" if fresh else "would-run"
+                        results[name] = {"status": status, "seconds": 0.0}
+                        done.add(name)
+                        print(f"{'✅' if status == 'up-to-date' else '🔸'} {name}: {status}")
+                        progress = True
+                        continue
+                    print(f"▶️  {name}: {stage.cmd}")
+                    future = pool.submit(run_stage, stage, os.path.join(state_dir, "logs"), metrics_dir)
+                    running[future] = (name, time.perf_counter())
+
+            if not running:
+                if pending:  # everything left is waiting on something that cannot finish
+                    for name in pending:
+                        results[name] = {"status": "blocked", "seconds": 0.0}
+                    break
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, started = running.pop(future)
+                try:
+                    code, seconds, log_path = future.result()
+                    if code == 0:
+                        # Re-fingerprint: a stage's inputs may include files it rewrote itself
+                        fingerprint = stage_fingerprint(stages[name], hasher)
+                except Exception as e:  # the stage could not be launched or fingerprinted
+                    seconds = time.perf_counter() - started
+                    failed.add(name)
+                    results[name] = {"status": "failed", "seconds": round(seconds, 3), "error": repr(e)}
+                    print(f"❌ {name}: {e!r}")
+                    continue
+                if code == 0:
+                    state["stages"][name] = {"fingerprint": fingerprint, "seconds": round(seconds, 3)}
+                    done.add(name)
+                    results[name] = {"status": "ran", "seconds": round(seconds, 3)}
+                    print(f"✅ {name}: done in {seconds:.1f}s")
+                else:
+                    failed.add(name)
+                    results[name] = {"status": "failed", "seconds": round(seconds, 3), "log": log_path}
+                    print(f"❌ {name}: exit code {code}, see {log_path}")
+
+    if not dry_run:
+        with open(f"{state_path}.tmp", "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(f"{state_path}.tmp", state_path)
+
+    record = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "seconds": round(time.perf_counter() - run_start, 3),
+        "forced": force,
+        "dry_run": dry_run,
+        "stages": results,
+    }
+    with open(settings.get("run_log", os.path.join(state_dir, "runs.jsonl")), "a") as f:
+        f.write(json.dumps(record) + "\n")
+    if not dry_run:
+        write_metrics(os.path.join(metrics_dir, "pipeline.prom"))
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the AgriVision pipeline defined in config.yaml.")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--stages", help="Comma-separated subset of stages to run")
+    parser.add_argument("--force", action="store_true", help="Ignore fingerprints and rerun")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would run")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent stages")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+
+    record = run_pipeline(config, only=args.stages.split(",") if args.stages else None,
+                          force=args.force, dry_run=args.dry_run, max_workers=args.workers)
+    print(f"\n⏱️  Pipeline finished in {record['seconds']:.1f}s")
+    sys.exit(1 if any(r["status"] in ("failed", "blocked") for r in record["stages"].values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+
+# Maximum points a single trace sends to the browser
+POINT_BUDGET = int(os.getenv("POINT_BUDGET", "2000"))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets down-sampling.
+
+    Keeps the first and last points and, from each of the n_out - 2 buckets in
+    between, the point forming the largest triangle with the previously kept
+    point and the mean of the next bucket, which preserves peaks and trends.
+
+    Args:
+        x (np.ndarray): Sorted x values.
+        y (np.ndarray): y values.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Indices of the kept points, ascending.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        raise ValueError("LTTB needs n_out >= 3 (first, last and one bucket).")
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # bucket boundaries over the interior
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def decimate_line(x, y, budget=POINT_BUDGET, x_range=None):
+    """
+    Clips a line to the visible x range and LTTB-decimates it to `budget` points.
+
+    Returns:
+        tuple: (x, y) arrays with at most `budget` points.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    if x_range is not None:
+        visible = (x >= x_range[0]) & (x <= x_range[1])
+        x, y = x[visible], y[visible]
+    if len(x) <= budget:
+        return x, y
+    order = np.argsort(x, kind="mergesort")
+    x, y = x[order], y[order]
+    idx = lttb_indices(x, y, budget)
+    return x[idx], y[idx]
+
+
+def bin_scatter(x, y, budget=POINT_BUDGET, x_range=None, y_range=None):
+    """
+    Replaces a dense scatter by the centres of a 2D histogram's non-empty bins.
+
+    Below the budget (after clipping to the visible ranges) the raw points are
+    returned with a count of 1 each, so zooming in restores full resolution.
+
+    Returns:
+        tuple: (x, y, counts) arrays with at most `budget` points.
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    visible = np.isfinite(x) & np.isfinite(y)
+    if x_range is not None:
+        visible &= (x >= x_range[0]) & (x <= x_range[1])
+    if y_range is not None:
+        visible &= (y >= y_range[0]) & (y <= y_range[1])
+    x, y = x[visible], y[visible]
+    if len(x) <= budget:
+        return x, y, np.ones(len(x), dtype=np.int64)
+
+    side = max(int(np.sqrt(budget)), 1)
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=side)
+    ix, iy = np.nonzero(counts)
+    x_centres = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centres = (y_edges[:-1] + y_edges[1:]) / 2
+    return x_centres[ix], y_centres[iy], counts[ix, iy].astype(np.int64)
@@ -0,0 +1,54 @@
+import importlib
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# TBB's thread pool hangs interpreter exit once the process has forked (the streaming
+# tests' ProcessPoolExecutor) after a parallel numba call; prefer OpenMP in tests
+os.environ.setdefault("NUMBA_THREADING_LAYER_PRIORITY", "omp tbb workqueue")
+
+CROPS = np.array(["Maize", "Rice", "Sorghum", "Wheat"])
+
+
+def fit_recommender(seed=0, n_estimators=10):
+    """Tiny forest on the API's (rainfall, temperature, NDVI) columns."""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.gamma(2.0, 50.0, 400), rng.normal(24, 6, 400), rng.uniform(0, 1, 400)])
+    y = CROPS[(X[:, 0] > 100).astype(int) + 2 * (X[:, 1] > 24).astype(int)]
+    return RandomForestClassifier(n_estimators=n_estimators, max_depth=5, random_state=seed).fit(X, y)
+
+
+@pytest.fixture
+def recommender():
+    return fit_recommender()
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch, recommender):
+    """The FastAPI module re-imported against a tiny model and data written to tmp_path."""
+    model_path = tmp_path / "crop_recommender.pkl"
+    joblib.dump(recommender, model_path)
+    pd.DataFrame({"Rainfall_sat": [100.0], "Temperature_sat": [24.0], "NDVI_sat": [0.5]}).to_csv(
+        tmp_path / "processed_data.csv", index=False)
+    (tmp_path / "prophet_models").mkdir()
+
+    monkeypatch.setenv("MODEL_PATH", str(model_path))
+    monkeypatch.setenv("DATA_PATH", str(tmp_path / "processed_data.csv"))
+    monkeypatch.setenv("PROPHET_MODEL_DIR", str(tmp_path / "prophet_models"))
+    monkeypatch.setenv("MODEL_POLL_SECONDS", "0")
+    monkeypatch.setenv("MAX_BATCH_SIZE", "100")
+    monkeypatch.setenv("MAX_UPLOAD_BYTES", "8192")
+
+    import src.api.fastapi_app as module
+    return importlib.reload(module)
+
+
+@pytest.fixture
+def client(api):
+    from fastapi.testclient import TestClient
+    with TestClient(api.app) as client:
+        yield client
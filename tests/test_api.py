@@ -0,0 +1,64 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+ROWS = [[150.0, 30.0, 0.7], [20.0, 15.0, 0.2], [90.0, 25.0, 0.5]]
+
+
+def test_home(client):
+    assert client.get("/").status_code == 200
+
+
+def test_batch_top_k_is_ordered_by_probability(client, recommender):
+    response = client.post("/recommend/batch", json={"rows": ROWS, "top_k": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 3
+
+    proba = recommender.predict_proba(np.asarray(ROWS))
+    for row_proba, result in zip(proba, body["results"]):
+        expected = np.sort(row_proba)[::-1][:2]
+        assert [r["probability"] for r in result] == list(expected)
+        assert [r["crop"] for r in result][0] == recommender.classes_[np.argmax(row_proba)]
+
+
+def test_batch_accepts_dict_rows_csv_and_arrow(client):
+    frame = pd.DataFrame(ROWS, columns=["Rainfall_sat", "Temperature_sat", "NDVI_sat"])
+    expected = client.post("/recommend/batch", json={"rows": ROWS}).json()
+
+    as_dicts = client.post("/recommend/batch", json={"rows": frame.to_dict("records")})
+    as_csv = client.post("/recommend/batch", content=frame.to_csv(index=False),
+                         headers={"content-type": "text/csv"})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, pa.Schema.from_pandas(frame, preserve_index=False)) as writer:
+        writer.write_table(pa.Table.from_pandas(frame, preserve_index=False))
+    as_arrow = client.post("/recommend/batch", content=sink.getvalue(),
+                           headers={"content-type": "application/vnd.apache.arrow.stream"})
+
+    for response in (as_dicts, as_csv, as_arrow):
+        assert response.status_code == 200
+        assert response.json() == expected
+
+
+def test_batch_rejects_empty_and_non_numeric_cells(client):
+    for csv in ("Rainfall_sat,Temperature_sat,NDVI_sat\n100,24,\n",
+                "Rainfall_sat,Temperature_sat,NDVI_sat\n100,24,high\n",
+                "Rainfall_sat,Temperature_sat\n100,24\n"):
+        response = client.post("/recommend/batch", content=csv, headers={"content-type": "text/csv"})
+        assert response.status_code == 422
+
+
+def test_batch_size_limits(client, api):
+    rows = [[100.0, 24.0, 0.5]] * (api.MAX_BATCH_SIZE + 1)
+    assert client.post("/recommend/batch", json={"rows": rows}).status_code == 413
+
+    csv = "Rainfall_sat,Temperature_sat,NDVI_sat\n" + "100,24,0.5\n" * (api.MAX_BATCH_SIZE + 1)
+    assert client.post("/recommend/batch", content=csv, headers={"content-type": "text/csv"}).status_code == 413
+
+    oversized = "Rainfall_sat,Temperature_sat,NDVI_sat\n" + "100,24,0.5\n" * 1000
+    assert len(oversized) > api.MAX_UPLOAD_BYTES
+    response = client.post("/recommend/batch", content=oversized, headers={"content-type": "text/csv"})
+    assert response.status_code == 413
+    assert "MAX_UPLOAD_BYTES" in response.json()["detail"]
@@ -0,0 +1,74 @@
+import asyncio
+
+import numpy as np
+
+from src.api.batching import MicroBatcher
+
+
+class RecordingPredict:
+    """predict_fn that remembers the size of every batch it scored."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, X):
+        self.batches.append(len(X))
+        return X[:, 0] * 10
+
+
+def test_concurrent_rows_fan_out_to_their_callers():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit([float(i), 0.0, 0.0]) for i in range(20)))
+
+    assert list(asyncio.run(main())) == [10.0 * i for i in range(20)]
+    assert predict.batches == [20]
+    assert batcher.metrics()["rows"] == 20
+
+
+def test_flushes_when_batch_is_full():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=10_000)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit([1.0, 0.0, 0.0]) for _ in range(16))), 5)
+
+    asyncio.run(main())  # waiting out the 10 s max_wait would time out
+    assert predict.batches == [8, 8]
+
+
+def test_flushes_a_lone_row_after_max_wait():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=20)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await batcher.submit([3.0, 0.0, 0.0])
+        return result, loop.time() - start
+
+    result, elapsed = asyncio.run(main())
+    assert result == 30.0
+    assert predict.batches == [1]
+    assert 0.015 <= elapsed < 1.0
+
+
+def test_predict_errors_reach_every_caller():
+    def fail(X):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(fail, max_batch_size=4, max_wait_ms=5)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit([1.0, 0.0, 0.0]) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+
+
+def test_recommend_endpoint_returns_the_model_prediction(client, recommender):
+    response = client.post("/recommend", params={"rainfall": 150.0, "temperature": 30.0, "ndvi": 0.7})
+    assert response.status_code == 200
+    assert response.json()["recommended_crop"] == recommender.predict(np.array([[150.0, 30.0, 0.7]]))[0]
+    assert client.get("/metrics/batching").json()["rows"] == 1
@@ -0,0 +1,43 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+ROWS = [[150.0, 30.0, 0.75], [20.0, 15.0, 0.25], [90.0, 25.0, 0.5]]  # already on the 0.01 grid
+
+
+def test_contributions_add_up_to_the_probability(client, recommender):
+    response = client.post("/explain", json={"rows": ROWS})
+    assert response.status_code == 200
+    results = response.json()["results"]
+
+    proba = recommender.predict_proba(np.asarray(ROWS))
+    for row_proba, result in zip(proba, results):
+        assert result["crop"] == recommender.classes_[np.argmax(row_proba)]
+        assert result["output"] == "probability"
+        total = result["base_value"] + sum(c["value"] for c in result["contributions"])
+        assert total == pytest.approx(result["probability"], abs=1e-6)
+        assert result["probability"] == pytest.approx(row_proba.max())
+
+
+def test_explain_named_crop_and_cache(client):
+    body = client.post("/explain", json={"rows": ROWS[:1], "crop": "Rice", "top_features": 2}).json()
+    assert body["results"][0]["crop"] == "Rice"
+    assert len(body["results"][0]["contributions"]) == 2
+
+    client.post("/explain", json={"rows": ROWS[:1], "crop": "Wheat"})
+    metrics = client.get("/metrics/explain").json()
+    assert (metrics["misses"], metrics["hits"], metrics["explainer_builds"]) == (1, 1, 1)
+
+    assert client.post("/explain", json={"rows": ROWS, "crop": "Cassava"}).status_code == 404
+
+
+def test_model_treeshap_cannot_walk_is_a_409(client, api):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, 3))
+    joblib.dump(LogisticRegression().fit(X, np.where(X[:, 0] > 0, "Rice", "Wheat")), api.MODEL_PATH)
+
+    response = client.post("/explain", json={"rows": ROWS})
+    assert response.status_code == 409
+    assert "LogisticRegression" in response.json()["detail"]
+    assert client.post("/recommend/batch", json={"rows": ROWS}).status_code == 200
@@ -0,0 +1,85 @@
+import logging
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from prophet import Prophet
+
+from src.api.forecast_service import ForecastService
+from src.model.train_yield_model import model_filename
+
+logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+
+def fit_prophet(trend):
+    years = pd.date_range("1990-01-01", periods=20, freq="YS")
+    y = 20_000 + trend * np.arange(20) + np.random.default_rng(0).normal(0, 200, 20)
+    return Prophet(yearly_seasonality=False, weekly_seasonality=False, daily_seasonality=False,
+                   uncertainty_samples=50).fit(pd.DataFrame({"ds": years, "y": y}))
+
+
+@pytest.fixture(scope="module")
+def models():
+    """Pickled Prophet models with an upward and a downward trend."""
+    return {"up": pickle.dumps(fit_prophet(500)), "down": pickle.dumps(fit_prophet(-500))}
+
+
+def write_model(directory, key, blob, mtime_ns=None):
+    path = directory / model_filename(key)
+    path.write_bytes(blob)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def test_cached_forecast_is_invalidated_when_the_model_file_changes(tmp_path, models):
+    write_model(tmp_path, ("Wheat",), models["up"], mtime_ns=1_700_000_000_000_000_000)
+    service = ForecastService(str(tmp_path))
+
+    first = service.forecast("Wheat", periods=3, intervals=False)
+    assert first["cached"] is False
+    assert service.forecast("Wheat", periods=3, intervals=False)["cached"] is True
+
+    # Retrained model: same path, new mtime
+    write_model(tmp_path, ("Wheat",), models["down"], mtime_ns=1_700_000_100_000_000_000)
+    refreshed = service.forecast("Wheat", periods=3, intervals=False)
+    assert refreshed["cached"] is False
+    assert refreshed["model_version"] != first["model_version"]
+    assert refreshed["forecast"][-1]["yhat"] < first["forecast"][-1]["yhat"]
+    assert service.info()["forecasts_cached"] == 1  # the stale entry was dropped
+    assert service.stats["model_loads"] == 2
+
+
+def test_area_model_preferred_over_crop_model(tmp_path, models):
+    write_model(tmp_path, ("Wheat",), models["up"])
+    write_model(tmp_path, ("India", "Wheat"), models["down"])
+    service = ForecastService(str(tmp_path))
+
+    assert service.forecast("Wheat", "India", periods=2)["model"] == model_filename(("India", "Wheat"))
+    assert service.forecast("Wheat", "Kenya", periods=2)["model"] == model_filename(("Wheat",))
+    assert service.forecast("Rice", "India") is None
+
+
+def test_ttl_expires_cached_forecasts(tmp_path, models):
+    write_model(tmp_path, ("Wheat",), models["up"])
+    service = ForecastService(str(tmp_path), ttl_seconds=0)
+
+    service.forecast("Wheat", periods=2, intervals=False)
+    assert service.forecast("Wheat", periods=2, intervals=False)["cached"] is False
+    assert service.stats["expired"] == 1
+
+
+def test_forecast_endpoint(client, api, models):
+    write_model(Path(api.PROPHET_MODEL_DIR), ("Wheat",), models["up"])
+
+    response = client.get("/forecast", params={"crop": "Wheat", "horizon": 4})
+    assert response.status_code == 200
+    body = response.json()
+    assert [row["year"] for row in body["forecast"]] == [2010, 2011, 2012, 2013]
+    assert {"yhat_lower", "yhat_upper"} <= set(body["forecast"][0])
+
+    assert client.get("/forecast", params={"crop": "Rice"}).status_code == 404
+    assert client.get("/metrics/forecast").json()["misses"] == 1
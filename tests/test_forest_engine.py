@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from src.model import forest_engine
+from src.model.forest_engine import ForestEngine
+
+BACKENDS = ["numpy"] + (["numba"] if forest_engine.njit is not None else [])
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.gamma(2.0, 50.0, 600), rng.normal(24, 6, 600), rng.beta(5, 3, 600)])
+    y = np.array(["Maize", "Rice", "Wheat"])[(X[:, 0] > 100).astype(int) + (X[:, 2] > 0.6).astype(int)]
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0).fit(scaler.transform(X), y)
+    return X, scaler, model
+
+
+def threshold_rows(model, n_features, rng):
+    """Rows whose features sit exactly on split thresholds (the `<=` boundary)."""
+    thresholds = np.concatenate([est.tree_.threshold[est.tree_.feature == f][:, None] * np.eye(n_features)[f]
+                                 for est in model.estimators_ for f in range(n_features)])
+    rows = rng.normal(0, 1, thresholds.shape)
+    on = thresholds != 0
+    rows[on] = thresholds[on]
+    return rows
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_matches_sklearn_with_scaler(fitted, backend):
+    X, scaler, model = fitted
+    engine = ForestEngine.from_sklearn(model, scaler)
+    rows = np.vstack([X, np.random.default_rng(1).normal(X.mean(0), X.std(0), (200, 3))])
+
+    expected = model.predict_proba(scaler.transform(rows))
+    np.testing.assert_array_equal(engine.predict_proba(rows, backend=backend), expected)
+    np.testing.assert_array_equal(engine.predict(rows, backend=backend), model.predict(scaler.transform(rows)))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_matches_sklearn_on_split_thresholds(fitted, backend):
+    _, _, model = fitted
+    engine = ForestEngine.from_sklearn(model)  # no scaler: rows reach the trees exactly as given
+    rows = threshold_rows(model, 3, np.random.default_rng(2))
+
+    np.testing.assert_array_equal(engine.predict_proba(rows, backend=backend), model.predict_proba(rows))
+
+
+def test_save_load_round_trip(fitted, tmp_path):
+    X, scaler, model = fitted
+    engine = ForestEngine.from_sklearn(model, scaler, features=["Rainfall", "Temperature", "NDVI"])
+    engine.save(tmp_path / "engine.npz")
+
+    loaded = ForestEngine.load(tmp_path / "engine.npz")
+    np.testing.assert_array_equal(loaded.predict_proba(X, backend="numpy"), model.predict_proba(scaler.transform(X)))
+    assert loaded.features == ["Rainfall", "Temperature", "NDVI"]
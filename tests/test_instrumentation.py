@@ -0,0 +1,40 @@
+import re
+
+import pytest
+
+from src.monitoring.instrumentation import REGISTRY, Histogram
+
+
+@pytest.fixture
+def histogram():
+    metric = Histogram("test_seconds", "Test histogram.", ["span"], buckets=(0.1, 1.0))
+    yield metric
+    REGISTRY.remove(metric)
+
+
+def _samples(text):
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in text.splitlines() if not line.startswith("#")}
+
+
+def test_value_above_every_bound_is_counted_in_inf_bucket(histogram):
+    histogram.observe(0.05, span="stage")
+    histogram.observe(500.0, span="stage")
+
+    samples = _samples(histogram.render())
+    assert samples['test_seconds_bucket{span="stage",le="0.1"}'] == 1
+    assert samples['test_seconds_bucket{span="stage",le="1.0"}'] == 1
+    assert samples['test_seconds_bucket{span="stage",le="+Inf"}'] == 2
+    assert samples['test_seconds_count{span="stage"}'] == 2
+    assert samples['test_seconds_sum{span="stage"}'] == pytest.approx(500.05)
+
+
+def test_inf_bucket_equals_count(histogram):
+    for value in (0.01, 0.5, 2.0, 301.0, 1e6):
+        histogram.observe(value, span="a")
+    samples = _samples(histogram.render())
+
+    buckets = [v for k, v in samples.items() if k.startswith("test_seconds_bucket")]
+    assert buckets == sorted(buckets)  # cumulative
+    inf = next(v for k, v in samples.items() if re.search(r'le="\+Inf"', k))
+    assert inf == samples['test_seconds_count{span="a"}'] == 5
@@ -0,0 +1,79 @@
+import os
+import time
+
+import joblib
+import numpy as np
+
+from src.api.model_registry import ModelRegistry
+from tests.conftest import fit_recommender
+
+FEATURES = ["Rainfall_sat", "Temperature_sat", "NDVI_sat"]
+
+
+def bump_mtime(path):
+    """Move the mtime forward so the watcher sees a change even within one clock tick."""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_refresh_swaps_in_a_retrained_model(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump(fit_recommender(seed=0), path)
+    registry = ModelRegistry(str(path), FEATURES, poll_seconds=0)
+
+    first = registry.get()
+    first_version = registry.info()["version"]
+    assert registry.refresh() is False  # unchanged file
+
+    joblib.dump(fit_recommender(seed=1, n_estimators=3), path)
+    bump_mtime(path)
+    assert registry.refresh() is True
+    assert registry.get() is not first
+    assert len(registry.get().estimator.estimators_) == 3
+    assert registry.info()["version"] != first_version
+    assert registry.loads == 2
+
+
+def test_watcher_hot_swaps_after_first_use(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump(fit_recommender(), path)
+    registry = ModelRegistry(str(path), FEATURES, poll_seconds=0.02)
+    registry.start_watcher()
+    try:
+        first = registry.get()
+        joblib.dump(fit_recommender(seed=2, n_estimators=3), path)
+        bump_mtime(path)
+        deadline = time.monotonic() + 5
+        while registry.get() is first and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert registry.get() is not first
+    finally:
+        registry.stop_watcher()
+    assert registry.info()["watching"] is False
+
+
+def test_failed_load_keeps_the_current_version(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump(fit_recommender(), path)
+    registry = ModelRegistry(str(path), FEATURES, poll_seconds=0)
+    current = registry.get()
+
+    path.write_bytes(b"half-written artifact")
+    bump_mtime(path)
+    assert registry.refresh() is False
+    assert registry.get() is current
+    assert registry.info()["last_error"]
+    assert registry.get().predict(np.array([[100.0, 24.0, 0.5]])).shape == (1,)
+
+
+def test_reload_endpoint_serves_the_new_version(client, api):
+    assert client.get("/model").json()["loaded"] is False
+    before = client.post("/recommend/batch", json={"rows": [[100.0, 24.0, 0.5]]}).json()
+    version = client.get("/model").json()["version"]
+
+    joblib.dump(fit_recommender(seed=5, n_estimators=2), api.MODEL_PATH)
+    bump_mtime(api.MODEL_PATH)
+    body = client.post("/model/reload").json()
+    assert body["swapped"] is True
+    assert body["version"] != version
+    assert client.post("/recommend/batch", json={"rows": [[100.0, 24.0, 0.5]]}).json()["count"] == before["count"]
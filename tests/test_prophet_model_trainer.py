@@ -0,0 +1,42 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+from prophet import Prophet
+
+from src.model.prophet_model_trainer import PROPHET_PARAMS, ProphetModelTrainer
+
+logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+
+def yields(n_years, area="India", crop="Wheat"):
+    rng = np.random.default_rng(0)
+    years = np.arange(1990, 1990 + n_years)
+    return pd.DataFrame({"Area": area, "Crop": crop, "Year": years,
+                         "Yield": 20_000 + 300 * (years - 1990) + rng.normal(0, 500, n_years)})
+
+
+def cold_changepoints(df):
+    data = ProphetModelTrainer().prepare_data(df, "Wheat", "India")
+    return Prophet(**PROPHET_PARAMS).fit(data).n_changepoints
+
+
+@pytest.mark.parametrize("first, grown", [(14, 30), (30, 32)])
+def test_refit_on_grown_series_matches_cold_changepoints(first, grown):
+    trainer = ProphetModelTrainer()
+    trainer.train(yields(first), "Wheat", "India")
+    short_model = trainer.model
+
+    assert trainer.train(yields(grown), "Wheat", "India", periods=3) is not None
+    assert trainer.model is not short_model
+    assert trainer.model.n_changepoints == cold_changepoints(yields(grown))
+    assert len(trainer.model.params["delta"][0]) == trainer.model.n_changepoints
+
+
+def test_model_cache_is_bounded():
+    trainer = ProphetModelTrainer(cache_size=2, model_cache_size=2)
+    for area in ("A", "B", "C"):
+        trainer.train(yields(12, area=area), "Wheat", area)
+    assert list(trainer._models) == [("B", "Wheat"), ("C", "Wheat")]
+    assert len(trainer._forecasts) == 2
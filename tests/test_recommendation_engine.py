@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model import recommendation_engine
+from src.model.recommendation_engine import MAX_CATEGORIES, RecommendationEngine
+
+CROPS = ["Maize", "Rice", "Wheat"]
+
+
+def synthetic_yields(n_areas, years=range(2010, 2015), seed=0):
+    """Yields where an area's suitability decides between Rice (high) and Wheat (low)."""
+    rng = np.random.default_rng(seed)
+    suitability = rng.normal(0, 1, n_areas)
+    rows = []
+    for i, s in enumerate(suitability):
+        for crop in CROPS:
+            log_yield = 10 + {"Maize": 0.0, "Rice": 0.8 * s, "Wheat": -0.8 * s}[crop]
+            for year in years:
+                rows.append({"Area": f"Area {i:03d}", "Crop": crop, "Year": year,
+                             "avg_temp": 20 + 3 * s + rng.normal(0, 0.5),
+                             "average_rain_fall_mm_per_year": 1000 + rng.normal(0, 50),
+                             "Yield": np.expm1(log_yield + rng.normal(0, 0.05))})
+    return pd.DataFrame(rows), suitability
+
+
+def test_ranks_more_areas_than_native_categories():
+    df, suitability = synthetic_yields(MAX_CATEGORIES + 45)
+    engine = RecommendationEngine.fit(df, max_iter=60)
+    assert engine.area_effect is not None and len(engine.areas) == 300
+
+    best = np.array([engine.rank(area, top_k=1)["Crop"].iloc[0] for area in engine.areas])
+    expected = np.where(suitability > 0, "Rice", "Wheat")
+    clear = np.abs(suitability) > 0.3  # near zero the three crops tie
+    assert (best[clear] == expected[clear]).mean() > 0.95
+
+    engine.precompute()
+    assert engine.rank("Area 000", top_k=1)["Crop"].iloc[0] == best[0]
+
+
+def test_few_areas_stay_native_categorical():
+    df, _ = synthetic_yields(20)
+    engine = RecommendationEngine.fit(df, max_iter=30)
+    assert engine.area_effect is None
+    assert sorted(engine.rank("Area 000")["Crop"]) == CROPS
+
+
+def test_explanation_sums_to_the_prediction_difference(monkeypatch):
+    df, _ = synthetic_yields(20)
+    engine = RecommendationEngine.fit(df, max_iter=30)
+
+    explained = engine.explain("Area 003", "Rice")
+    year, values = engine.area_conditions["Area 003"]
+    baseline = np.nanmean(np.stack([v for _, v in engine.area_conditions.values()]), axis=0)
+    at_area, at_baseline = engine.model.predict(engine._matrix(["Area 003"] * 2, ["Rice"] * 2, [year] * 2,
+                                                               np.stack([values, baseline])))
+    assert set(explained["feature"]) == set(engine.conditions)
+    assert explained["contribution"].sum() == pytest.approx(at_area - at_baseline, abs=1e-9)
+
+    monkeypatch.setattr(recommendation_engine, "MAX_EXACT_FEATURES", 1)
+    with pytest.raises(ValueError, match="MAX_EXACT_FEATURES"):
+        engine.explain("Area 003", "Rice")
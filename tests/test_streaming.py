@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_preprocessing.streaming import in_memory_aggregate, normalize_chunk, stream_aggregate
+
+GROUPS = ["Crop", "Year"]
+RENAME = {"Crop_Type": "Crop", "NDVI": "NDVI_sat"}
+
+
+@pytest.fixture
+def satellite_files(tmp_path):
+    """Two small satellite exports with missing values, in the raw (pre-rename) column names."""
+    rng = np.random.default_rng(0)
+    paths = []
+    for i, n in enumerate((1_000, 700)):
+        frame = pd.DataFrame({
+            "Crop_Type": rng.choice(["Maize", "Wheat", "Rice"], n),
+            "Year": rng.integers(2000, 2005, n),
+            "NDVI": rng.uniform(0, 1, n),
+            "Rainfall": rng.gamma(2.0, 50.0, n),
+        })
+        frame.loc[rng.random(n) < 0.1, "Rainfall"] = np.nan
+        path = tmp_path / f"satellite_{i}.csv"
+        frame.to_csv(path, index=False)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_streamed_aggregates_match_in_memory(satellite_files, max_workers):
+    # Chunks much smaller than a file, so groups are split across chunks and files
+    streamed = stream_aggregate(satellite_files, GROUPS, rename=RENAME, chunksize=97, max_workers=max_workers)
+
+    df = pd.concat([normalize_chunk(pd.read_csv(p), RENAME) for p in satellite_files], ignore_index=True)
+    grouped = df.groupby(GROUPS)[["NDVI_sat", "Rainfall"]]
+
+    expected_mean = in_memory_aggregate(satellite_files, GROUPS, rename=RENAME).set_index(GROUPS)
+    pd.testing.assert_frame_equal(streamed.mean().sort_index()[expected_mean.columns], expected_mean.sort_index(),
+                                  check_names=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(streamed.count.sort_index().astype("int64"), grouped.count().sort_index(),
+                                  check_names=False)
+    pd.testing.assert_frame_equal(np.sqrt(streamed.var()).sort_index(), grouped.std().sort_index(),
+                                  check_names=False, rtol=1e-9)